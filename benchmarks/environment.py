@@ -0,0 +1,69 @@
+import os
+from typing import Optional
+
+from benchmarks.fake_bot_api import FAKE_BOT_TOKEN, FakeBotApiRequest
+
+
+def prepare(workdir: str, redis_url: Optional[str] = None, telegram_latency: float = 0.0) -> FakeBotApiRequest:
+    """
+    Point the application at offline stand-ins. Must run before any application module is imported,
+    because config_properties and the database engine are created at import time.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'benchmark.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploaded_videos")
+    os.environ["TRIMMED_DIR"] = os.path.join(workdir, "trimmed_videos")
+    os.environ["TRACE_LOG_FILE"] = os.path.join(workdir, "trace.log")
+    # Keep admission control on the measured path without letting it throttle the load
+    os.environ.setdefault("ADMISSION_MAX_QUEUE_DEPTH", str(10 ** 9))
+    os.environ.setdefault("ADMISSION_MAX_DRAIN_SECONDS", str(10 ** 9))
+    os.environ.setdefault("ADMISSION_CLIENT_BURST", str(10 ** 9))
+    os.chdir(workdir)
+
+    _register_sqlite_types()
+    _install_redis(redis_url)
+    return _install_telegram(telegram_latency)
+
+
+def _register_sqlite_types() -> None:
+    from sqlalchemy import ARRAY
+    from sqlalchemy.ext.compiler import compiles
+
+    # trimmed_videos.hashtags is a Postgres ARRAY; SQLite stores it as JSON
+    @compiles(ARRAY, "sqlite")
+    def compile_array(type_, compiler, **kw):
+        return "JSON"
+
+
+def _install_redis(redis_url: Optional[str]) -> None:
+    import redis
+
+    from redis_queue.redis_client import RedisManager
+
+    if redis_url:
+        client = redis.Redis.from_url(redis_url, decode_responses=True)
+        binary_client = redis.Redis.from_url(redis_url)
+        client.flushdb()
+    else:
+        import fakeredis
+        server = fakeredis.FakeServer()
+        client = fakeredis.FakeRedis(server=server, decode_responses=True)
+        binary_client = fakeredis.FakeRedis(server=server)
+    RedisManager._RedisManager__client = client
+    RedisManager._RedisManager__binary_client = binary_client
+
+
+def _install_telegram(latency: float) -> FakeBotApiRequest:
+    from telegram.ext import Application as TelegramBotApplication
+
+    from telegram_bot.telegram_client import TelegramManager
+
+    request = FakeBotApiRequest(latency)
+    TelegramManager._TelegramManager__client = (
+        TelegramBotApplication.builder()
+        .token(FAKE_BOT_TOKEN)
+        .request(request)
+        .get_updates_request(FakeBotApiRequest(latency))
+        .build()
+    )
+    return request
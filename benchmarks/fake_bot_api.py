@@ -0,0 +1,56 @@
+import asyncio
+import json
+import time
+from collections import Counter
+from typing import Optional, Tuple
+
+from telegram.request import BaseRequest, RequestData
+
+FAKE_BOT_TOKEN = "123456:benchmark-token"
+
+
+class FakeBotApiRequest(BaseRequest):
+    """Answers Bot API calls locally so handler flows can be timed without network access."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self._message_id = 0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(self, url: str, method: str, request_data: Optional[RequestData] = None,
+                         read_timeout=None, write_timeout=None, connect_timeout=None,
+                         pool_timeout=None) -> Tuple[int, bytes]:
+        endpoint = url.rsplit("/", 1)[-1]
+        self.calls[endpoint] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        parameters = request_data.parameters if request_data else {}
+        return 200, json.dumps({"ok": True, "result": self._result(endpoint, parameters)}).encode()
+
+    def _result(self, endpoint: str, parameters: dict):
+        if endpoint == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "Benchmark", "username": "benchmark_bot"}
+        if endpoint == "sendMediaGroup":
+            return [self._message(parameters, video=True) for _ in parameters.get("media", [])]
+        if endpoint.startswith("send") or endpoint.startswith("edit"):
+            return self._message(parameters, video=endpoint == "sendVideo")
+        return True
+
+    def _message(self, parameters: dict, video: bool = False) -> dict:
+        self._message_id += 1
+        message = {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": int(parameters.get("chat_id", 0) or 0), "type": "private"},
+            "text": parameters.get("text", "")
+        }
+        if video:
+            message["video"] = {"file_id": f"video-{self._message_id}", "file_unique_id": f"unique-{self._message_id}",
+                                "width": 1280, "height": 720, "duration": 30}
+        return message
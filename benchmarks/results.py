@@ -0,0 +1,46 @@
+import statistics
+from typing import Dict, List, Optional
+
+# Metrics where a larger value is a regression, and the one where a smaller value is
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+THROUGHPUT_METRIC = "ops_per_sec"
+
+
+def summarize(samples: List[float], wall_time: float, operations: Optional[int] = None) -> Dict[str, float]:
+    """
+    Summarize per-operation durations (seconds) measured over wall_time seconds. operations is the number of
+    operations performed when each sample is the average of a batch rather than a single operation.
+    """
+    ordered = sorted(samples)
+    operations = operations or len(ordered)
+
+    def percentile(fraction: float) -> float:
+        index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[index] * 1000
+
+    return {
+        "count": operations,
+        "wall_time_s": round(wall_time, 4),
+        "ops_per_sec": round(operations / wall_time, 2) if wall_time else 0.0,
+        "mean_ms": round(statistics.fmean(ordered) * 1000, 3),
+        "p50_ms": round(percentile(0.50), 3),
+        "p95_ms": round(percentile(0.95), 3),
+        "p99_ms": round(percentile(0.99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Return a description of every benchmark that regressed by more than threshold (a fraction)."""
+    regressions = []
+    for name, base in baseline.items():
+        result = current.get(name)
+        if result is None:
+            continue
+        for metric in LATENCY_METRICS:
+            if base.get(metric) and result[metric] > base[metric] * (1 + threshold):
+                regressions.append(f"{name}: {metric} {base[metric]} -> {result[metric]}")
+        if base.get(THROUGHPUT_METRIC) and result[THROUGHPUT_METRIC] < base[THROUGHPUT_METRIC] * (1 - threshold):
+            regressions.append(
+                f"{name}: {THROUGHPUT_METRIC} {base[THROUGHPUT_METRIC]} -> {result[THROUGHPUT_METRIC]}")
+    return regressions
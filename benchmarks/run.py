@@ -0,0 +1,139 @@
+"""
+Offline benchmark suite for the ingest, queue and completion paths.
+
+Runs against SQLite and an in-memory Redis stand-in (or a local Redis with --redis-url), with a fake
+Telegram Bot API, and writes machine-readable JSON:
+
+    python -m benchmarks.run --output bench_results.json
+    python -m benchmarks.run --compare bench_results.json --threshold 0.15
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from benchmarks import environment
+from benchmarks.results import compare, summarize
+
+ALL_BENCHMARKS = ("url_upload", "video_upload", "completion_consumer", "listing", "telegram_flow", "codecs")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="TrimFlow benchmark suite")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Baseline results JSON; exit non-zero on regressions")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Allowed relative regression before --compare fails (0.15 = 15%%)")
+    parser.add_argument("--only", default=",".join(ALL_BENCHMARKS), help="Comma separated benchmarks to run")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per upload benchmark")
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent requests per upload benchmark")
+    parser.add_argument("--payload-size", type=int, default=1024 * 1024, help="Bytes per /videos/upload/ file")
+    parser.add_argument("--jobs", type=int, default=1000, help="Jobs drained by the completion benchmark")
+    parser.add_argument("--rows", default="10000,100000,1000000", help="Table sizes for the listing benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="Requests per listing table size")
+    parser.add_argument("--flows", type=int, default=100, help="Telegram conversations to drive")
+    parser.add_argument("--telegram-latency", type=float, default=0.0, help="Simulated Bot API latency (s)")
+    parser.add_argument("--codec", default="json", help="Queue payload codec used by the application benchmarks")
+    parser.add_argument("--codec-iterations", type=int, default=20000, help="Payloads per codec micro-benchmark")
+    parser.add_argument("--redis-url", help="Use this Redis instead of the in-memory stand-in (it is flushed)")
+    parser.add_argument("--workdir", help="Directory for the SQLite database and uploaded files")
+    return parser.parse_args(argv)
+
+
+async def run_benchmarks(args: argparse.Namespace, selected: set) -> dict:
+    # Application modules read their configuration at import time, so import them only after prepare()
+    from benchmarks import scenarios
+    import database.database_config as database_config
+    import database.database_models  # noqa: F401  # registers the tables
+    from main import app
+    from services.container import container
+    from telegram_bot.telegram_client import TelegramManager
+
+    database_config.Base.metadata.create_all(bind=database_config.engine)
+    results = {}
+
+    def record(name, measurement):
+        results[name] = summarize(*measurement)
+        logging.info(f"{name}: {results[name]}")
+
+    if "url_upload" in selected:
+        record("url_upload", await scenarios.bench_url_upload(app, args.requests, args.concurrency))
+    if "video_upload" in selected:
+        record("video_upload", await scenarios.bench_video_upload(app, args.requests, args.concurrency,
+                                                                  args.payload_size))
+    if "completion_consumer" in selected:
+        record("completion_consumer", await scenarios.bench_completion_consumer(container.redis_service, args.jobs))
+    if "listing" in selected:
+        for rows in sorted(int(value) for value in args.rows.split(",") if value):
+            record(f"original_videos_listing_{rows}", await scenarios.bench_listing(app, rows, args.repeat))
+            record(f"trimmed_videos_listing_{rows}", await scenarios.bench_trimmed_listing(app, rows, args.repeat))
+    if "telegram_flow" in selected:
+        record("telegram_flow", await scenarios.bench_telegram_flow(TelegramManager.get_client(), args.flows))
+    if "codecs" in selected:
+        from redis_queue.codec import CODECS
+        for codec_name in CODECS:
+            try:
+                encode, decode, size = scenarios.bench_codec(codec_name, args.codec_iterations)
+            except RuntimeError as e:
+                logging.warning(f"Skipping codec {codec_name}: {e}")
+                continue
+            record(f"codec_{codec_name}_encode", encode)
+            record(f"codec_{codec_name}_decode", decode)
+            results[f"codec_{codec_name}_encode"]["payload_bytes"] = size
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+    selected = {name.strip() for name in args.only.split(",") if name.strip()}
+
+    os.environ["QUEUE_PAYLOAD_CODEC"] = args.codec
+    environment.prepare(args.workdir or tempfile.mkdtemp(prefix="trimflow-bench-"), args.redis_url,
+                        args.telegram_latency)
+    results = asyncio.run(run_benchmarks(args, selected))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "redis": "local" if args.redis_url else "in-memory",
+            "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "benchmarks": results,
+    }
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"Results written to {output}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)["benchmarks"]
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            logging.error(f"Regression: {regression}")
+        if regressions:
+            return 1
+        logging.info(f"No regressions above {args.threshold:.0%} against {baseline_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
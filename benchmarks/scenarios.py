@@ -0,0 +1,227 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Tuple
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from database.database_config import database
+from database.database_models import OriginalVideo, TrimmedVideo
+from models.redis_model import ProcessedDataReceiver, TransferDocument
+from models.video_models import VideoProcessInfo
+from redis_queue import codec
+
+SEED_BATCH_SIZE = 10000
+URL_FORM = {
+    "url": "https://example.com/source.mp4",
+    "segment_time": "30",
+    "skip_pairs": "[[10,20],[35,40]]",
+    "screen_type": "portrait",
+    "media_type": "video",
+    "start_time": "0",
+    "end_time": "600",
+}
+VIDEO_FORM = {key: value for key, value in URL_FORM.items() if key not in ("url", "media_type")}
+
+
+async def run_concurrently(operation: Callable[[int], Awaitable[None]], count: int,
+                           concurrency: int) -> Tuple[List[float], float]:
+    """Run operation count times with at most concurrency in flight; return per-call durations and wall time."""
+    samples: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(index: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await operation(index)
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(index) for index in range(count)))
+    return samples, time.perf_counter() - start
+
+
+def api_client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(app=app, base_url="http://benchmark")
+
+
+async def bench_url_upload(app, count: int, concurrency: int) -> Tuple[List[float], float]:
+    async with api_client(app) as client:
+        async def upload(index: int):
+            response = await client.post("/url/upload/", data=URL_FORM)
+            response.raise_for_status()
+
+        return await run_concurrently(upload, count, concurrency)
+
+
+async def bench_video_upload(app, count: int, concurrency: int, payload_size: int) -> Tuple[List[float], float]:
+    payload = b"\0" * payload_size
+    async with api_client(app) as client:
+        async def upload(index: int):
+            response = await client.post("/videos/upload/", data=VIDEO_FORM,
+                                         files={"file": (f"benchmark-{index}.mp4", payload, "video/mp4")})
+            response.raise_for_status()
+
+        return await run_concurrently(upload, count, concurrency)
+
+
+async def bench_completion_consumer(redis_service, count: int) -> Tuple[List[float], float]:
+    """Drain count completed jobs the way MainApp.run_redis does."""
+    redis_client = redis_service.redis_client
+    original_id = _seed_original_videos(1, prefix="completion")
+    job_ids = []
+    for index in range(count):
+        job_id = str(uuid.uuid4())
+        processed = ProcessedDataReceiver(
+            original_video_id=original_id,
+            file_name=f"segment-{index}.mp4",
+            location=f"media/trimmed_videos/segment-{index}.mp4",
+            start_time=index * 30,
+            end_time=(index + 1) * 30,
+            telegram_chat_id=1000 + index % 50,
+        )
+        redis_client.hset(job_id, mapping={**codec.encode_payload(processed), "enqueued_at": time.time()})
+        job_ids.append(job_id)
+
+    samples = []
+    start = time.perf_counter()
+    for job_id in job_ids:
+        operation_start = time.perf_counter()
+        await redis_service.get_processed_video_and_upload(job_id)
+        samples.append(time.perf_counter() - operation_start)
+        # Let the notification tasks scheduled by the messenger run, as they would in the consumer loop
+        await asyncio.sleep(0)
+    pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    await asyncio.gather(*pending, return_exceptions=True)
+    return samples, time.perf_counter() - start
+
+
+async def bench_listing(app, rows: int, repeat: int) -> Tuple[List[float], float]:
+    """Time /videos/original_videos/ with the original_video table holding rows rows."""
+    _seed_original_videos(rows - _count(OriginalVideo), prefix=f"listing-{rows}")
+    async with api_client(app) as client:
+        async def listing(index: int):
+            response = await client.get("/videos/original_videos/")
+            response.raise_for_status()
+
+        return await run_concurrently(listing, repeat, 1)
+
+
+async def bench_trimmed_listing(app, rows: int, repeat: int) -> Tuple[List[float], float]:
+    """Time /videos/trimmed_videos/{file_id} for an original with rows trimmed segments."""
+    video_id = f"trimmed-listing-{rows}"
+    original_id = _seed_original_videos(1, prefix=video_id, video_id=video_id)
+    _seed_trimmed_videos(original_id, rows)
+    async with api_client(app) as client:
+        async def listing(index: int):
+            response = await client.get(f"/videos/trimmed_videos/{video_id}")
+            response.raise_for_status()
+
+        return await run_concurrently(listing, repeat, 1)
+
+
+async def bench_telegram_flow(application, count: int) -> Tuple[List[float], float]:
+    """Drive the URL message + four answers flow through the real handlers against the fake Bot API."""
+    import telegram_bot.handlers.video.video_handler_interface as video_handler_interface
+    from telegram import Update
+    from telegram.ext import CallbackContext
+    from telegram_bot.handlers.video.url_handler import UrlHandler
+
+    await application.initialize()
+    url_handler = UrlHandler()
+    answers = ("landscape", "30", "10", "60")
+
+    async def flow(index: int):
+        user = {"id": 10000 + index, "is_bot": False, "first_name": f"user{index}"}
+        chat = {"id": user["id"], "type": "private"}
+        message = {"message_id": 1, "date": int(time.time()), "chat": chat, "from": user,
+                   "text": "please trim https://example.com/source.mp4"}
+        update = Update.de_json({"update_id": index, "message": message}, application.bot)
+        await url_handler.handle(update, CallbackContext.from_update(update, application))
+        for answer in answers:
+            callback = Update.de_json({"update_id": index, "callback_query": {
+                "id": str(uuid.uuid4()), "from": user, "chat_instance": str(chat["id"]),
+                "data": answer, "message": message
+            }}, application.bot)
+            await video_handler_interface.handle_callback_query(
+                callback, CallbackContext.from_update(callback, application))
+
+    try:
+        return await run_concurrently(flow, count, 1)
+    finally:
+        await application.shutdown()
+
+
+def bench_codec(codec_name: str, count: int, batch: int = 100) -> Tuple[tuple, tuple, int]:
+    """Time encode_payload and decode_payload + validation of a typical job payload with one codec."""
+    payload_codec = codec.get_codec(codec_name)
+    video_process_info = VideoProcessInfo(url=URL_FORM["url"], segment_time=30, skip_pairs=[(10, 20), (35, 40)],
+                                          screen_type="portrait", start_time=0, end_time=600)
+    document = TransferDocument.from_video_process_info(video_process_info, 123456, telegram_chat_id=987654321,
+                                                        trace_id=uuid.uuid4().hex)
+    fields = codec.encode_payload(document, payload_codec)
+
+    batches = max(count // batch, 1)
+
+    def measure(operation) -> Tuple[List[float], float, int]:
+        samples = []
+        start = time.perf_counter()
+        for _ in range(batches):
+            batch_start = time.perf_counter()
+            for _ in range(batch):
+                operation()
+            samples.append((time.perf_counter() - batch_start) / batch)
+        return samples, time.perf_counter() - start, batches * batch
+
+    encode = measure(lambda: codec.encode_payload(
+        TransferDocument.from_video_process_info(video_process_info, 123456), payload_codec))
+    decode = measure(lambda: TransferDocument.model_validate(
+        codec.decode_payload(fields[codec.DATA_FIELD], fields[codec.CODEC_FIELD], fields[codec.SCHEMA_FIELD])))
+    return encode, decode, len(fields[codec.DATA_FIELD])
+
+
+def _count(model) -> int:
+    with database.SessionLocal() as session:
+        return session.execute(select(func.count()).select_from(model)).scalar_one()
+
+
+def _seed_original_videos(count: int, prefix: str, video_id: str = None) -> int:
+    """Bulk insert count original videos and return the id of the last one."""
+    now = datetime.now(timezone.utc)
+    with database.SessionLocal() as session:
+        for offset in range(0, max(count, 0), SEED_BATCH_SIZE):
+            batch = [{
+                "video_id": video_id or f"{prefix}-{offset + index}",
+                "name": f"{prefix}-{offset + index}.mp4",
+                "location": f"media/uploaded_videos/{prefix}-{offset + index}.mp4",
+                "size": 1024,
+                "video_metadata": {},
+                "created_date": now,
+                "created_user": "benchmark",
+                "description": "Original video",
+                "category": "Uncategorized",
+                "remark": "",
+                "addon": {},
+            } for index in range(min(SEED_BATCH_SIZE, count - offset))]
+            session.execute(insert(OriginalVideo), batch)
+        session.commit()
+        return session.execute(select(func.max(OriginalVideo.id))).scalar_one()
+
+
+def _seed_trimmed_videos(original_id: int, count: int) -> None:
+    now = datetime.now(timezone.utc)
+    with database.SessionLocal() as session:
+        for offset in range(0, count, SEED_BATCH_SIZE):
+            batch = [{
+                "original_video_id": original_id,
+                "start_time": timedelta(seconds=(offset + index) * 30),
+                "end_time": timedelta(seconds=(offset + index + 1) * 30),
+                "created_time": now,
+                "updated_time": now,
+                "file_name": f"segment-{offset + index}.mp4",
+                "location": f"media/trimmed_videos/segment-{offset + index}.mp4",
+            } for index in range(min(SEED_BATCH_SIZE, count - offset))]
+            session.execute(insert(TrimmedVideo), batch)
+        session.commit()
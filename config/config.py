@@ -18,6 +18,109 @@ class Properties(BaseSettings):
     TELEGRAM_BOT_TOKEN: str
     REDIS_PORT: int
     QUEUE_TIMEOUT: int
+    TRACE_LOG_FILE: str = "trace.log"
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json, one object per line, or text
+    LOG_FILE: str = "app.log"
+    LOG_MAX_BYTES: int = 50 * 1024 * 1024  # size at which the log and trace files are rotated
+    LOG_BACKUP_COUNT: int = 5  # rotated files kept
+    LOG_QUEUE_SIZE: int = 10000  # records waiting to be written; more are dropped rather than block the caller
+    # logger=fraction pairs; that fraction of a logger's (and its children's) records below WARNING is kept
+    LOG_SAMPLING: str = "httpx=0.1"
+    # any of api, bot, consumer, dispatcher, archiver, fetcher, janitor, analyzer, scheduler, packager
+    APP_ROLES: str = "api,bot,consumer,dispatcher,archiver,fetcher,janitor,analyzer,scheduler,packager"
+    FAIR_QUEUE_ENABLED: bool = True
+    FAIR_DISPATCH_WINDOW: int = 8  # jobs kept in the worker queue; the rest wait in per client queues
+    FAIR_DISPATCH_INTERVAL: float = 0.2  # seconds
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_QUEUE_DEPTH: int = 1000  # jobs waiting for a worker
+    ADMISSION_MAX_DRAIN_SECONDS: int = 3600  # estimated time to work through the queue
+    ADMISSION_DEFAULT_DRAIN_RATE: float = 0.1  # jobs per second, used until a rate has been measured
+    ADMISSION_RATE_WINDOW_MINUTES: int = 5
+    ADMISSION_RATE_MEMORY: int = 24 * 3600  # seconds the last measured worker throughput is used while nothing waits
+    ADMISSION_CLIENT_RATE_PER_MINUTE: float = 30
+    ADMISSION_CLIENT_BURST: int = 10
+    JOB_RECORD_TTL: int = 7 * 24 * 3600  # seconds a finished job hash stays in Redis if it is never archived
+    JOB_ARCHIVE_DELAY: int = 300  # seconds a finished job stays in Redis before it is archived
+    JOB_ARCHIVE_BATCH_SIZE: int = 500
+    JOB_ARCHIVE_INTERVAL: float = 30  # seconds between archive passes when there is nothing left to archive
+    JOB_MAX_ATTEMPTS: int = 5  # failed attempts before a job goes to the dead-letter queue
+    JOB_RETRY_BASE_DELAY: float = 30  # seconds before the first retry; doubled for every attempt after it
+    JOB_RETRY_MAX_DELAY: float = 3600  # seconds
+    JOB_SCHEDULE_MAX_AHEAD: int = 30 * 24 * 3600  # seconds; how far ahead jobs may be scheduled
+    SCHEDULER_POLL_INTERVAL: float = 1  # seconds
+    SCHEDULER_BATCH_SIZE: int = 100  # due jobs released per pass
+    WORKER_HEARTBEAT_TTL: float = 30  # seconds without a heartbeat before a worker counts as gone
+    WORKER_PREFETCH: int = 1  # jobs queued for every registered worker on top of its free slots
+    WORKER_REGISTRY_CACHE: float = 2  # seconds a snapshot of the registry is reused for routing
+    DEAD_LETTER_RETENTION: int = 14 * 24 * 3600  # seconds a dead-lettered job can be requeued before it is archived
+    QUEUE_PAYLOAD_CODEC: str = "json"  # json, orjson or msgpack; workers must use the same codec layer
+    FETCH_STAGE_ENABLED: bool = True  # download URL sources before queueing, instead of in every worker
+    FETCH_CACHE_DIR: str = ""  # defaults to UPLOAD_DIR/download_cache so the media mount serves it
+    FETCH_MAX_CONCURRENCY: int = 8
+    FETCH_PER_HOST_CONCURRENCY: int = 2
+    FETCH_RANGE_THRESHOLD: int = 64 * 1024 * 1024  # bytes; larger files are downloaded in parallel parts
+    FETCH_RANGE_PARTS: int = 4
+    FETCH_TIMEOUT: float = 60  # seconds
+    FETCH_POLL_INTERVAL: float = 0.2  # seconds
+    FETCH_WINDOW_ENABLED: bool = True  # fetch only the trim window of MP4 and HLS sources
+    FETCH_WINDOW_MIN_SIZE: int = 32 * 1024 * 1024  # bytes; smaller MP4 files are downloaded whole
+    FETCH_WINDOW_PADDING: float = 2  # seconds fetched past end_time
+    STORAGE_BACKEND: str = "local"  # local or s3
+    S3_ENDPOINT_URL: str = ""  # empty for AWS, e.g. http://minio:9000 otherwise
+    S3_BUCKET: str = "trimflow"
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY_ID: str = ""  # empty to use the default AWS credential chain
+    S3_SECRET_ACCESS_KEY: str = ""
+    S3_MULTIPART_PART_SIZE: int = 16 * 1024 * 1024  # bytes, at least 5 MiB
+    S3_MULTIPART_CONCURRENCY: int = 4
+    S3_PRESIGNED_URL_EXPIRY: int = 3600  # seconds
+    STORAGE_NODE_NAME: str = ""  # name of this node's storage index, defaults to the hostname
+    STORAGE_QUOTA_BYTES: int = 0  # cap on indexed local media; 0 to use the size of the disk instead
+    STORAGE_HIGH_WATERMARK: float = 0.90  # fraction of the disk (or quota) in use that starts eviction
+    STORAGE_LOW_WATERMARK: float = 0.80  # eviction stops once usage is back under this fraction
+    STORAGE_EVICT_MIN_AGE: float = 600  # seconds since last use before a file may be evicted
+    STORAGE_EVICT_BATCH: int = 100
+    STORAGE_JANITOR_INTERVAL: float = 60  # seconds
+    TELEGRAM_PROGRESS_ENABLED: bool = True  # edit one progress message per Telegram job
+    TELEGRAM_PROGRESS_MIN_INTERVAL: float = 3  # seconds between edits in one chat
+    TELEGRAM_PROGRESS_MAX_EDITS: int = 20  # edits per flush across all chats
+    TELEGRAM_PROGRESS_FLUSH_INTERVAL: float = 1  # seconds
+    TELEGRAM_PROGRESS_BATCH: int = 500  # progress events read per flush
+    TELEGRAM_MEDIA_GROUP_SIZE: int = 10  # segments per album, at most 10
+    TELEGRAM_UPLOAD_MAX_BYTES: int = 50 * 1024 * 1024  # larger segments are sent as links
+    FFMPEG_BINARY: str = "ffmpeg"
+    ANALYSIS_MAX_CONCURRENCY: int = 2  # sources decoded at once by the analyzer role
+    ANALYSIS_POLL_INTERVAL: float = 0.5  # seconds
+    ANALYSIS_TIMEOUT: float = 600  # seconds; jobs whose analysis takes longer are cut at fixed intervals
+    SCENE_PROXY_FPS: float = 4  # frames per second decoded for scene detection
+    SCENE_PROXY_WIDTH: int = 64
+    SCENE_PROXY_HEIGHT: int = 36
+    SCENE_BATCH_FRAMES: int = 256  # proxy frames scored per NumPy batch
+    SCENE_THRESHOLD: float = 0.3  # 0..1 frame change score that counts as a scene change
+    SCENE_SNAP_TOLERANCE: float = 5  # seconds a segment boundary may move to reach a scene change
+    SILENCE_SAMPLE_RATE: int = 8000  # Hz; mono PCM decoded for silence detection
+    SILENCE_WINDOW: float = 0.05  # seconds per RMS window
+    SILENCE_CHUNK_SECONDS: int = 60  # seconds of audio read per NumPy batch
+    SILENCE_THRESHOLD_DB: float = -40  # dBFS below which a window is silent
+    SILENCE_MIN_DURATION: float = 2  # seconds; shorter pauses are kept
+    SILENCE_PADDING: float = 0.25  # seconds of silence kept next to the sound on either side
+    HLS_OUTPUT_DIR: str = ""  # defaults to UPLOAD_DIR/hls so the media mount serves it
+    HLS_PART_TIME: float = 4  # seconds per fMP4 part; stream copy cuts at keyframes, so parts can run longer
+    HLS_MAX_CONCURRENCY: int = 2  # segments packaged at once by the packager role
+    HLS_POLL_INTERVAL: float = 0.5  # seconds
+    HLS_TIMEOUT: float = 300  # seconds to package one segment
+    HLS_PLAYLIST_MAX_AGE: int = 2  # seconds clients may cache a playlist; job playlists grow until the job completes
+    HLS_PART_MAX_AGE: int = 24 * 3600  # seconds clients may cache init sections and parts
+    IMAGE_OUTPUT_DIR: str = ""  # defaults to UPLOAD_DIR/images so the media mount serves it
+    IMAGE_MAX_FILES: int = 200  # images per album or zip
+    IMAGE_MAX_BATCH_BYTES: int = 512 * 1024 * 1024  # uncompressed bytes per album or zip
+    IMAGE_MAX_PIXELS: int = 100_000_000  # larger images are refused before they are decoded
+    IMAGE_JPEG_QUALITY: int = 85
+    SUBTITLE_MAX_BYTES: int = 5 * 1024 * 1024  # largest SRT sidecar accepted with an upload
+    SEARCH_PAGE_SIZE: int = 50
+    SEARCH_MAX_PAGE_SIZE: int = 200
+    SEARCH_FACET_LIMIT: int = 20  # values returned per facet
 
     
     class Config:
@@ -3,6 +3,43 @@
 # redis constants
 REDIS_VIDEO_QUEUE_NAME : str = "video_processing_queue"
 REDIS_VIDEO_PROCESSING_COMPLETED_QUEUE_NAME : str= "video_processing_completed"
+REDIS_VIDEO_PROCESSING_FAILED_QUEUE_NAME : str = "video_processing_failed"  # jobs a worker gave up on
+REDIS_FETCH_QUEUE_NAME : str = "video_fetch_queue"  # URL jobs waiting for their source to be downloaded
+REDIS_ANALYSIS_QUEUE_NAME : str = "video_analysis_queue"  # jobs waiting for their segments to be planned
+REDIS_JOB_PROGRESS_QUEUE_NAME : str = "video_processing_progress"  # keys of jobs whose progress changed
+REDIS_JOB_KEY_PREFIX : str = "job"
+REDIS_STORAGE_INDEX_PREFIX : str = "storage_index"
+REDIS_JOB_ARCHIVE_QUEUE_NAME : str = "job_archive_queue"  # sorted set of finished job keys
+REDIS_SUBTITLES_SUFFIX : str = "subtitles"  # job:<id>:subtitles, the SRT of every planned segment
+REDIS_SCHEDULED_JOBS_KEY : str = "scheduled_jobs"  # sorted set of job keys by the time they are due
+REDIS_DEAD_LETTER_KEY : str = "dead_letter_queue"  # sorted set of job keys that ran out of attempts
+REDIS_WORKERS_KEY : str = "workers"  # sorted set of worker ids by last heartbeat; their state is in workers:<id>
+REDIS_HLS_QUEUE_NAME : str = "video_hls_queue"  # keys of jobs with segments waiting to be packaged as HLS
+REDIS_HLS_SUFFIX : str = "hls"  # job:<id>:hls, the packaged segments; job:<id>:hls:pending, the ones waiting
+REDIS_SEGMENTS_SUFFIX : str = "segments"  # job:<id>:segments, completed segments waiting to be delivered together
+REDIS_DELIVERED_SUFFIX : str = "delivered"  # job:<id>:delivered, start times of the segments already sent
+# keys that live alongside a job hash, job:<id>:<suffix>, and are archived or dropped with it
+REDIS_JOB_SIDECAR_SUFFIXES : tuple = (REDIS_SUBTITLES_SUFFIX, REDIS_SEGMENTS_SUFFIX, REDIS_DELIVERED_SUFFIX,
+                                      REDIS_HLS_SUFFIX, f"{REDIS_HLS_SUFFIX}:pending")
+
+# job stages: where a delayed or requeued job goes back into the pipeline
+JOB_STAGE_FETCH : str = "fetch"  # download the source
+JOB_STAGE_PLAN : str = "plan"  # analysis if its segments need planning, then the workers
+JOB_STAGE_WORKERS : str = "workers"
+
+# job types: what a worker has to do to a job; each has its own worker queue, REDIS_VIDEO_QUEUE_NAME:<type>
+JOB_TYPE_REENCODE : str = "reencode"
+JOB_TYPE_COPY : str = "copy"  # cuts at keyframes, copying the streams
+JOB_TYPES : tuple = (JOB_TYPE_REENCODE, JOB_TYPE_COPY)
+
+# fair scheduling: per client sub-queues feeding REDIS_VIDEO_QUEUE_NAME
+REDIS_FAIR_QUEUE_PREFIX : str = "fair_queue"
+TELEGRAM_CLIENT_PREFIX : str = "telegram"
+REDIS_TELEGRAM_FILE_ID_KEY : str = "telegram:file_ids"  # content hash -> Telegram file_id
+ANONYMOUS_CLIENT : str = "anonymous"
+
+# admission control
+REDIS_ADMISSION_PREFIX : str = "admission"
 
 
 # Common Terms
@@ -10,6 +47,21 @@ LANDSCAPE :str = "landscape"
 PORTRAIT : str = "portrait"
 IMAGE : str = "image"
 VIDEO :str = "video"
+UNCATEGORIZED : str = "Uncategorized"
+
+# edit types
+EDIT_TYPE_SCENE : str = "scene"  # move segment boundaries onto nearby scene changes
+
+# image uploads
+IMAGE_EXTENSIONS : tuple = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif", ".tif", ".tiff")
+ZIP_EXTENSION : str = ".zip"
+
+# subtitles
+SUBTITLE_EXTENSION : str = ".srt"
+
+# usage rollup source types
+SOURCE_TYPE_UPLOAD : str = "upload"  # file uploaded to this service, over the API or Telegram
+SOURCE_TYPE_URL : str = "url"  # remote URL
 
 # Default values
 DEFAULT_VIDEO_SEGMENT_TIME : int = 55  # seconds
@@ -0,0 +1,24 @@
+from typing import List
+
+from fastapi import HTTPException, UploadFile
+
+from models.image_models import ImageBatchResponse
+from models.video_models import VideoScreenType
+from services.container import container
+
+
+class ImageController:
+    def __init__(self):
+        self.image_service = container.image_service
+
+    async def upload(self, files: List[UploadFile], screen_type: VideoScreenType) -> ImageBatchResponse:
+        """Handle an album or zip upload."""
+        if not files:
+            raise HTTPException(status_code=400, detail="At least one file must be provided")
+        return await self.image_service.process_uploads(files, screen_type)
+
+    async def upload_url(self, url: str, screen_type: VideoScreenType) -> ImageBatchResponse:
+        """Handle an image or zip behind a URL."""
+        if not url:
+            raise HTTPException(status_code=400, detail="URL must be provided")
+        return await self.image_service.process_url(url, screen_type)
@@ -1,22 +1,19 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-import redis
 from fastapi import HTTPException
-from telegram import Update
-from telegram.ext import CallbackContext
 
 from controllers.video_controller_interface import UploadControllerInterface
-from database.database_dto import OriginalVideoDTO, TrimmedVideoDTO
+from database.database_dto import OriginalVideoDTO, TrimmedVideoDTO, OriginalVideoSearchDTO
 from models.file_type_model import FileData
 from models.video_models import VideoUploadResponse, VideoProcessInfo
-from services.redis_service import RedisService
-from services.video_service import VideoService
+from services.container import container
 
 
 class VideoController(UploadControllerInterface):
     def __init__(self):
-        self.video_service = VideoService()
-        self.redis_service = RedisService()
+        self.video_service = container.video_service
+        self.redis_service = container.redis_service
     
     async def upload(self, video_process_info: VideoProcessInfo, file_data: FileData, telegram_chat_id: int) -> VideoUploadResponse:
         if file_data.file is None:
@@ -27,7 +24,8 @@ class VideoController(UploadControllerInterface):
             video_process_info.skip_pairs = []
 
         """Handle video upload request."""
-        return await self.video_service.upload_and_send_to_redis(file, video_process_info)
+        return await self.video_service.upload_and_send_to_redis(file, video_process_info, telegram_chat_id,
+                                                                 file_data.subtitles)
         
         # return VideoUploadResponse(
         #     file_name=video_info.filename,
@@ -40,6 +38,13 @@ class VideoController(UploadControllerInterface):
         """Get all original videos."""
         return await self.video_service.get_all_original_videos()
 
+    async def search_original_videos(self, query: Optional[str], category: Optional[str], created_user: Optional[str],
+                                     created_from: Optional[datetime], created_to: Optional[datetime],
+                                     cursor: Optional[int], limit: int) -> OriginalVideoSearchDTO:
+        """Search original videos by text and facets."""
+        return await self.video_service.search_original_videos(query, category, created_user, created_from,
+                                                               created_to, cursor, limit)
+
     async def get_trimmed_videos_by_original_file_id(self, file_id: str) -> List[TrimmedVideoDTO]:
         """Get all trimmed videos for a given original file ID."""
         return await self.video_service.get_trimmed_videos_by_original_file_id(file_id)
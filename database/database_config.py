@@ -4,16 +4,32 @@ from config.config import config_properties
 
 class Database:
     def __init__(self, database_url: str):
-        # Remove async setup and keep only sync setup
-        self.engine = create_engine(database_url)
-        self.SessionLocal = sessionmaker(
-            bind=self.engine,
-            autocommit=False,
-            autoflush=False
-        )
+        self.database_url = database_url
+        self._engine = None
+        self._session_local = None
 
         self.Base = declarative_base()
 
+    @property
+    def engine(self):
+        # Created on first use so importing the models doesn't load the database dialect
+        if self._engine is None:
+            # Remove async setup and keep only sync setup
+            self._engine = create_engine(self.database_url)
+        return self._engine
+
+    @property
+    def SessionLocal(self):
+        if self._session_local is None:
+            self._session_local = sessionmaker(
+                bind=self.engine,
+                autocommit=False,
+                autoflush=False,
+                # Repositories return instances after their session is closed
+                expire_on_commit=False
+            )
+        return self._session_local
+
     def get_db(self):
         session = self.SessionLocal()
         try:
@@ -31,5 +47,8 @@ Base = database.Base
 # Dependencies
 get_db = database.get_db
 
-# Engine
-engine = database.engine
\ No newline at end of file
+# Engine, resolved lazily on attribute access
+def __getattr__(name):
+    if name == "engine":
+        return database.engine
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -1,14 +1,14 @@
-from datetime import timedelta, datetime
-from typing import Optional, List
+from datetime import timedelta, datetime, date
+from typing import Optional, List, Dict
 
 from pydantic import BaseModel
 
 
 class OriginalVideoDTO(BaseModel):
     video_id: str
-    name: str
+    name: Optional[str]
     location: str
-    size: int
+    size: Optional[int]
     video_metadata: dict
     created_user: str
     description: str
@@ -17,6 +17,17 @@ class OriginalVideoDTO(BaseModel):
     addon: dict
 
 
+class FacetCountDTO(BaseModel):
+    value: str
+    count: int
+
+
+class OriginalVideoSearchDTO(BaseModel):
+    items: List[OriginalVideoDTO]
+    next_cursor: Optional[int] = None  # pass back as cursor for the next page; None on the last page
+    facets: Optional[Dict[str, List[FacetCountDTO]]] = None  # only on the first page
+
+
 class TrimmedVideoDTO(BaseModel):
     original_video_id: int
     start_time: timedelta
@@ -29,3 +40,22 @@ class TrimmedVideoDTO(BaseModel):
     thumbnail: Optional[bytes]
     file_name: str
     location: str
+
+
+class UsageCountsDTO(BaseModel):
+    originals: int = 0
+    segments: int = 0
+    output_seconds: int = 0
+
+
+class UsageBucketDTO(UsageCountsDTO):
+    key: str
+
+
+class UsageStatsDTO(BaseModel):
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    totals: UsageCountsDTO
+    by_day: List[UsageBucketDTO]
+    by_category: List[UsageBucketDTO]
+    by_source_type: List[UsageBucketDTO]
@@ -1,7 +1,7 @@
 from typing import Optional
 
 from sqlalchemy import Column, Integer, String, BigInteger, Text, JSON, TIMESTAMP, Interval, ForeignKey, ARRAY, \
-    LargeBinary
+    LargeBinary, Date, UniqueConstraint
 from sqlalchemy.sql import func
 
 from database.database_config import Base
@@ -16,10 +16,10 @@ class OriginalVideo(Base):
     location: str = Column(Text)
     size: Optional[int] = Column(BigInteger)
     video_metadata: dict = Column(JSON)
-    created_date: str = Column(TIMESTAMP(timezone=True), default=func.now())
-    created_user: str = Column(String(255))
+    created_date: str = Column(TIMESTAMP(timezone=True), default=func.now(), index=True)
+    created_user: str = Column(String(255), index=True)
     description: str = Column(Text)
-    category: str = Column(String(255))
+    category: str = Column(String(255), index=True)
 
     remark: str = Column(Text)
     addon: dict = Column(JSON)
@@ -33,10 +33,65 @@ class TrimmedVideo(Base):
     start_time = Column(Interval, nullable=False)
     end_time = Column(Interval, nullable=False)
     remark = Column(Text, nullable=True)
-    created_time = Column(TIMESTAMP(timezone=True), server_default='CURRENT_TIMESTAMP')
-    updated_time = Column(TIMESTAMP(timezone=True), server_default='CURRENT_TIMESTAMP')
+    created_time = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    updated_time = Column(TIMESTAMP(timezone=True), server_default=func.now())
     description = Column(Text, nullable=True)
     hashtags = Column(ARRAY(Text), nullable=True)
     thumbnail = Column(LargeBinary, nullable=True)
     file_name = Column(Text, nullable=False)
-    location = Column(Text, nullable=False)
\ No newline at end of file
+    location = Column(Text, nullable=False)
+
+
+class TelegramFile(Base):
+    __tablename__ = 'telegram_files'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    content_hash = Column(String(64), nullable=False, unique=True, index=True)
+    file_id = Column(Text, nullable=False)
+    file_unique_id = Column(String(255), nullable=True)
+    size = Column(BigInteger, nullable=True)
+    created_time = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+
+class ProcessedImage(Base):
+    __tablename__ = 'processed_images'
+    __table_args__ = (UniqueConstraint('content_hash', 'screen_type', name='uq_processed_images_source'),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    content_hash = Column(String(64), nullable=False)  # sha256 of the uploaded image
+    screen_type = Column(String(32), nullable=False)
+    file_name = Column(Text, nullable=True)  # name of the first upload with this content
+    location = Column(Text, nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    size = Column(BigInteger, nullable=True)
+    created_time = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+
+class UsageRollup(Base):
+    __tablename__ = 'usage_rollups'
+    __table_args__ = (UniqueConstraint('day', 'category', 'source_type', name='uq_usage_rollups_bucket'),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False, index=True)
+    category = Column(String(255), nullable=False)
+    source_type = Column(String(32), nullable=False)
+    originals = Column(Integer, nullable=False, default=0)
+    segments = Column(Integer, nullable=False, default=0)
+    output_seconds = Column(BigInteger, nullable=False, default=0)
+    updated_time = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class JobRecord(Base):
+    __tablename__ = 'job_records'
+    __table_args__ = (UniqueConstraint('job_id', name='uq_job_records_job_id'),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    job_id = Column(String(255), nullable=False)
+    status = Column(String(32), nullable=False)
+    trace_id = Column(String(64), nullable=True)
+    data = Column(JSON, nullable=True)
+    attributes = Column(JSON, nullable=True)
+    enqueued_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    finished_at = Column(TIMESTAMP(timezone=True), nullable=True)
+    archived_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
\ No newline at end of file
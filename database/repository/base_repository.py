@@ -2,6 +2,7 @@ import logging
 from contextlib import contextmanager
 from sqlalchemy import select, and_
 from database.database_config import database
+from monitoring.metrics import observe_db_query
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +25,7 @@ class BaseRepository:
 
     def save(self, instance):
         """Save an instance to the database."""
-        with self.get_session() as session:
+        with self.get_session() as session, observe_db_query(self.model.__name__, "save"):
             try:
                 session.add(instance)
                 session.commit()
@@ -35,9 +36,18 @@ class BaseRepository:
                 logger.error(f"Error saving {self.model.__name__} data: {str(e)}")
                 raise
 
+    def save_all(self, instances):
+        """Save several instances in one transaction."""
+        with self.get_session() as session, observe_db_query(self.model.__name__, "save_all"):
+            try:
+                session.add_all(instances)
+            except Exception as e:
+                logger.error(f"Error saving {self.model.__name__} data: {str(e)}")
+                raise
+
     def get_all(self):
         """Retrieve all instances of the model."""
-        with self.get_session() as db:
+        with self.get_session() as db, observe_db_query(self.model.__name__, "get_all"):
             try:
                 result = db.execute(select(self.model).order_by(self.model.id.desc()))
                 return result.scalars().all()
@@ -47,7 +57,7 @@ class BaseRepository:
 
     def get_by_id(self, instance_id):
         """Retrieve an instance by its ID."""
-        with self.get_session() as db:
+        with self.get_session() as db, observe_db_query(self.model.__name__, "get_by_id"):
             try:
                 result = db.execute(select(self.model).filter(self.model.id == instance_id))
                 return result.scalars().first()
@@ -57,7 +67,7 @@ class BaseRepository:
 
     def get_by_columns(self, column_value_map: dict):
         """Retrieve instances based on column-value pairs."""
-        with self.get_session() as db:
+        with self.get_session() as db, observe_db_query(self.model.__name__, "get_by_columns"):
             try:
                 conditions = [getattr(self.model, column) == value for column, value in column_value_map.items()]
                 result = db.execute(select(self.model).filter(and_(*conditions)))
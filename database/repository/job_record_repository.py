@@ -0,0 +1,67 @@
+# database/repository/job_record_repository.py
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy import func, inspect, select, text
+
+from database.database_config import database
+from database.database_models import JobRecord
+from database.repository.base_repository import BaseRepository
+from monitoring.metrics import observe_db_query
+
+logger = logging.getLogger(__name__)
+
+# Written by the archiver; archived_at is refreshed on every upsert
+RECORD_COLUMNS = ("job_id", "status", "trace_id", "data", "attributes", "enqueued_at", "finished_at")
+
+
+def ensure_unique_job_ids(engine) -> None:
+    """
+    Make job_id unique on a job_records table created before it was, dropping all but the latest record of
+    each job. Safe to run on every startup.
+    """
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        if not inspector.has_table(JobRecord.__tablename__):
+            return
+        unique_columns = [constraint["column_names"]
+                          for constraint in inspector.get_unique_constraints(JobRecord.__tablename__)]
+        unique_columns += [index["column_names"] for index in inspector.get_indexes(JobRecord.__tablename__)
+                           if index.get("unique")]
+        if ["job_id"] in unique_columns:
+            return
+        removed = connection.execute(text(
+            "DELETE FROM job_records WHERE id NOT IN (SELECT MAX(id) FROM job_records GROUP BY job_id)")).rowcount
+        connection.execute(text("CREATE UNIQUE INDEX uq_job_records_job_id ON job_records (job_id)"))
+        logger.info(f"Made job_records.job_id unique, dropping {removed} duplicate records")
+
+
+class JobRecordRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(JobRecord)
+
+    @staticmethod
+    def _insert():
+        # Both dialects spell the upsert the same way, but each has its own insert construct
+        if database.engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert(JobRecord)
+
+    def upsert_all(self, records: Iterable[JobRecord]) -> None:
+        """Save records in one statement, replacing the one already archived for the same job."""
+        rows = [{column: getattr(record, column) for column in RECORD_COLUMNS} for record in records]
+        if not rows:
+            return
+        statement = self._insert().values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["job_id"],
+            set_={**{column: getattr(statement.excluded, column) for column in RECORD_COLUMNS if column != "job_id"},
+                  "archived_at": func.now()})
+        with self.get_session() as db, observe_db_query(self.model.__name__, "upsert_all"):
+            db.execute(statement)
+
+    def get_by_job_id(self, job_id: str) -> Optional[JobRecord]:
+        with self.get_session() as db, observe_db_query(self.model.__name__, "get_by_job_id"):
+            return db.execute(select(JobRecord).filter(JobRecord.job_id == job_id)).scalars().first()
@@ -1,7 +1,102 @@
 # database/repository/original_video_repository.py
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func, literal_column, table, and_, or_
+
+from database.database_config import database
 from database.database_models import OriginalVideo
 from database.repository.base_repository import BaseRepository
+from database.search_index import SEARCH_DOCUMENT, SEARCH_QUERY_CONFIG, SQLITE_FTS_TABLE
+from monitoring.metrics import observe_db_query
+
+# Facet name -> grouped expression
+FACETS = {
+    "category": OriginalVideo.category,
+    "created_user": OriginalVideo.created_user,
+    "created_date": func.date(OriginalVideo.created_date),
+}
 
 class OriginalVideoRepository(BaseRepository):
     def __init__(self):
-        super().__init__(OriginalVideo)
\ No newline at end of file
+        super().__init__(OriginalVideo)
+
+    def search(self, query: Optional[str] = None, category: Optional[str] = None, created_user: Optional[str] = None,
+               created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+               after_id: Optional[int] = None, limit: int = 50) -> Tuple[List[OriginalVideo], Optional[int]]:
+        """
+        One page of matching videos, newest first, and the cursor of the next page (None on the last page).
+        Pages are keyed on id, so deep pages cost the same as the first one.
+        """
+        conditions = self._conditions(query, category, created_user, created_from, created_to)
+        statement = select(OriginalVideo).filter(*conditions.values())
+        if after_id is not None:
+            statement = statement.filter(OriginalVideo.id < after_id)
+        with self.get_session() as db, observe_db_query(self.model.__name__, "search"):
+            videos = db.execute(statement.order_by(OriginalVideo.id.desc()).limit(limit + 1)).scalars().all()
+        if len(videos) > limit:
+            return videos[:limit], videos[limit - 1].id
+        return videos, None
+
+    def facets(self, query: Optional[str] = None, category: Optional[str] = None, created_user: Optional[str] = None,
+               created_from: Optional[datetime] = None, created_to: Optional[datetime] = None,
+               limit: int = 20) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        The most common values of each facet among the matching videos, with their counts.
+        A facet ignores its own filter so the alternatives to the selected value stay visible.
+        """
+        conditions = self._conditions(query, category, created_user, created_from, created_to)
+        facets = {}
+        with self.get_session() as db, observe_db_query(self.model.__name__, "facets"):
+            for name, column in FACETS.items():
+                own = "created" if name == "created_date" else name
+                count = func.count()
+                result = db.execute(
+                    select(column, count)
+                    .filter(*(condition for key, condition in conditions.items() if key != own))
+                    .filter(column.is_not(None))
+                    .group_by(column)
+                    .order_by(count.desc(), column)
+                    .limit(limit))
+                facets[name] = [(str(value), total) for value, total in result.all()]
+        return facets
+
+    def _conditions(self, query, category, created_user, created_from, created_to) -> dict:
+        conditions = {}
+        text_condition = self._text_condition(query) if query else None
+        if text_condition is not None:
+            conditions["query"] = text_condition
+        if category:
+            conditions["category"] = OriginalVideo.category == category
+        if created_user:
+            conditions["created_user"] = OriginalVideo.created_user == created_user
+        if created_from or created_to:
+            created = []
+            if created_from:
+                created.append(OriginalVideo.created_date >= created_from)
+            if created_to:
+                created.append(OriginalVideo.created_date < created_to)
+            conditions["created"] = and_(*created)
+        return conditions
+
+    @staticmethod
+    def _text_condition(query: str):
+        dialect = database.engine.dialect.name
+        if dialect == "postgresql":
+            # websearch_to_tsquery accepts free text from users without syntax errors
+            return literal_column(SEARCH_DOCUMENT).op("@@")(
+                func.websearch_to_tsquery(literal_column(SEARCH_QUERY_CONFIG), query))
+
+        words = re.findall(r"\w+", query)
+        if not words:
+            return None
+        if dialect == "sqlite":
+            # Quote every word so user input is never read as FTS5 query syntax
+            fts_query = " ".join(f'"{word}"' for word in words)
+            matches = select(literal_column("rowid")).select_from(table(SQLITE_FTS_TABLE)) \
+                .filter(literal_column(SQLITE_FTS_TABLE).op("MATCH")(fts_query))
+            return OriginalVideo.id.in_(matches)
+
+        return and_(*(or_(OriginalVideo.name.ilike(f"%{word}%"), OriginalVideo.description.ilike(f"%{word}%"))
+                      for word in words))
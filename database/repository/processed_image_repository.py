@@ -0,0 +1,38 @@
+# database/repository/processed_image_repository.py
+import logging
+from typing import Dict, Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from database.database_models import ProcessedImage
+from database.repository.base_repository import BaseRepository
+from monitoring.metrics import observe_db_query
+
+logger = logging.getLogger(__name__)
+
+class ProcessedImageRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(ProcessedImage)
+
+    def get_by_hashes(self, content_hashes: Iterable[str], screen_type: str) -> Dict[str, ProcessedImage]:
+        """Map each content hash already processed for the screen type to its output."""
+        content_hashes = list(content_hashes)
+        if not content_hashes:
+            return {}
+        with self.get_session() as db, observe_db_query(self.model.__name__, "get_by_hashes"):
+            result = db.execute(select(ProcessedImage).filter(ProcessedImage.content_hash.in_(content_hashes),
+                                                              ProcessedImage.screen_type == screen_type))
+            return {image.content_hash: image for image in result.scalars().all()}
+
+    def save_images(self, images: List[ProcessedImage]) -> None:
+        """Save a batch in one transaction, falling back to one row at a time if another batch got there first."""
+        try:
+            self.save_all(images)
+        except IntegrityError:
+            for image in images:
+                try:
+                    self.save(image)
+                except IntegrityError:
+                    # Same content processed concurrently; both outputs are identical
+                    logger.info(f"Image {image.content_hash} already stored")
@@ -0,0 +1,34 @@
+# database/repository/telegram_file_repository.py
+import logging
+from typing import Dict, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from database.database_models import TelegramFile
+from database.repository.base_repository import BaseRepository
+from monitoring.metrics import observe_db_query
+
+logger = logging.getLogger(__name__)
+
+class TelegramFileRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(TelegramFile)
+
+    def get_file_ids(self, content_hashes: Iterable[str]) -> Dict[str, str]:
+        """Map each of the content hashes that Telegram already has to its file_id."""
+        content_hashes = list(content_hashes)
+        if not content_hashes:
+            return {}
+        with self.get_session() as db, observe_db_query(self.model.__name__, "get_file_ids"):
+            result = db.execute(select(TelegramFile.content_hash, TelegramFile.file_id)
+                                .filter(TelegramFile.content_hash.in_(content_hashes)))
+            return dict(result.all())
+
+    def save_file(self, content_hash: str, file_id: str, file_unique_id: str = None, size: int = None) -> None:
+        try:
+            self.save(TelegramFile(content_hash=content_hash, file_id=file_id, file_unique_id=file_unique_id,
+                                   size=size))
+        except IntegrityError:
+            # Another delivery of the same content got there first; either file_id works
+            logger.info(f"file_id for {content_hash} already stored")
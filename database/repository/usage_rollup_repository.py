@@ -0,0 +1,66 @@
+# database/repository/usage_rollup_repository.py
+from datetime import date
+from typing import Iterable, List, Optional
+
+from sqlalchemy import select
+
+from database.database_config import database
+from database.database_models import UsageRollup
+from database.repository.base_repository import BaseRepository
+from monitoring.metrics import observe_db_query
+
+BUCKET_COLUMNS = ("day", "category", "source_type")
+COUNTER_COLUMNS = ("originals", "segments", "output_seconds")
+
+class UsageRollupRepository(BaseRepository):
+    def __init__(self):
+        super().__init__(UsageRollup)
+
+    @staticmethod
+    def _insert():
+        # Both dialects spell the upsert the same way, but each has its own insert construct
+        if database.engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert(UsageRollup)
+
+    def increment(self, day: date, category: str, source_type: str, originals: int = 0, segments: int = 0,
+                  output_seconds: int = 0) -> None:
+        """Add to the counters of one bucket, creating it on first use, in a single statement."""
+        statement = self._insert().values(day=day, category=category, source_type=source_type, originals=originals,
+                                          segments=segments, output_seconds=output_seconds)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(BUCKET_COLUMNS),
+            set_={column: getattr(UsageRollup, column) + getattr(statement.excluded, column)
+                  for column in COUNTER_COLUMNS})
+        with self.get_session() as db, observe_db_query(self.model.__name__, "increment"):
+            db.execute(statement)
+
+    def replace(self, buckets: Iterable[dict]) -> int:
+        """Overwrite the counters of the given buckets; returns how many were written."""
+        buckets = list(buckets)
+        if not buckets:
+            return 0
+        statement = self._insert()
+        statement = statement.on_conflict_do_update(
+            index_elements=list(BUCKET_COLUMNS),
+            set_={column: getattr(statement.excluded, column) for column in COUNTER_COLUMNS})
+        with self.get_session() as db, observe_db_query(self.model.__name__, "replace"):
+            db.execute(statement, buckets)
+        return len(buckets)
+
+    def get_range(self, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                  category: Optional[str] = None, source_type: Optional[str] = None) -> List[UsageRollup]:
+        """Buckets between date_from and date_to inclusive."""
+        statement = select(UsageRollup)
+        if date_from:
+            statement = statement.filter(UsageRollup.day >= date_from)
+        if date_to:
+            statement = statement.filter(UsageRollup.day <= date_to)
+        if category:
+            statement = statement.filter(UsageRollup.category == category)
+        if source_type:
+            statement = statement.filter(UsageRollup.source_type == source_type)
+        with self.get_session() as db, observe_db_query(self.model.__name__, "get_range"):
+            return db.execute(statement.order_by(UsageRollup.day)).scalars().all()
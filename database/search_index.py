@@ -0,0 +1,53 @@
+import logging
+
+from sqlalchemy import text
+
+from database.database_models import OriginalVideo
+
+logger = logging.getLogger(__name__)
+
+# Indexed text of an original video. Queries must use this exact expression for Postgres to pick the GIN index.
+SEARCH_DOCUMENT = "to_tsvector('simple'::regconfig, coalesce(name, '') || ' ' || coalesce(description, ''))"
+SEARCH_QUERY_CONFIG = "'simple'::regconfig"
+
+SQLITE_FTS_TABLE = "original_video_fts"
+# External content FTS5 table over original_video, kept in sync by triggers
+SQLITE_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE {SQLITE_FTS_TABLE} USING fts5("
+    f"name, description, content='original_video', content_rowid='id')",
+    f"CREATE TRIGGER original_video_fts_insert AFTER INSERT ON original_video BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    f"CREATE TRIGGER original_video_fts_delete AFTER DELETE ON original_video BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, name, description) "
+    f"VALUES ('delete', old.id, old.name, old.description); END",
+    f"CREATE TRIGGER original_video_fts_update AFTER UPDATE ON original_video BEGIN "
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, name, description) "
+    f"VALUES ('delete', old.id, old.name, old.description); "
+    f"INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+)
+
+
+def ensure_search_index(engine) -> None:
+    """
+    Create the indexes behind original video search on an existing database: the facet column indexes,
+    plus a GIN index on Postgres or an FTS5 table on SQLite. Safe to run on every startup.
+    """
+    with engine.begin() as connection:
+        for index in OriginalVideo.__table__.indexes:
+            index.create(connection, checkfirst=True)
+
+        dialect = connection.dialect.name
+        if dialect == "postgresql":
+            connection.execute(text(f"CREATE INDEX IF NOT EXISTS ix_original_video_search "
+                                    f"ON original_video USING GIN ({SEARCH_DOCUMENT})"))
+        elif dialect == "sqlite":
+            exists = connection.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+                                        {"name": SQLITE_FTS_TABLE}).first()
+            if not exists:
+                for statement in SQLITE_FTS_DDL:
+                    connection.execute(text(statement))
+                # Index the rows written before the table existed
+                connection.execute(text(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')"))
+                logger.info(f"Created {SQLITE_FTS_TABLE} full text table")
+        else:
+            logger.warning(f"No full text index for {dialect}; video search falls back to LIKE scans")
@@ -1,106 +1,299 @@
 import asyncio
 import logging
-import sys
+import time
 
-import redis
-from fastapi import FastAPI
-from starlette.staticfiles import StaticFiles
+from fastapi import FastAPI, Request
 import uvicorn
 import database.database_config as database_config
+from database import search_index
+from database.repository import job_record_repository
 from config import constants
 from config.config import config_properties as properties
+from monitoring import log_pipeline, startup, tracing
+from monitoring.metrics import REQUEST_LATENCY
 from redis_queue.redis_client import RedisManager
-from routers.url_router import UrlRouter
-from routers.video_router import VideoRouter
-from telegram.ext import Application as TelegramBotApplication
-
-from services.redis_service import RedisService
-from telegram_bot.handlers.video.handlers import TelegramBotHandlers
-from telegram_bot.telegram_client import TelegramManager
+from routers.media_router import MediaFiles
+from services.container import container
 
 
 # Configure logging
 def configure_logging():
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler("app.log")
-        ]
-    )
+    # Log calls only enqueue; a listener thread formats and writes, so the event loop never waits on log I/O
+    log_pipeline.configure()
 
 
 class MainApp:
     def __init__(self):
-        configure_logging()
-        self.app = FastAPI(title="Video Trimming Service")
-        self.include_routers()
+        with startup.phase("logging"):
+            configure_logging()
+        with startup.phase("fastapi"):
+            self.app = FastAPI(title="Video Trimming Service")
+        with startup.phase("routers"):
+            self.include_routers()
+        self.add_metrics_middleware()
         self.initialize_database()
-        self.telegram_bot = TelegramManager.get_client()
-        self.redis_service = RedisService()
+
+    @property
+    def redis_service(self):
+        return container.redis_service
 
     # Include routers
     def include_routers(self):
+        # Imported here so their import cost is reported as part of the routers phase
+        from routers.media_router import MediaRouter
+        from routers.image_router import ImageRouter
+        from routers.jobs_router import JobsRouter
+        from routers.metrics_router import MetricsRouter
+        from routers.stats_router import StatsRouter
+        from routers.url_router import UrlRouter
+        from routers.video_router import VideoRouter
+
         video_router = VideoRouter()
         url_router = UrlRouter()
+        metrics_router = MetricsRouter()
         self.app.include_router(video_router.router)
         self.app.include_router(url_router.router)
+        self.app.include_router(ImageRouter().router)
+        self.app.include_router(metrics_router.router)
+        self.app.include_router(StatsRouter().router)
+        self.app.include_router(JobsRouter().router)
+        if properties.STORAGE_BACKEND != "local":
+            self.app.include_router(MediaRouter().router)
+
+    # Record per-route request latency
+    def add_metrics_middleware(self):
+        @self.app.middleware("http")
+        async def record_request_latency(request: Request, call_next):
+            start = time.perf_counter()
+            status = 500
+            try:
+                response = await call_next(request)
+                status = response.status_code
+                return response
+            finally:
+                # Use the route template so path parameters don't explode label cardinality
+                route = request.scope.get("route")
+                route_path = route.path if route is not None else "unmatched"
+                REQUEST_LATENCY.labels(
+                    method=request.method, route=route_path, status=str(status)
+                ).observe(time.perf_counter() - start)
 
     # Initialize database
     def initialize_database(self):
         @self.app.on_event("startup")
-        def startup():
-            database_config.Base.metadata.create_all(bind=database_config.engine)
+        def create_tables():
+            with startup.phase("database"):
+                database_config.Base.metadata.create_all(bind=database_config.engine)
+                search_index.ensure_search_index(database_config.engine)
+                job_record_repository.ensure_unique_job_ids(database_config.engine)
+            startup.report()
 
     async def run_fast_api(self):
-        config = uvicorn.Config("main:app", host=properties.BASE_URL, port=int(properties.PORT), reload=True)
+        # No log config of its own, so uvicorn's access and error logs go through the logging pipeline too
+        config = uvicorn.Config("main:app", host=properties.BASE_URL, port=int(properties.PORT), reload=True,
+                                log_config=None)
         server = uvicorn.Server(config)
         await server.serve()
 
     async def run_telegram_bot(self):
         logging.info("Starting Telegram handlers...")
-        handler = TelegramBotHandlers(self.telegram_bot)
-        handler.add_all_handlers()
-        await self.telegram_bot.initialize()
-        await self.telegram_bot.start()
-        await self.telegram_bot.updater.start_polling()
+        with startup.phase("telegram"):
+            # Only the bot role pays for importing python-telegram-bot
+            from telegram_bot.handlers.video.handlers import TelegramBotHandlers
+            from telegram_bot.telegram_client import TelegramManager
+
+            telegram_bot = TelegramManager.get_client()
+            handler = TelegramBotHandlers(telegram_bot)
+            handler.add_all_handlers()
+            await telegram_bot.initialize()
+            await telegram_bot.start()
+            await telegram_bot.updater.start_polling()
         logging.info("Telegram handlers started...")
+        startup.report()
 
     async def run_redis(self):
-        redis_client = RedisManager.get_client()
+        with startup.phase("redis"):
+            redis_client = RedisManager.get_client()
+        progress_task = None
+        if properties.TELEGRAM_PROGRESS_ENABLED:
+            progress_task = asyncio.create_task(container.progress_reporter.run())
         try:
             while True:
-                # Wait for a job from the queue with a timeout of 1 second
-                job = redis_client.brpop([constants.REDIS_VIDEO_PROCESSING_COMPLETED_QUEUE_NAME], timeout=properties.QUEUE_TIMEOUT)
+                try:
+                    # Wait for a job from the queue off the event loop, so progress edits keep flowing
+                    job = await asyncio.to_thread(redis_client.brpop,
+                                                  [constants.REDIS_VIDEO_PROCESSING_COMPLETED_QUEUE_NAME,
+                                                   constants.REDIS_VIDEO_PROCESSING_FAILED_QUEUE_NAME],
+                                                  timeout=properties.QUEUE_TIMEOUT)
+                except Exception as e:
+                    logging.error(f"Error reading the completed and failed queues: {e}")
+                    await asyncio.sleep(max(properties.QUEUE_TIMEOUT, 1))
+                    continue
                 if job:
                     # job is a tuple (queue_name, item)
-                    job_id = job[1]
-                    self.redis_service.get_processed_video_and_upload(job_id)
-                else:
-                    # No job available, just print a dot to show we're alive
-                    print(".", end="", flush=True)
-                    await asyncio.sleep(0.1)
+                    queue_name, job_id = job
+                    with tracing.job_scope():
+                        try:
+                            if queue_name == constants.REDIS_VIDEO_PROCESSING_FAILED_QUEUE_NAME:
+                                self.redis_service.handle_worker_failure(job_id)
+                            else:
+                                await self.redis_service.get_processed_video_and_upload(job_id)
+                        except Exception as e:
+                            # The job is off the queue already; fail it so it is retried or dead-lettered
+                            logging.error(f"Error handling job {job_id} from {queue_name}: {e}")
+                            try:
+                                self.redis_service.fail_job(job_id, constants.JOB_STAGE_WORKERS,
+                                                            f"Handling its output failed: {e}")
+                            except Exception as fail_error:
+                                logging.error(f"Error failing job {job_id}: {fail_error}")
         except KeyboardInterrupt:
             logging.info("Shutting down job consumer...")
-        except Exception as e:
-            logging.info(f"Error: {e}")
+        finally:
+            if progress_task:
+                progress_task.cancel()
+
+    async def run_fair_dispatcher(self):
+        fair_schedulers = container.fair_schedulers
+        worker_registry = container.worker_registry
+        while True:
+            try:
+                # Top every worker queue back up to the free capacity of the workers popping it
+                dispatched = sum(fair_scheduler.dispatch(worker_registry.dispatch_window(queue))
+                                 for queue, fair_scheduler in fair_schedulers.items())
+            except Exception as e:
+                logging.error(f"Error dispatching jobs to the workers: {e}")
+                dispatched = 0
+            if not dispatched:
+                await asyncio.sleep(properties.FAIR_DISPATCH_INTERVAL)
+            else:
+                await asyncio.sleep(0)
+
+    async def run_job_archiver(self):
+        job_archiver = container.job_archiver
+        while True:
+            try:
+                # Database writes run off the event loop
+                archived = await asyncio.to_thread(job_archiver.archive_batch)
+            except Exception as e:
+                logging.error(f"Error archiving job records: {e}")
+                archived = 0
+            if archived < properties.JOB_ARCHIVE_BATCH_SIZE:
+                await asyncio.sleep(properties.JOB_ARCHIVE_INTERVAL)
+
+    async def run_url_fetcher(self):
+        redis_client = RedisManager.get_client()
+        slots = asyncio.Semaphore(properties.FETCH_MAX_CONCURRENCY)
+        in_flight = set()
+        while True:
+            await slots.acquire()
+            try:
+                job_key = redis_client.rpop(constants.REDIS_FETCH_QUEUE_NAME)
+            except Exception as e:
+                logging.error(f"Error reading the fetch queue: {e}")
+                job_key = None
+            if not job_key:
+                slots.release()
+                await asyncio.sleep(properties.FETCH_POLL_INTERVAL)
+                continue
+            task = asyncio.create_task(self.redis_service.fetch_and_enqueue(job_key))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def run_media_analyzer(self):
+        redis_client = RedisManager.get_client()
+        slots = asyncio.Semaphore(properties.ANALYSIS_MAX_CONCURRENCY)
+        in_flight = set()
+        while True:
+            await slots.acquire()
+            try:
+                job_key = redis_client.rpop(constants.REDIS_ANALYSIS_QUEUE_NAME)
+            except Exception as e:
+                logging.error(f"Error reading the analysis queue: {e}")
+                job_key = None
+            if not job_key:
+                slots.release()
+                await asyncio.sleep(properties.ANALYSIS_POLL_INTERVAL)
+                continue
+            task = asyncio.create_task(self.redis_service.analyze_and_enqueue(job_key))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def run_hls_packager(self):
+        redis_client = RedisManager.get_client()
+        hls_packager = container.hls_packager
+        slots = asyncio.Semaphore(properties.HLS_MAX_CONCURRENCY)
+        in_flight = set()
+        while True:
+            await slots.acquire()
+            try:
+                job_key = redis_client.rpop(constants.REDIS_HLS_QUEUE_NAME)
+            except Exception as e:
+                logging.error(f"Error reading the HLS queue: {e}")
+                job_key = None
+            if not job_key:
+                slots.release()
+                await asyncio.sleep(properties.HLS_POLL_INTERVAL)
+                continue
+            task = asyncio.create_task(hls_packager.package_job(job_key))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def run_job_scheduler(self):
+        job_scheduler = container.job_scheduler
+        worker_registry = container.worker_registry
+        while True:
+            try:
+                # Jobs held by workers that died are failed first, so their retries are scheduled
+                await asyncio.to_thread(worker_registry.reap_dead_workers)
+                released = await asyncio.to_thread(job_scheduler.release_due)
+            except Exception as e:
+                logging.error(f"Error releasing scheduled jobs: {e}")
+                released = 0
+            if released < properties.SCHEDULER_BATCH_SIZE:
+                await asyncio.sleep(properties.SCHEDULER_POLL_INTERVAL)
+
+    async def run_storage_janitor(self):
+        storage_janitor = container.storage_janitor
+        await asyncio.to_thread(storage_janitor.index_existing)
+        while True:
+            try:
+                # Only statvfs and Redis calls in the common case, but deletes can block
+                await asyncio.to_thread(storage_janitor.run_once)
+            except Exception as e:
+                logging.error(f"Error evicting stored files: {e}")
+            await asyncio.sleep(properties.STORAGE_JANITOR_INTERVAL)
 
     async def main(self):
+        runners = {
+            "api": self.run_fast_api,
+            "bot": self.run_telegram_bot,
+            "consumer": self.run_redis,
+            "dispatcher": self.run_fair_dispatcher,
+            "archiver": self.run_job_archiver,
+            "fetcher": self.run_url_fetcher,
+            "janitor": self.run_storage_janitor,
+            "analyzer": self.run_media_analyzer,
+            "scheduler": self.run_job_scheduler,
+            "packager": self.run_hls_packager
+        }
+        roles = [role.strip() for role in properties.APP_ROLES.split(",") if role.strip()]
+        unknown = [role for role in roles if role not in runners]
+        if unknown:
+            raise ValueError(f"Unknown APP_ROLES {unknown}, expected any of {list(runners)}")
 
-        await asyncio.gather(
-            self.run_fast_api(),
-            self.run_telegram_bot(),
-            self.run_redis()
-        )
+        await asyncio.gather(*(runners[role]() for role in roles))
 
 
 # Create an instance of MainApp and expose the app attribute
 service = MainApp()
 app = service.app
 
-# Set the static file directory for uploaded videos
-app.mount("/media/uploaded_videos", StaticFiles(directory=properties.UPLOAD_DIR), name="uploaded_videos")
+# Set the static file directory for uploaded videos; other storage backends are served by MediaRouter
+if properties.STORAGE_BACKEND == "local":
+    app.mount("/media/uploaded_videos", MediaFiles(directory=properties.UPLOAD_DIR), name="uploaded_videos")
 
 
 # Run the FastAPI server
@@ -6,10 +6,13 @@ from fastapi import UploadFile, File
 class FileData:
     url : Optional[str]
     file: Optional[UploadFile] = File(None)
+    subtitles: Optional[UploadFile] = None  # SRT sidecar of the video file
 
-    def __init__(self, url: Optional[str] = None, file: Optional[UploadFile] = None):
+    def __init__(self, url: Optional[str] = None, file: Optional[UploadFile] = None,
+                 subtitles: Optional[UploadFile] = None):
         self.url = url
         self.file = file
+        self.subtitles = subtitles
 
     @staticmethod
     def generate(data: Any) -> 'FileData':
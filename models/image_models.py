@@ -0,0 +1,24 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ImageResult(BaseModel):
+    file_name: str
+    content_hash: str
+    location: str
+    width: int
+    height: int
+    reused: bool = False  # the same image was processed before, so its earlier output is returned
+
+
+class SkippedImage(BaseModel):
+    file_name: str
+    reason: str
+
+
+class ImageBatchResponse(BaseModel):
+    status: str
+    images: List[ImageResult] = []
+    skipped: List[SkippedImage] = []
+    message: Optional[str] = None
@@ -0,0 +1,66 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class DeadLetterJob(BaseModel):
+    job_id: str
+    stage: Optional[str] = None  # where the job failed and where a requeue resumes it
+    attempts: int = 0
+    last_error: Optional[str] = None
+    failed_at: Optional[datetime] = None
+    url: Optional[str] = None
+    original_video_id: Optional[int] = None
+
+
+class DeadLetterPage(BaseModel):
+    items: List[DeadLetterJob] = []
+    total: int = 0
+
+
+class JobActionResponse(BaseModel):
+    job_id: str
+    status: str
+    message: Optional[str] = None
+
+
+class WorkerState(BaseModel):
+    worker_id: str
+    host: Optional[str] = None
+    pid: Optional[int] = None
+    cpu_count: Optional[int] = None
+    slots: int = 0
+    free_slots: int = 0
+    job_types: List[str] = []
+    queues: List[str] = []  # popped in this order
+    jobs: List[str] = []  # job keys in progress
+    started_at: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+
+
+class WorkerQueueState(BaseModel):
+    queue: str
+    job_type: Optional[str] = None  # None for the shared queue of workers that take any job
+    waiting: int = 0  # jobs in the queue itself
+    backlog: int = 0  # jobs still in fair scheduling sub-queues
+    workers: int = 0
+    free_slots: int = 0
+
+
+class WorkerFleet(BaseModel):
+    workers: List[WorkerState] = []
+    queues: List[WorkerQueueState] = []
+
+
+class HlsSegmentPreview(BaseModel):
+    start_time: float
+    end_time: float
+    playlist_url: Optional[str] = None  # None if packaging the segment failed
+
+
+class HlsPreview(BaseModel):
+    job_id: str
+    playlist_url: str  # all segments in order
+    complete: bool = False  # False while segments are still being added
+    segments: List[HlsSegmentPreview] = []
@@ -1,8 +1,8 @@
+import math
 from typing import Optional, List, Tuple
 
 from pydantic import BaseModel
 
-from config import constants
 from models.video_models import MediaType, VideoScreenType, VideoProcessInfo
 
 
@@ -11,30 +11,44 @@ class TransferDocument(BaseModel):
     url: Optional[str] = None
     file_name: Optional[str] = None
     segment_time: Optional[int] = None
-    start_time: Optional[int] = None
-    end_time: Optional[int] = None
-    skip_pairs: Optional[List[Tuple[int, int]]] = None
+    start_time: Optional[float] = None
+    end_time: Optional[float] = None
+    skip_pairs: Optional[List[Tuple[float, float]]] = None
+    skip_silence: Optional[bool] = None
     screen_type: Optional[VideoScreenType] = None
     edit_type: Optional[str] = None
-    original_video_id: Optional[str] = None
+    original_video_id: Optional[int] = None
     telegram_chat_id : Optional[int] = None
+    trace_id: Optional[str] = None
+    source_url: Optional[str] = None  # original URL when url points at the fetch stage's local copy
+    # Planned cut points in seconds, start and end included; when set, workers cut here instead of every segment_time
+    segment_boundaries: Optional[List[float]] = None
 
     @classmethod
     def from_video_process_info(cls, video_process_info: 'VideoProcessInfo',
-                                original_id: Optional[str] = None) -> 'TransferDocument':
-        doc = cls()
-        process_data = video_process_info.model_dump()
-
-        # Copy all matching attributes
-        for attr in process_data:
-            if hasattr(doc, attr):
-                setattr(doc, attr, process_data[attr])
-
-        doc.original_video_id = original_id
-        return doc
+                                original_id: Optional[int] = None, **fields) -> 'TransferDocument':
+        # video_process_info is already validated, so build the document directly from its matching fields
+        process_data = video_process_info.model_dump(include=set(cls.model_fields))
+        return cls.model_construct(**process_data, original_video_id=original_id, **fields)
+
+    def expected_segments(self) -> Optional[int]:
+        """Number of segments the worker will produce, when the trim window is known."""
+        if self.segment_boundaries:
+            return len(self.segment_boundaries) - 1
+        if not self.segment_time or not self.end_time or self.end_time <= (self.start_time or 0):
+            return None
+        start, end = self.start_time or 0, self.end_time
+        skipped = sum(max(min(skip_end, end) - max(skip_start, start), 0)
+                      for skip_start, skip_end in self.skip_pairs or [])
+        return max(math.ceil((end - start - skipped) / self.segment_time), 1)
 
 class ProcessedDataReceiver(BaseModel):
     original_video_id: Optional[int] = None
     file_name : Optional[str] = None
     location: Optional[str] = None
-    telegram_chat_id: Optional[int|str] = None
\ No newline at end of file
+    start_time: float = 0
+    end_time: float = 0
+    telegram_chat_id: Optional[int|str] = None
+    trace_id: Optional[str] = None
+    # Segments the job produced in all, sent by the worker with its last segment when it was not known upfront
+    segments_total: Optional[int] = None
\ No newline at end of file
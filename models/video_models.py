@@ -1,3 +1,4 @@
+from datetime import datetime
 from enum import Enum
 from typing import Optional, List, Tuple
 
@@ -8,15 +9,19 @@ import config.constants as constants
 
 class ProcessingStatus(str, Enum):
     PENDING = "pending"
+    SCHEDULED = "scheduled"  # waiting for its run_at time or a retry
     PROCESSING = "processing"
     COMPLETED = "completed"
     FAILED = "failed"
 
+TERMINAL_STATUSES = (ProcessingStatus.COMPLETED, ProcessingStatus.FAILED)
+
 class VideoUploadResponse(BaseModel):
     file: str
     file_id: str
     status: str
     message: Optional[str] = None
+    job_id: Optional[str] = None
 
 class VideoInfo(BaseModel):
     file_id: str
@@ -34,6 +39,11 @@ class VideoEditType(str, Enum):
     GAME_PLAY = "game_play"
     STATIC_COLOR = "static_color"
 
+class JobPriority(str, Enum):
+    HIGH = "high"
+    NORMAL = "normal"
+    LOW = "low"
+
 class MediaType(str, Enum):
     VIDEO = constants.VIDEO
     IMAGE = constants.IMAGE
@@ -46,6 +56,13 @@ class VideoProcessInfo(BaseModel):
     start_time: int = constants.DEFAULT_START_TIME
     end_time: int = constants.DEFAULT_END_TIME
     skip_pairs: List[Tuple[int, int]] = []
+    skip_silence: bool = False  # add the silent stretches to skip_pairs
+    subtitles_url: Optional[str] = None  # SRT sidecar, cut to every segment
+    hls: bool = False  # also package the segments as HLS for preview playback
     screen_type: VideoScreenType = VideoScreenType.LANDSCAPE
     edit_type: Optional[str] = None  # To be done
+    client_id: Optional[str] = None  # X-Client-Id label; unauthenticated, so only scoped to client_address
+    client_address: Optional[str] = None  # peer address of API clients; rate limits are per address
+    priority: JobPriority = JobPriority.NORMAL
+    run_at: Optional[datetime] = None  # start the job at this time instead of right away
 
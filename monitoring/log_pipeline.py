@@ -0,0 +1,155 @@
+import atexit
+import itertools
+import json
+import logging
+import queue
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+from config.config import config_properties as properties
+from monitoring import tracing
+from monitoring.metrics import LOG_RECORDS_DROPPED
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s'
+
+
+def parse_sampling(value: str) -> Dict[str, float]:
+    """LOG_SAMPLING, e.g. "httpx=0.1,services.redis_service=0.5", as fractions by logger name."""
+    rates = {}
+    for pair in value.split(","):
+        name, _, rate = pair.partition("=")
+        if name.strip() and rate.strip():
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps every n-th record below WARNING of the sampled loggers, where n is one over their rate; the
+    rate of the closest configured ancestor applies. Warnings and errors are always kept.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._every: Dict[str, Optional[int]] = {}
+        self._counters: Dict[str, itertools.count] = {}
+
+    def _every_for(self, name: str) -> Optional[int]:
+        if name not in self._every:
+            candidate, rate = name, None
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._every[name] = None if rate is None or rate >= 1 else (round(1 / rate) if rate > 0 else 0)
+        return self._every[name]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        every = self._every_for(record.name)
+        if every is None:
+            return True
+        counter = self._counters.setdefault(record.name, itertools.count())
+        if every and next(counter) % every == 0:
+            record.sample_rate = 1 / every
+            return True
+        LOG_RECORDS_DROPPED.labels(reason="sampled").inc()
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener thread. The caller never waits on I/O; when the queue is full the record is dropped."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve everything that can't cross threads here, but leave formatting to the listener
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels(reason="queue_full").inc()
+
+
+class LogListener(QueueListener):
+    """A QueueListener that can be stopped more than once, e.g. by its owner and again at exit."""
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            super().stop()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "trace_id": getattr(record, "trace_id", "-"),
+        }
+        if getattr(record, "sample_rate", None):
+            entry["sample_rate"] = record.sample_rate
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure() -> LogListener:
+    """
+    Route all logging through a bounded queue to one listener thread, which writes to stdout, the rotating
+    LOG_FILE and, for span timings, the rotating TRACE_LOG_FILE. Log calls only filter and enqueue.
+    """
+    log_queue = queue.Queue(properties.LOG_QUEUE_SIZE)
+    formatter = JsonFormatter() if properties.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+
+    def is_trace(record: logging.LogRecord) -> bool:
+        return record.name == tracing.trace_logger.name
+
+    handlers = [
+        logging.StreamHandler(sys.stdout),
+        RotatingFileHandler(properties.LOG_FILE, maxBytes=properties.LOG_MAX_BYTES,
+                            backupCount=properties.LOG_BACKUP_COUNT, encoding="utf-8")
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        handler.addFilter(lambda record: not is_trace(record))
+    # Span timings go to their own file so they can be exported on their own
+    trace_handler = RotatingFileHandler(properties.TRACE_LOG_FILE, maxBytes=properties.LOG_MAX_BYTES,
+                                        backupCount=properties.LOG_BACKUP_COUNT, encoding="utf-8")
+    trace_handler.setFormatter(logging.Formatter('%(message)s'))
+    trace_handler.addFilter(is_trace)
+
+    # Trace ids live in a context variable, so they are read in the caller before the record changes threads
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(tracing.TraceIdFilter())
+    queue_handler.addFilter(SamplingFilter(parse_sampling(properties.LOG_SAMPLING)))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(properties.LOG_LEVEL.upper())
+    tracing.trace_logger.addHandler(queue_handler)
+    tracing.trace_logger.setLevel(logging.INFO)
+    tracing.trace_logger.propagate = False
+
+    listener = LogListener(log_queue, *handlers, trace_handler, respect_handler_level=True)
+    listener.start()
+    # Write out what is still queued when the process exits
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,142 @@
+import time
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# Queue metrics
+QUEUE_DEPTH = Gauge(
+    "trimflow_queue_depth",
+    "Number of jobs waiting in a Redis queue",
+    ["queue"]
+)
+JOB_LATENCY = Histogram(
+    "trimflow_job_latency_seconds",
+    "Time from enqueue to completion of a job",
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+)
+JOBS_ENQUEUED = Counter(
+    "trimflow_jobs_enqueued_total",
+    "Jobs pushed to the processing queue"
+)
+JOBS_REJECTED = Counter(
+    "trimflow_jobs_rejected_total",
+    "Jobs refused by admission control",
+    ["reason"]
+)
+JOBS_ARCHIVED = Counter(
+    "trimflow_jobs_archived_total",
+    "Finished job records moved from Redis to Postgres"
+)
+JOBS_ARCHIVE_FAILED = Counter(
+    "trimflow_jobs_archive_failed_total",
+    "Finished job records that could not be read for archiving and were left to expire in Redis"
+)
+JOBS_RETRIED = Counter(
+    "trimflow_jobs_retried_total",
+    "Failed job attempts scheduled for a retry",
+    ["stage"]
+)
+JOBS_DEAD_LETTERED = Counter(
+    "trimflow_jobs_dead_lettered_total",
+    "Jobs moved to the dead-letter queue after their last attempt",
+    ["stage"]
+)
+JOBS_COMPLETED = Counter(
+    "trimflow_jobs_completed_total",
+    "Processed jobs consumed from the completion queue"
+)
+
+# Fetch stage metrics
+FETCH_REQUESTS = Counter(
+    "trimflow_fetch_total",
+    "Source fetches by outcome (hit, revalidated, miss, error)",
+    ["result"]
+)
+FETCH_BYTES = Counter(
+    "trimflow_fetch_bytes_total",
+    "Bytes downloaded by the fetch stage"
+)
+
+# Storage janitor metrics
+STORAGE_INDEXED_BYTES = Gauge(
+    "trimflow_storage_indexed_bytes",
+    "Bytes of local media files tracked by this node's storage index"
+)
+STORAGE_EVICTED_BYTES = Counter(
+    "trimflow_storage_evicted_bytes_total",
+    "Bytes deleted by the storage janitor"
+)
+STORAGE_EVICTED_FILES = Counter(
+    "trimflow_storage_evicted_files_total",
+    "Files deleted by the storage janitor"
+)
+
+# HTTP metrics
+REQUEST_LATENCY = Histogram(
+    "trimflow_http_request_latency_seconds",
+    "HTTP request latency per route",
+    ["method", "route", "status"]
+)
+
+# Database metrics
+DB_QUERY_LATENCY = Histogram(
+    "trimflow_db_query_latency_seconds",
+    "Repository query latency",
+    ["model", "operation"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+)
+
+# Telegram metrics
+TELEGRAM_SEND_LATENCY = Histogram(
+    "trimflow_telegram_send_latency_seconds",
+    "Latency of Telegram Bot API send calls",
+    ["method"]
+)
+TELEGRAM_SEND_ERRORS = Counter(
+    "trimflow_telegram_send_errors_total",
+    "Failed Telegram Bot API send calls",
+    ["method"]
+)
+
+# Startup metrics
+STARTUP_PHASE_SECONDS = Gauge(
+    "trimflow_startup_phase_seconds",
+    "Time spent in each application startup phase",
+    ["phase"]
+)
+
+# Logging metrics
+LOG_RECORDS_DROPPED = Counter(
+    "trimflow_log_records_dropped_total",
+    "Log records dropped, either sampled out or because the log queue was full",
+    ["reason"]
+)
+
+
+@contextmanager
+def observe_db_query(model: str, operation: str):
+    """Time a repository query."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        DB_QUERY_LATENCY.labels(model=model, operation=operation).observe(time.perf_counter() - start)
+
+
+async def observe_telegram_send(method: str, coroutine):
+    """Await a Telegram send call, recording its latency and failures."""
+    start = time.perf_counter()
+    try:
+        return await coroutine
+    except Exception:
+        TELEGRAM_SEND_ERRORS.labels(method=method).inc()
+        raise
+    finally:
+        TELEGRAM_SEND_LATENCY.labels(method=method).observe(time.perf_counter() - start)
+
+
+def observe_job_completion(enqueued_at) -> None:
+    """Record enqueue-to-completion latency from the timestamp written at enqueue time."""
+    JOBS_COMPLETED.inc()
+    if enqueued_at:
+        JOB_LATENCY.observe(max(time.time() - float(enqueued_at), 0.0))
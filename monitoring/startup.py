@@ -0,0 +1,29 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+from monitoring.metrics import STARTUP_PHASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_phases: Dict[str, float] = {}
+
+
+def record(name: str, seconds: float) -> None:
+    _phases[name] = seconds
+    STARTUP_PHASE_SECONDS.labels(phase=name).set(seconds)
+
+
+@contextmanager
+def phase(name: str):
+    """Time one phase of application startup."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def report() -> None:
+    logger.info("Startup phases: " + ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in _phases.items()))
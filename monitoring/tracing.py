@@ -0,0 +1,77 @@
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+trace_logger = logging.getLogger("trimflow.trace")
+
+
+class TraceContext:
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+
+
+_current_trace: ContextVar[Optional[TraceContext]] = ContextVar("trace_context", default=None)
+
+
+def start_trace(trace_id: Optional[str] = None) -> TraceContext:
+    """Start a new trace, or restore an existing one when trace_id is given."""
+    trace = TraceContext(trace_id)
+    _current_trace.set(trace)
+    return trace
+
+
+@contextmanager
+def job_scope():
+    """
+    Handle one job: a trace started inside the block ends with it, so whatever runs next in the same
+    task is not attributed to this job.
+    """
+    token = _current_trace.set(None)
+    try:
+        yield
+    finally:
+        _current_trace.reset(token)
+
+
+def get_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+def record_span(name: str, start: float, end: float, **attributes) -> None:
+    """Write a finished span to the trace log. start and end are epoch seconds."""
+    trace_logger.info(json.dumps({
+        "trace_id": get_trace_id(),
+        "span": name,
+        "start": start,
+        "duration_ms": round((end - start) * 1000, 3),
+        **attributes
+    }))
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block of code as a span of the current trace."""
+    start = time.time()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        if error:
+            attributes["error"] = error
+        record_span(name, start, time.time(), **attributes)
+
+
+class TraceIdFilter(logging.Filter):
+    """Attach the current trace id to every log record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = get_trace_id() or "-"
+        return True
@@ -0,0 +1,113 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Union
+
+from pydantic import BaseModel
+
+from config.config import config_properties as properties
+
+# Bump when the payload layout changes in a way consumers have to know about
+PAYLOAD_SCHEMA_VERSION: int = 1
+
+# Job hash fields
+DATA_FIELD = "data"
+CODEC_FIELD = "codec"
+SCHEMA_FIELD = "schema"
+PAYLOAD_FIELDS = (DATA_FIELD, CODEC_FIELD, SCHEMA_FIELD)
+# Copy of the payload handed to the workers, who overwrite DATA_FIELD with their results; retries start from it
+QUEUED_PREFIX = "queued_"
+
+# Payloads written before the codec layer carry no codec field and are plain JSON
+LEGACY_CODEC = "json"
+
+
+class PayloadCodec(ABC):
+    name: str
+
+    @abstractmethod
+    def dumps(self, payload: dict) -> bytes:
+        pass
+
+    @abstractmethod
+    def loads(self, data: bytes) -> dict:
+        pass
+
+
+class JsonCodec(PayloadCodec):
+    name = "json"
+
+    def dumps(self, payload: dict) -> bytes:
+        return json.dumps(payload, separators=(",", ":")).encode()
+
+    def loads(self, data: bytes) -> dict:
+        return json.loads(data)
+
+
+class OrjsonCodec(PayloadCodec):
+    name = "orjson"
+
+    def __init__(self):
+        try:
+            import orjson
+        except ImportError:
+            raise RuntimeError("The orjson codec needs the orjson package: pip install orjson")
+        self.orjson = orjson
+
+    def dumps(self, payload: dict) -> bytes:
+        return self.orjson.dumps(payload)
+
+    def loads(self, data: bytes) -> dict:
+        return self.orjson.loads(data)
+
+
+class MsgpackCodec(PayloadCodec):
+    name = "msgpack"
+
+    def __init__(self):
+        try:
+            import msgpack
+        except ImportError:
+            raise RuntimeError("The msgpack codec needs the msgpack package: pip install msgpack")
+        self.msgpack = msgpack
+
+    def dumps(self, payload: dict) -> bytes:
+        return self.msgpack.packb(payload, use_bin_type=True)
+
+    def loads(self, data: bytes) -> dict:
+        return self.msgpack.unpackb(data, raw=False)
+
+
+CODECS = {codec.name: codec for codec in (JsonCodec, OrjsonCodec, MsgpackCodec)}
+_instances: Dict[str, PayloadCodec] = {}
+
+
+def get_codec(name: Optional[str] = None) -> PayloadCodec:
+    """Codec by name, defaulting to QUEUE_PAYLOAD_CODEC."""
+    name = name or properties.QUEUE_PAYLOAD_CODEC
+    if name not in _instances:
+        if name not in CODECS:
+            raise ValueError(f"Unknown queue payload codec {name!r}, expected one of {list(CODECS)}")
+        _instances[name] = CODECS[name]()
+    return _instances[name]
+
+
+def encode_payload(document: BaseModel, codec: Optional[PayloadCodec] = None,
+                   prefix: str = "") -> Dict[str, Union[bytes, str, int]]:
+    """Job hash fields holding document, tagged with its codec and schema version."""
+    codec = codec or get_codec()
+    return {
+        prefix + DATA_FIELD: codec.dumps(document.model_dump(mode="json")),
+        prefix + CODEC_FIELD: codec.name,
+        prefix + SCHEMA_FIELD: PAYLOAD_SCHEMA_VERSION
+    }
+
+
+def decode_payload(data: Union[bytes, str], codec_name: Optional[Union[bytes, str]] = None,
+                   schema_version: Optional[Union[bytes, str, int]] = None) -> dict:
+    """Decode a job payload written by encode_payload (or a legacy JSON payload)."""
+    if isinstance(codec_name, bytes):
+        codec_name = codec_name.decode()
+    version = int(schema_version) if schema_version else PAYLOAD_SCHEMA_VERSION
+    if version > PAYLOAD_SCHEMA_VERSION:
+        raise ValueError(f"Payload schema version {version} is newer than supported {PAYLOAD_SCHEMA_VERSION}")
+    return get_codec(codec_name or LEGACY_CODEC).loads(data)
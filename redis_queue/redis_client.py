@@ -5,6 +5,7 @@ from typing import Optional
 
 class RedisManager:
     __client: Optional[redis.Redis] = None
+    __binary_client: Optional[redis.Redis] = None
 
     def __init__(self) -> None:
         raise RuntimeError("Use get_client() instead")
@@ -12,22 +13,37 @@ class RedisManager:
     @classmethod
     def get_client(cls) -> redis.Redis:
         if cls.__client is None:
-            try:
-                cls.__client = redis.Redis(
-                    host=properties.BASE_URL,
-                    port=properties.REDIS_PORT,
-                    decode_responses=True,
-                    socket_timeout=5,  # Connection timeout
-                    retry_on_timeout=True
-                )
-                # Test connection
-                cls.__client.ping()
-            except redis.ConnectionError as e:
-                raise RuntimeError(f"Failed to connect to Redis: {str(e)}")
+            cls.__client = cls.__connect(decode_responses=True)
         return cls.__client
 
+    @classmethod
+    def get_binary_client(cls) -> redis.Redis:
+        """Client that returns raw bytes, for binary queue payloads."""
+        if cls.__binary_client is None:
+            cls.__binary_client = cls.__connect(decode_responses=False)
+        return cls.__binary_client
+
+    @classmethod
+    def __connect(cls, decode_responses: bool) -> redis.Redis:
+        try:
+            client = redis.Redis(
+                host=properties.BASE_URL,
+                port=properties.REDIS_PORT,
+                decode_responses=decode_responses,
+                socket_timeout=5,  # Connection timeout
+                retry_on_timeout=True
+            )
+            # Test connection
+            client.ping()
+        except redis.ConnectionError as e:
+            raise RuntimeError(f"Failed to connect to Redis: {str(e)}")
+        return client
+
     @classmethod
     def close(cls) -> None:
         if cls.__client is not None:
             cls.__client.close()
-            cls.__client = None
\ No newline at end of file
+            cls.__client = None
+        if cls.__binary_client is not None:
+            cls.__binary_client.close()
+            cls.__binary_client = None
@@ -0,0 +1,31 @@
+from functools import cached_property
+from typing import List, Optional
+
+from fastapi import APIRouter, File, UploadFile, Form
+
+from models.image_models import ImageBatchResponse
+from models.video_models import VideoScreenType
+from monitoring import tracing
+from services.container import container
+
+
+class ImageRouter:
+    def __init__(self):
+        self.router = APIRouter(prefix="/images", tags=["images"])
+        self.add_routes()
+
+    @cached_property
+    def image_controller(self):
+        # Resolved on the first upload, so starting the API doesn't import Pillow and numpy
+        return container.image_controller
+
+    def add_routes(self):
+        @self.router.post("/upload/", response_model=ImageBatchResponse)
+        async def upload_images(
+                files: List[UploadFile] = File(...),  # images and/or zip archives of images
+                screen_type: Optional[str] = Form(None),
+        ):
+            """Crop an album of images to the 720p landscape or portrait frame."""
+            tracing.start_trace()
+            return await self.image_controller.upload(
+                files, VideoScreenType(screen_type) if screen_type else VideoScreenType.LANDSCAPE)
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from config import constants
+from models.job_models import DeadLetterPage, HlsPreview, JobActionResponse, WorkerFleet
+from models.video_models import ProcessingStatus
+from services.container import container
+
+
+def to_job_key(job_id: str) -> str:
+    """Jobs are addressed by their key (job:<id>) or by the id alone."""
+    if job_id.startswith(f"{constants.REDIS_JOB_KEY_PREFIX}:"):
+        return job_id
+    return container.redis_service.job_key(job_id)
+
+
+class JobsRouter:
+    def __init__(self):
+        self.router = APIRouter(prefix="/jobs", tags=["jobs"])
+        self.add_routes()
+
+    def add_routes(self):
+        @self.router.get("/workers/", response_model=WorkerFleet)
+        def get_workers():
+            """Live workers with their capacity and jobs in progress, and the state of every worker queue."""
+            return container.worker_registry.fleet()
+
+        @self.router.get("/{job_id}/preview", response_model=HlsPreview)
+        def get_preview(job_id: str):
+            """HLS playlists of a job uploaded with hls, for the whole job and for every packaged segment."""
+            preview = container.hls_packager.preview(to_job_key(job_id))
+            if preview is None:
+                raise HTTPException(status_code=404, detail="No HLS preview for this job yet")
+            return preview
+
+        @self.router.get("/dead_letters/", response_model=DeadLetterPage)
+        def get_dead_letters(
+                offset: int = Query(0, ge=0),
+                limit: int = Query(50, ge=1, le=500),
+        ):
+            """Jobs that failed every attempt, most recent first."""
+            return container.job_scheduler.dead_letters(offset, limit)
+
+        @self.router.post("/dead_letters/{job_id}/requeue", response_model=JobActionResponse)
+        def requeue_dead_letter(job_id: str):
+            """Run a dead-lettered job again from the stage it failed in, with a fresh set of attempts."""
+            job_key = to_job_key(job_id)
+            if not container.redis_service.requeue_dead_letter(job_key):
+                raise HTTPException(status_code=404, detail="Job not found in the dead-letter queue")
+            return JobActionResponse(job_id=job_key, status=ProcessingStatus.PENDING.value, message="Requeued")
+
+        @self.router.delete("/dead_letters/{job_id}", response_model=JobActionResponse)
+        def discard_dead_letter(job_id: str):
+            """Give up on a dead-lettered job; its record is archived."""
+            job_key = to_job_key(job_id)
+            if not container.redis_service.discard_dead_letter(job_key):
+                raise HTTPException(status_code=404, detail="Job not found in the dead-letter queue")
+            return JobActionResponse(job_id=job_key, status=ProcessingStatus.FAILED.value, message="Discarded")
@@ -0,0 +1,108 @@
+import mimetypes
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response, StreamingResponse
+from starlette.staticfiles import StaticFiles
+
+from config.config import config_properties as properties
+from services.container import container
+from services.hls_packager import INIT_NAME
+from storage.storage_manager import StorageManager
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Not in every system's mime.types, and players refuse playlists and parts served as anything else
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")
+mimetypes.add_type("video/iso.segment", ".m4s")
+
+
+def cache_control(path: str) -> Optional[str]:
+    """Cache-Control for HLS files: playlists briefly, since job playlists grow, and parts for much longer."""
+    if path.endswith(".m3u8"):
+        return f"public, max-age={properties.HLS_PLAYLIST_MAX_AGE}"
+    if path.endswith(".m4s") or os.path.basename(path) == INIT_NAME:
+        return f"public, max-age={properties.HLS_PART_MAX_AGE}"
+    return None
+
+
+def held_ranges(path: str) -> Optional[List[List[int]]]:
+    """The byte ranges holding data if path is a sparse windowed copy in the download cache."""
+    entry = container.url_fetcher.cache.entry_at(path)
+    return entry.ranges if entry and entry.ranges else None
+
+
+def held_range_response(path: str, ranges: List[List[int]], range_header: Optional[str]) -> Response:
+    """
+    Serve the requested bytes of a windowed copy up to the end of the fetched range they start in, and refuse
+    requests that start in a hole, so clients never read the zeros standing in for what was not downloaded.
+    Clients reading past a range end ask again from there, as they do after any short response.
+    """
+    size = os.path.getsize(path)
+    start, end = 0, size - 1
+    if range_header and range_header.startswith("bytes=") and "," not in range_header:
+        first, _, last = range_header[6:].strip().partition("-")
+        try:
+            if first:
+                start, end = int(first), min(int(last), size - 1) if last else size - 1
+            elif last:
+                start = max(size - int(last), 0)
+        except ValueError:
+            pass
+    held = next((held for held in ranges if held[0] <= start < held[1]), None)
+    if held is None or start > end:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    end = min(end, held[1] - 1)
+
+    def read():
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(READ_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    return StreamingResponse(read(), status_code=206, media_type=mimetypes.guess_type(path)[0],
+                             headers={"Content-Range": f"bytes {start}-{end}/{size}", "Accept-Ranges": "bytes",
+                                      "Content-Length": str(end - start + 1)})
+
+
+class MediaFiles(StaticFiles):
+    """The local media mount, with cache headers for HLS previews and only the fetched bytes of windowed copies."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        ranges = held_ranges(str(full_path))
+        if ranges:
+            return held_range_response(str(full_path), ranges, Request(scope).headers.get("range"))
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        header = cache_control(str(full_path))
+        if header:
+            response.headers["Cache-Control"] = header
+        return response
+
+
+class MediaRouter:
+    """Stable /media URLs for storage backends that are not served from the local filesystem."""
+
+    def __init__(self):
+        self.router = APIRouter(prefix="/media", tags=["media"])
+        self.add_routes()
+
+    def add_routes(self):
+        @self.router.get("/{path:path}", include_in_schema=False)
+        def get_media(path: str, request: Request):
+            """Serve node-local files (e.g. the download cache) directly, and redirect to the backend otherwise."""
+            location = os.path.normpath(os.path.join("media", path))
+            if not location.startswith("media" + os.sep):
+                raise HTTPException(status_code=404, detail="Not found")
+            ranges = held_ranges(location) if os.path.isfile(location) else None
+            if ranges:
+                return held_range_response(location, ranges, request.headers.get("range"))
+            if os.path.isfile(location):
+                header = cache_control(location)
+                return FileResponse(location, headers={"Cache-Control": header} if header else None)
+            return RedirectResponse(StorageManager.get_backend().url(location), status_code=307)
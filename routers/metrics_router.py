@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from config import constants
+from monitoring.metrics import QUEUE_DEPTH
+from redis_queue.redis_client import RedisManager
+from services.container import container
+
+
+class MetricsRouter:
+    def __init__(self):
+        self.router = APIRouter(tags=["metrics"])
+        self.add_routes()
+
+    def add_routes(self):
+        @self.router.get("/metrics", include_in_schema=False)
+        def get_metrics():
+            """Expose Prometheus metrics."""
+            redis_client = RedisManager.get_client()
+            for queue_name in (*container.fair_schedulers, constants.REDIS_VIDEO_PROCESSING_COMPLETED_QUEUE_NAME):
+                QUEUE_DEPTH.labels(queue=queue_name).set(redis_client.llen(queue_name))
+            for fair_scheduler in container.fair_schedulers.values():
+                QUEUE_DEPTH.labels(queue=fair_scheduler.prefix).set(fair_scheduler.backlog_size())
+            return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,24 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Query
+
+from database.database_dto import UsageStatsDTO
+from services.container import container
+
+
+class StatsRouter:
+    def __init__(self):
+        self.router = APIRouter(prefix="/stats", tags=["stats"])
+        self.add_routes()
+
+    def add_routes(self):
+        @self.router.get("/usage/", response_model=UsageStatsDTO)
+        def get_usage(
+                date_from: Optional[date] = Query(None),
+                date_to: Optional[date] = Query(None, description="Inclusive"),
+                category: Optional[str] = Query(None),
+                source_type: Optional[str] = Query(None, description="upload or url"),
+        ):
+            """Counts of originals, segments and output seconds per day, category and source type."""
+            return container.usage_rollups.stats(date_from, date_to, category, source_type)
@@ -1,11 +1,14 @@
-from typing import Optional
+from datetime import datetime
+from typing import Optional, Union
 
-import redis
-from fastapi import APIRouter, Form
+from fastapi import APIRouter, Form, Header, Request
 
-from controllers.url_controller import UrlController
 from models.file_type_model import FileData
-from models.video_models import VideoUploadResponse, VideoProcessInfo, VideoScreenType, MediaType
+from models.image_models import ImageBatchResponse
+from models.video_models import VideoUploadResponse, VideoProcessInfo, VideoScreenType, MediaType, \
+    JobPriority
+from monitoring import tracing
+from services.container import container
 from utils import validators
 
 
@@ -14,21 +17,30 @@ class UrlRouter:
     def __init__(self):
         self.router = APIRouter(prefix="/url", tags=["url"])
         self.add_routes()
-        self.url_controller = UrlController()
+        self.url_controller = container.url_controller
 
     def add_routes(self):
-        @self.router.post("/upload/", response_model=VideoUploadResponse)
+        @self.router.post("/upload/", response_model=Union[VideoUploadResponse, ImageBatchResponse])
         async def upload_video(
+                request: Request,
                 url: Optional[str] = Form(None),
                 segment_time: Optional[int] = Form(None),
                 skip_pairs: Optional[str] = Form(None),  # Accept as string
+                skip_silence: bool = Form(False),  # also skip the silent stretches
+                hls: bool = Form(False),  # also package the segments as HLS for preview playback
+                subtitles_url: Optional[str] = Form(None),  # SRT sidecar, cut to every segment
                 screen_type: Optional[str] = Form(None),
                 edit_type: Optional[str] = Form(None),
                 start_time: Optional[int] = Form(None),
                 end_time: Optional[int] = Form(None),
+                priority: Optional[str] = Form(None),
+                run_at: Optional[datetime] = Form(None),  # start the job at this time (UTC unless it has an offset)
+                client_id: Optional[str] = Header(None, alias="X-Client-Id"),
                 media_type: str = Form(None),
-
         ):
+            # Every upload starts a new trace that follows the job through the queue
+            tracing.start_trace()
+
             # Parse skip_pairs string to list of tuples
             parsed_skip_pairs = validators.parse_tuple_string(skip_pairs)
 
@@ -37,13 +49,20 @@ class UrlRouter:
                 media_type=MediaType(media_type),
                 segment_time=segment_time,
                 skip_pairs=parsed_skip_pairs,
+                skip_silence=skip_silence,
+                hls=hls,
+                subtitles_url=subtitles_url,
                 screen_type=VideoScreenType(screen_type),
                 edit_type=edit_type,
                 start_time=start_time,
-                end_time=end_time
+                end_time=end_time,
+                client_id=client_id,
+                client_address=request.client.host if request.client else None,
+                priority=JobPriority(priority) if priority else JobPriority.NORMAL,
+                run_at=run_at
             )
 
             file_type: FileData = FileData(url=url)
 
-            return self.url_controller.upload(video_process_info, file_type, None)
+            return await self.url_controller.upload(video_process_info, file_type, None)
 
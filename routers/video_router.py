@@ -1,40 +1,52 @@
+from datetime import datetime
 from typing import List, Optional
 
-import redis
-from fastapi import APIRouter, File, UploadFile, HTTPException, Form
+from fastapi import APIRouter, File, UploadFile, HTTPException, Form, Header, Request, Query
 
 import utils.validators as validators
-from controllers.video_controller import VideoController
-from database.database_dto import OriginalVideoDTO, TrimmedVideoDTO
+from config.config import config_properties
+from database.database_dto import OriginalVideoDTO, TrimmedVideoDTO, OriginalVideoSearchDTO
 from models.file_type_model import FileData
-from models.video_models import VideoUploadResponse, VideoProcessInfo, MediaType, VideoScreenType
+from models.video_models import VideoUploadResponse, VideoProcessInfo, MediaType, VideoScreenType, \
+    JobPriority
+from monitoring import tracing
+from services.container import container
 
 
 def get_video_controller():
-    controller = VideoController(None)
-    yield controller
+    yield container.video_controller
 
 
 class VideoRouter:
     def __init__(self):
         self.router = APIRouter(prefix="/videos", tags=["videos"])
         self.add_routes()
-        self.video_controller = VideoController()
+        self.video_controller = container.video_controller
 
     def add_routes(self):
         @self.router.post("/upload/", response_model=VideoUploadResponse)
         async def upload_video(
+            request: Request,
             file: Optional[UploadFile] = File(None),
+            subtitles: Optional[UploadFile] = File(None),  # SRT sidecar, cut to every segment
             segment_time: Optional[int] = Form(None),
             skip_pairs: Optional[str] = Form(None),  # Accept as string
+            skip_silence: bool = Form(False),  # also skip the silent stretches
+            hls: bool = Form(False),  # also package the segments as HLS for preview playback
             screen_type: Optional[str] = Form(None),
             edit_type: Optional[str] = Form(None),
             start_time: Optional[int] = Form(None),
             end_time: Optional[int] = Form(None),
+            priority: Optional[str] = Form(None),
+            run_at: Optional[datetime] = Form(None),  # start the job at this time (UTC unless it has an offset)
+            client_id: Optional[str] = Header(None, alias="X-Client-Id"),
         ):
             if file is None:
                 raise HTTPException(status_code=400, detail="File must be provided")
 
+            # Every upload starts a new trace that follows the job through the queue
+            tracing.start_trace()
+
             # Parse skip_pairs string to list of tuples
             parsed_skip_pairs = validators.parse_tuple_string(skip_pairs)
 
@@ -43,13 +55,19 @@ class VideoRouter:
                 media_type=MediaType.VIDEO,
                 segment_time=segment_time,
                 skip_pairs=parsed_skip_pairs,
+                skip_silence=skip_silence,
+                hls=hls,
                 screen_type=VideoScreenType(screen_type),
                 edit_type=edit_type,
                 start_time=start_time,
-                end_time=end_time
+                end_time=end_time,
+                client_id=client_id,
+                client_address=request.client.host if request.client else None,
+                priority=JobPriority(priority) if priority else JobPriority.NORMAL,
+                run_at=run_at
             )
             """Upload a video file for processing."""
-            return await self.video_controller.upload(video_process_info, FileData(file=file))
+            return await self.video_controller.upload(video_process_info, FileData(file=file, subtitles=subtitles), None)
 
 
         @self.router.get("/original_videos/", response_model=List[OriginalVideoDTO])
@@ -58,6 +76,20 @@ class VideoRouter:
             """Get all original videos."""
             return await self.video_controller.get_all_original_videos()
 
+        @self.router.get("/original_videos/search/", response_model=OriginalVideoSearchDTO)
+        async def search_original_videos(
+                q: Optional[str] = Query(None, description="Words to find in the name or description"),
+                category: Optional[str] = Query(None),
+                created_user: Optional[str] = Query(None),
+                created_from: Optional[datetime] = Query(None),
+                created_to: Optional[datetime] = Query(None),
+                cursor: Optional[int] = Query(None, description="next_cursor of the previous page"),
+                limit: int = Query(config_properties.SEARCH_PAGE_SIZE, ge=1, le=config_properties.SEARCH_MAX_PAGE_SIZE),
+        ):
+            """Search original videos, newest first, with category/user/date facets."""
+            return await self.video_controller.search_original_videos(q, category, created_user, created_from,
+                                                                      created_to, cursor, limit)
+
         @self.router.get("/trimmed_videos/{file_id}", response_model=List[TrimmedVideoDTO])
         async def get_trimmed_videos_by_original_file_id(
                 file_id: str
@@ -0,0 +1,135 @@
+import logging
+import math
+import time
+from functools import cached_property
+from typing import Optional
+
+from fastapi import HTTPException
+
+from config import constants
+from config.config import config_properties as properties
+from monitoring import metrics
+from redis_queue.redis_client import RedisManager
+from services.container import container
+
+logger = logging.getLogger(__name__)
+
+# KEYS: bucket. ARGV: capacity, refill per second, now. Returns {allowed, seconds until a token is available}
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens') or capacity)
+local updated = tonumber(redis.call('HGET', KEYS[1], 'updated') or now)
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class AdmissionRejectedError(HTTPException):
+    """A job was refused because the queue or the client's rate limit is full."""
+
+    def __init__(self, code: str, reason: str, retry_after: float):
+        self.code = code
+        self.retry_after = max(int(math.ceil(retry_after)), 1)
+        super().__init__(
+            status_code=429,
+            detail=f"{reason}. Retry in {describe_wait(self.retry_after)}.",
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+
+def describe_wait(seconds: float) -> str:
+    if seconds < 60:
+        return "less than a minute"
+    if seconds < 3600:
+        return f"about {round(seconds / 60)} minutes"
+    return f"about {seconds / 3600:.1f} hours"
+
+
+class AdmissionController:
+    """Back-pressure for job submission: queue depth, estimated drain time and per-client token buckets."""
+
+    def __init__(self, prefix: str = constants.REDIS_ADMISSION_PREFIX):
+        self.prefix = prefix
+
+    @cached_property
+    def redis_client(self):
+        return RedisManager.get_client()
+
+    @cached_property
+    def _token_bucket_script(self):
+        return self.redis_client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def queue_depth(self) -> int:
+        """Jobs accepted but not yet picked up by a worker, over every worker queue."""
+        pipeline = self.redis_client.pipeline()
+        for queue in container.fair_schedulers:
+            pipeline.llen(queue)
+        depth = sum(pipeline.execute())
+        if properties.FAIR_QUEUE_ENABLED:
+            depth += sum(fair_scheduler.backlog_size() for fair_scheduler in container.fair_schedulers.values())
+        return depth
+
+    def drain_rate(self) -> float:
+        """
+        Jobs per second the workers take while jobs are waiting for them. Minutes in which nothing waited
+        only show the arrival rate, so they are left out; without any measurement the default is used.
+        """
+        rates = []
+        if properties.FAIR_QUEUE_ENABLED:
+            rates = [fair_scheduler.drain_rate() for fair_scheduler in container.fair_schedulers.values()]
+        rate = sum(rate for rate in rates if rate is not None)
+        return rate or properties.ADMISSION_DEFAULT_DRAIN_RATE
+
+    def estimated_wait(self) -> float:
+        """Seconds until a job submitted now would reach a worker."""
+        return self.queue_depth() / self.drain_rate()
+
+    def check_capacity(self) -> float:
+        """Raise AdmissionRejectedError if the queue is over its limits, otherwise return the estimated wait."""
+        depth = self.queue_depth()
+        rate = self.drain_rate()
+        wait = depth / rate
+        if depth >= properties.ADMISSION_MAX_QUEUE_DEPTH:
+            raise AdmissionRejectedError("queue_full", "The processing queue is full",
+                                         (depth - properties.ADMISSION_MAX_QUEUE_DEPTH + 1) / rate)
+        if wait >= properties.ADMISSION_MAX_DRAIN_SECONDS:
+            raise AdmissionRejectedError("queue_too_long", "The processing queue is too long",
+                                         wait - properties.ADMISSION_MAX_DRAIN_SECONDS + 1)
+        return wait
+
+    def check_rate_limit(self, client: str) -> None:
+        """Take one token from the client's bucket, raising AdmissionRejectedError if it is empty."""
+        allowed, retry_after = self._token_bucket_script(
+            keys=[f"{self.prefix}:bucket:{client}"],
+            args=[properties.ADMISSION_CLIENT_BURST, properties.ADMISSION_CLIENT_RATE_PER_MINUTE / 60, time.time()]
+        )
+        if not int(allowed):
+            raise AdmissionRejectedError("rate_limited", "Too many jobs submitted", float(retry_after))
+
+    def admit(self, client: str, rate_limit_key: Optional[str] = None) -> float:
+        """
+        Admit one job for client, taking its token from the bucket of rate_limit_key (client by default).
+        Returns the estimated wait in seconds.
+        """
+        if not properties.ADMISSION_ENABLED:
+            return 0.0
+        try:
+            wait = self.check_capacity()
+            self.check_rate_limit(rate_limit_key or client)
+        except AdmissionRejectedError as e:
+            metrics.JOBS_REJECTED.labels(reason=e.code).inc()
+            logger.warning(f"Rejected job from {client}: {e.detail}")
+            raise
+        return wait
@@ -0,0 +1,129 @@
+from functools import cached_property
+
+
+class AppContainer:
+    """
+    Shared, lazily built application services. Nothing is constructed (and no client connects)
+    until first use, and heavy modules such as telegram are only imported by the roles that need them.
+    """
+
+    @cached_property
+    def redis_service(self):
+        from services.redis_service import RedisService
+        return RedisService()
+
+    @cached_property
+    def fair_scheduler(self):
+        from services.fair_scheduler import FairScheduler
+        return FairScheduler()
+
+    @cached_property
+    def fair_schedulers(self):
+        """A fair scheduler in front of every worker queue, by queue name."""
+        from config import constants
+        from services.fair_scheduler import FairScheduler
+        from services.worker_registry import worker_queue
+        schedulers = {constants.REDIS_VIDEO_QUEUE_NAME: self.fair_scheduler}
+        for job_type in constants.JOB_TYPES:
+            schedulers[worker_queue(job_type)] = FairScheduler(f"{constants.REDIS_FAIR_QUEUE_PREFIX}:{job_type}",
+                                                               worker_queue(job_type))
+        return schedulers
+
+    @cached_property
+    def worker_registry(self):
+        from services.worker_registry import WorkerRegistry
+        return WorkerRegistry()
+
+    @cached_property
+    def admission_controller(self):
+        from services.admission_controller import AdmissionController
+        return AdmissionController()
+
+    @cached_property
+    def job_archiver(self):
+        from services.job_archiver import JobArchiver
+        return JobArchiver()
+
+    @cached_property
+    def job_scheduler(self):
+        from services.job_scheduler import JobScheduler
+        return JobScheduler()
+
+    @cached_property
+    def url_fetcher(self):
+        from services.url_fetcher import UrlFetcher
+        return UrlFetcher()
+
+    @cached_property
+    def media_analyzer(self):
+        from services.media_analyzer import MediaAnalyzer
+        return MediaAnalyzer()
+
+    @cached_property
+    def storage_janitor(self):
+        from services.storage_janitor import StorageJanitor
+        return StorageJanitor()
+
+    @cached_property
+    def progress_reporter(self):
+        from telegram_bot.progress_reporter import ProgressReporter
+        return ProgressReporter()
+
+    @cached_property
+    def telegram_file_cache(self):
+        from telegram_bot.file_id_cache import TelegramFileIdCache
+        return TelegramFileIdCache()
+
+    @cached_property
+    def usage_rollups(self):
+        from services.usage_rollup_service import UsageRollupService
+        return UsageRollupService()
+
+    @cached_property
+    def subtitle_service(self):
+        from services.subtitle_service import SubtitleService
+        return SubtitleService()
+
+    @cached_property
+    def hls_packager(self):
+        from services.hls_packager import HlsPackager
+        return HlsPackager()
+
+    @cached_property
+    def image_service(self):
+        from services.image_service import ImageService
+        return ImageService()
+
+    @cached_property
+    def image_pool(self):
+        from concurrent.futures import ProcessPoolExecutor
+        from config.config import config_properties
+        return ProcessPoolExecutor(max_workers=config_properties.MAX_WORKERS)
+
+    @cached_property
+    def video_service(self):
+        from services.video_service import VideoService
+        return VideoService()
+
+    @cached_property
+    def telegram_messenger(self):
+        from telegram_bot.messenger import TelegramMessenger
+        return TelegramMessenger(None, None)
+
+    @cached_property
+    def url_controller(self):
+        from controllers.url_controller import UrlController
+        return UrlController()
+
+    @cached_property
+    def image_controller(self):
+        from controllers.image_controller import ImageController
+        return ImageController()
+
+    @cached_property
+    def video_controller(self):
+        from controllers.video_controller import VideoController
+        return VideoController()
+
+
+container = AppContainer()
@@ -0,0 +1,190 @@
+import logging
+import time
+from functools import cached_property
+from typing import Optional
+
+from config import constants
+from config.config import config_properties as properties
+from models.video_models import JobPriority
+from redis_queue.redis_client import RedisManager
+
+logger = logging.getLogger(__name__)
+
+# Priority classes are served strictly in this order; clients within a class are served round-robin
+PRIORITY_ORDER = (JobPriority.HIGH, JobPriority.NORMAL, JobPriority.LOW)
+
+# KEYS: client queue, active clients list, pending counter. ARGV: job id, client
+ENQUEUE_SCRIPT = """
+local length = redis.call('LPUSH', KEYS[1], ARGV[1])
+if length == 1 then
+    redis.call('RPUSH', KEYS[2], ARGV[2])
+end
+redis.call('INCR', KEYS[3])
+return length
+"""
+
+# KEYS: worker queue, pending counter, weights hash, active clients list per priority class, then the queues
+# of the clients at the head of each active list. ARGV: window, number of those clients per priority class,
+# then the clients themselves. Returns {jobs dispatched, jobs still waiting}.
+# Every key the script touches is passed in KEYS, as the scripting contract requires. They must still all live
+# on one node: the worker queue name is shared with the workers, so it can't carry a cluster hash tag.
+DISPATCH_SCRIPT = """
+local room = tonumber(ARGV[1]) - redis.call('LLEN', KEYS[1])
+local dispatched = 0
+-- The client queues and clients follow the three active lists and the three counts
+local next_key, next_arg = 7, 5
+for i = 4, 6 do
+    local queues = {}
+    for _ = 1, tonumber(ARGV[i - 2]) do
+        queues[ARGV[next_arg]] = KEYS[next_key]
+        next_key, next_arg = next_key + 1, next_arg + 1
+    end
+    while room > 0 do
+        local client = redis.call('LPOP', KEYS[i])
+        if not client then
+            break
+        end
+        local queue = queues[client]
+        if not queue then
+            -- Not among the clients read before the call (another dispatcher got there first); next time
+            redis.call('LPUSH', KEYS[i], client)
+            break
+        end
+        local quantum = tonumber(redis.call('HGET', KEYS[3], client) or '1')
+        local taken = 0
+        while taken < quantum and room > 0 do
+            local job = redis.call('RPOP', queue)
+            if not job then
+                break
+            end
+            redis.call('LPUSH', KEYS[1], job)
+            taken = taken + 1
+            room = room - 1
+        end
+        dispatched = dispatched + taken
+        if redis.call('LLEN', queue) > 0 then
+            redis.call('RPUSH', KEYS[i], client)
+        end
+    end
+end
+if dispatched > 0 then
+    redis.call('DECRBY', KEYS[2], dispatched)
+end
+return {dispatched, tonumber(redis.call('GET', KEYS[2]) or '0')}
+"""
+
+
+class FairScheduler:
+    """
+    Per client fair queuing in front of a worker queue, REDIS_VIDEO_QUEUE_NAME unless given another.
+
+    Jobs wait in one sub-queue per client and priority class. The dispatcher moves them into the worker
+    queue round-robin across clients (a client's weight is how many jobs it gets per turn), keeping only
+    the dispatch window of jobs there, so workers keep popping the same list as before.
+    """
+
+    def __init__(self, prefix: str = constants.REDIS_FAIR_QUEUE_PREFIX,
+                 worker_queue: str = constants.REDIS_VIDEO_QUEUE_NAME):
+        self.prefix = prefix
+        self.worker_queue = worker_queue
+        self.pending_key = f"{prefix}:pending"
+        # Client weights are the same whichever worker queue their jobs go to
+        self.weights_key = f"{constants.REDIS_FAIR_QUEUE_PREFIX}:weights"
+        self.drained_key = f"{prefix}:drained"
+        self.rate_key = f"{prefix}:drain_rate"
+
+    @cached_property
+    def redis_client(self):
+        return RedisManager.get_client()
+
+    @cached_property
+    def _enqueue_script(self):
+        return self.redis_client.register_script(ENQUEUE_SCRIPT)
+
+    @cached_property
+    def _dispatch_script(self):
+        return self.redis_client.register_script(DISPATCH_SCRIPT)
+
+    def active_key(self, priority: JobPriority) -> str:
+        return f"{self.prefix}:active:{priority.value}"
+
+    def queue_prefix(self, priority: JobPriority) -> str:
+        return f"{self.prefix}:queue:{priority.value}:"
+
+    @staticmethod
+    def client_key(telegram_chat_id: Optional[int], client_id: Optional[str],
+                   client_address: Optional[str] = None) -> str:
+        if telegram_chat_id:
+            return f"{constants.TELEGRAM_CLIENT_PREFIX}:{telegram_chat_id}"
+        if client_address:
+            # Anyone can send any X-Client-Id, so it only tells apart the clients behind one address
+            return f"{client_address}/{client_id}" if client_id else client_address
+        return client_id or constants.ANONYMOUS_CLIENT
+
+    def enqueue(self, job_id: str, client: str, priority: JobPriority = JobPriority.NORMAL) -> None:
+        self._enqueue_script(
+            keys=[self.queue_prefix(priority) + client, self.active_key(priority), self.pending_key],
+            args=[job_id, client]
+        )
+
+    def dispatch(self, window: int = None) -> int:
+        """Move waiting jobs into the worker queue until it holds window jobs. Returns the number moved."""
+        window = properties.FAIR_DISPATCH_WINDOW if window is None else window
+        if window <= 0:
+            return 0
+        # Every client served gets at least one job, so no more than window clients of a class can be reached
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for priority in PRIORITY_ORDER:
+            pipeline.lrange(self.active_key(priority), 0, window - 1)
+        heads = pipeline.execute()
+        dispatched, waiting = self._dispatch_script(
+            keys=[self.worker_queue, self.pending_key, self.weights_key,
+                  *(self.active_key(priority) for priority in PRIORITY_ORDER),
+                  *(self.queue_prefix(priority) + client for priority, clients in zip(PRIORITY_ORDER, heads)
+                    for client in clients)],
+            args=[window, *(len(clients) for clients in heads), *(client for clients in heads for client in clients)]
+        )
+        if dispatched or waiting:
+            self._record_drained(dispatched, busy=waiting > 0)
+        return dispatched
+
+    def _record_drained(self, count: int, busy: bool) -> None:
+        # Per minute buckets of jobs handed to workers. Minutes in which jobs were left waiting are flagged busy:
+        # only then is the count the worker throughput rather than the arrival rate
+        minute_key = f"{self.drained_key}:{int(time.time() // 60)}"
+        ttl = (properties.ADMISSION_RATE_WINDOW_MINUTES + 1) * 60
+        pipeline = self.redis_client.pipeline()
+        pipeline.incrby(minute_key, count)
+        pipeline.expire(minute_key, ttl)
+        if busy:
+            pipeline.set(f"{minute_key}:busy", 1, ex=ttl)
+        pipeline.execute()
+
+    def drain_rate(self) -> Optional[float]:
+        """
+        Jobs per second handed to workers over the busy minutes among the last ADMISSION_RATE_WINDOW_MINUTES
+        full minutes. Without a busy minute, the last rate measured within ADMISSION_RATE_MEMORY seconds;
+        None if there is none.
+        """
+        window = properties.ADMISSION_RATE_WINDOW_MINUTES
+        current_minute = int(time.time() // 60)
+        minute_keys = [f"{self.drained_key}:{minute}" for minute in range(current_minute - window, current_minute)]
+        values = self.redis_client.mget(minute_keys + [f"{key}:busy" for key in minute_keys])
+        busy = [int(count or 0) for count, flag in zip(values[:window], values[window:]) if flag]
+        if not busy:
+            rate = self.redis_client.get(self.rate_key)
+            return float(rate) if rate else None
+        rate = sum(busy) / (len(busy) * 60)
+        self.redis_client.set(self.rate_key, rate, ex=properties.ADMISSION_RATE_MEMORY)
+        return rate
+
+    def set_client_weight(self, client: str, weight: int) -> None:
+        """Give a client weight jobs per round-robin turn (default 1)."""
+        if weight <= 1:
+            self.redis_client.hdel(self.weights_key, client)
+        else:
+            self.redis_client.hset(self.weights_key, client, weight)
+
+    def backlog_size(self) -> int:
+        """Jobs waiting in client sub-queues, not yet visible to workers."""
+        return int(self.redis_client.get(self.pending_key) or 0)
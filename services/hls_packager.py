@@ -0,0 +1,185 @@
+import asyncio
+import json
+import logging
+import os
+from functools import cached_property
+from typing import List, Optional
+
+from config import constants
+from config.config import config_properties as properties
+from models.job_models import HlsPreview, HlsSegmentPreview
+from models.video_models import ProcessingStatus
+from redis_queue.redis_client import RedisManager
+from services.container import container
+from storage.storage_manager import StorageManager
+from utils.hls_playlist import Segment, parse_playlist, render_joined_playlist
+from utils.validators import generate_full_path_from_location
+
+logger = logging.getLogger(__name__)
+
+PLAYLIST_NAME = "index.m3u8"
+INIT_NAME = "init.mp4"
+PART_PATTERN = "part_%05d.m4s"
+# Only one packager rewrites a job playlist at a time, so the last write always has every packaged segment
+PLAYLIST_LOCK_TIMEOUT = 30  # seconds
+
+
+class HlsPackager:
+    """
+    Packages trimmed segments as HLS with fMP4 parts, by stream copy so nothing is re-encoded, for previews
+    that start playing after the first part and seek without downloading the whole segment. Every segment
+    gets its own VOD playlist under HLS_OUTPUT_DIR/<job id>/<start>/, and the job a playlist of all its
+    segments in order, which becomes VOD once the job has completed and all its segments are packaged.
+    """
+
+    def __init__(self):
+        self.output_dir = properties.HLS_OUTPUT_DIR or os.path.join(properties.UPLOAD_DIR, "hls")
+
+    @cached_property
+    def redis_client(self):
+        return RedisManager.get_client()
+
+    @cached_property
+    def job_record_repo(self):
+        from database.repository.job_record_repository import JobRecordRepository
+        return JobRecordRepository()
+
+    @staticmethod
+    def packaged_key(job_key: str) -> str:
+        return f"{job_key}:{constants.REDIS_HLS_SUFFIX}"
+
+    @staticmethod
+    def pending_key(job_key: str) -> str:
+        return f"{job_key}:{constants.REDIS_HLS_SUFFIX}:pending"
+
+    def job_dir(self, job_key: str) -> str:
+        return os.path.join(self.output_dir, job_key.split(":", 1)[-1])
+
+    def queue_segment(self, job_key: str, start_time: float, end_time: float, location: str) -> None:
+        """Queue a completed segment of the job for packaging."""
+        pipeline = self.redis_client.pipeline()
+        pipeline.rpush(self.pending_key(job_key),
+                       json.dumps({"start": start_time, "end": end_time, "location": location}))
+        pipeline.expire(self.pending_key(job_key), properties.JOB_RECORD_TTL)
+        pipeline.lpush(constants.REDIS_HLS_QUEUE_NAME, job_key)
+        pipeline.execute()
+
+    async def package_job(self, job_key: str) -> None:
+        """Package the job's segments waiting for it, then rewrite the job playlist."""
+        pipeline = self.redis_client.pipeline()
+        pipeline.lrange(self.pending_key(job_key), 0, -1)
+        pipeline.delete(self.pending_key(job_key))
+        pending = [json.loads(item) for item in pipeline.execute()[0]]
+        for segment in pending:
+            packaged = await self.package_segment(job_key, segment["location"], segment["start"])
+            # Failed segments are recorded too, so the job playlist can still be finished without them
+            self.redis_client.hset(self.packaged_key(job_key), str(segment["start"]),
+                                   json.dumps({"end": segment["end"], **packaged}))
+            self.redis_client.expire(self.packaged_key(job_key), properties.JOB_RECORD_TTL)
+        await asyncio.to_thread(self.write_job_playlist, job_key)
+
+    async def package_segment(self, job_key: str, location: str, start_time: float) -> dict:
+        """
+        Package one segment. Returns its playlist location and parts, with URIs relative to the job directory,
+        or nothing if packaging failed.
+        """
+        name = f"{int(start_time):06d}"
+        directory = os.path.join(self.job_dir(job_key), name)
+        playlist_location = os.path.join(directory, PLAYLIST_NAME)
+        source = location if os.path.isfile(location) else StorageManager.get_backend().url(location)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            await asyncio.wait_for(self._run_ffmpeg(source, directory), properties.HLS_TIMEOUT)
+            with open(playlist_location, encoding="utf-8") as f:
+                playlist = parse_playlist(f.read(), f"{name}/")
+            files = [PLAYLIST_NAME, *(file_name for file_name in os.listdir(directory) if file_name != PLAYLIST_NAME)]
+            self.publish(directory, files)
+        except Exception as e:
+            logger.warning(f"Packaging segment {location} of job {job_key} as HLS failed: {e}")
+            return {}
+        return {
+            "playlist": playlist_location,
+            "map": playlist.segments[0].map if playlist.segments else None,
+            "parts": [[segment.duration, segment.uri] for segment in playlist.segments]
+        }
+
+    @staticmethod
+    async def _run_ffmpeg(source: str, directory: str) -> None:
+        process = await asyncio.create_subprocess_exec(
+            properties.FFMPEG_BINARY, "-v", "error", "-nostdin", "-y", "-i", source,
+            "-map", "0:v:0?", "-map", "0:a:0?", "-c", "copy",
+            "-f", "hls", "-hls_time", str(properties.HLS_PART_TIME), "-hls_playlist_type", "vod",
+            "-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", INIT_NAME,
+            "-hls_segment_filename", os.path.join(directory, PART_PATTERN), os.path.join(directory, PLAYLIST_NAME),
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+        try:
+            _, stderr = await process.communicate()
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed on {source}: {stderr.decode(errors='replace').strip()[-500:]}")
+
+    @staticmethod
+    def publish(directory: str, files: List[str]) -> None:
+        """Make packaged files available through the storage backend, indexed as one unit if they stay local."""
+        backend = StorageManager.get_backend()
+        for file_name in files:
+            backend.publish(os.path.join(directory, file_name))
+        playlist_location = os.path.join(directory, files[0])
+        if os.path.isfile(playlist_location):
+            container.storage_janitor.record(playlist_location,
+                                             parts=[file_name for file_name in files[1:]
+                                                    if os.path.isfile(os.path.join(directory, file_name))])
+
+    def write_job_playlist(self, job_key: str) -> None:
+        with self.redis_client.lock(f"{self.packaged_key(job_key)}:lock", timeout=PLAYLIST_LOCK_TIMEOUT):
+            packaged = self.redis_client.hgetall(self.packaged_key(job_key))
+            status, segments_done = self.redis_client.hmget(job_key, ["status", "segments_done"])
+            complete = status == ProcessingStatus.COMPLETED.value and len(packaged) >= int(segments_done or 0)
+            parts = []
+            for _, segment in sorted(packaged.items(), key=lambda item: float(item[0])):
+                segment = json.loads(segment)
+                parts.append([Segment(uri, duration, 0.0, map=segment.get("map"))
+                              for duration, uri in segment.get("parts", [])])
+            location = os.path.join(self.job_dir(job_key), PLAYLIST_NAME)
+            os.makedirs(os.path.dirname(location), exist_ok=True)
+            temp_path = f"{location}.part"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(render_joined_playlist([part for part in parts if part], complete))
+            # Written over on every update, which publish() would not do for a file already in the bucket
+            backend = StorageManager.get_backend()
+            if backend.name == "local":
+                os.replace(temp_path, location)
+                container.storage_janitor.record(location)
+            else:
+                backend.upload_file(temp_path, location)
+                os.remove(temp_path)
+            self.redis_client.hset(job_key, mapping={"hls_location": location, "hls_complete": int(complete)})
+        if complete:
+            logger.info(f"Job {job_key}: HLS preview of {len(parts)} segments complete")
+
+    def preview(self, job_key: str) -> Optional[HlsPreview]:
+        """URLs of the job's HLS playlists, once its first segment is packaged; from its record once archived."""
+        location, complete = self.redis_client.hmget(job_key, ["hls_location", "hls_complete"])
+        if location:
+            packaged = self.redis_client.hgetall(self.packaged_key(job_key))
+        else:
+            record = self.job_record_repo.get_by_job_id(job_key.removeprefix(f"{constants.REDIS_JOB_KEY_PREFIX}:"))
+            attributes = (record.attributes or {}) if record else {}
+            location, complete = attributes.get("hls_location"), attributes.get("hls_complete")
+            packaged = attributes.get("hls_segments") or {}
+        if not location:
+            return None
+        segments = []
+        for start_time, segment in sorted(packaged.items(), key=lambda item: float(item[0])):
+            segment = json.loads(segment)
+            playlist = segment.get("playlist")
+            segments.append(HlsSegmentPreview(
+                start_time=float(start_time),
+                end_time=segment["end"],
+                playlist_url=generate_full_path_from_location(playlist) if playlist else None
+            ))
+        return HlsPreview(job_id=job_key, playlist_url=generate_full_path_from_location(location),
+                          complete=complete == "1", segments=segments)
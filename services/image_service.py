@@ -0,0 +1,248 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+import zipfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+
+import utils.image_utils as image_utils
+from config import constants
+from config.config import config_properties as properties
+from database.database_models import ProcessedImage
+from database.repository.processed_image_repository import ProcessedImageRepository
+from models.image_models import ImageBatchResponse, ImageResult, SkippedImage
+from models.video_models import VideoScreenType
+from services.container import container
+from storage.storage_manager import StorageManager
+from utils.validators import generate_full_path_from_location
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass
+class IncomingImage:
+    file_name: str
+    path: str
+    content_hash: str
+
+
+@dataclass
+class ImageBatch:
+    """The images of one album or zip, staged on local disk until they are processed."""
+    work_dir: str
+    images: List[IncomingImage] = field(default_factory=list)
+    skipped: List[SkippedImage] = field(default_factory=list)
+    total_bytes: int = 0
+
+    def new_path(self, file_name: str) -> str:
+        return os.path.join(self.work_dir, f"{uuid.uuid4().hex}{os.path.splitext(file_name)[1].lower()}")
+
+    def check_count(self) -> None:
+        if len(self.images) >= properties.IMAGE_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"At most {properties.IMAGE_MAX_FILES} images per upload")
+
+    def add_bytes(self, count: int) -> None:
+        self.total_bytes += count
+        if self.total_bytes > properties.IMAGE_MAX_BATCH_BYTES:
+            raise HTTPException(status_code=413,
+                                detail=f"Uploads are limited to {properties.IMAGE_MAX_BATCH_BYTES} bytes of images")
+
+
+def is_image(file_name: str) -> bool:
+    return os.path.splitext(file_name)[1].lower() in constants.IMAGE_EXTENSIONS
+
+
+def is_zip(file_name: str) -> bool:
+    return os.path.splitext(file_name)[1].lower() == constants.ZIP_EXTENSION
+
+
+class ImageService:
+    """
+    Turns albums and zip archives of images into JPEGs cropped to the 720p landscape or portrait frame.
+    Sources are hashed as they are staged; content already processed for the same frame is served from
+    the earlier output, and the rest is resized in a process pool.
+    """
+
+    def __init__(self):
+        self.processed_image_repo = ProcessedImageRepository()
+        self.output_dir = properties.IMAGE_OUTPUT_DIR or os.path.join(properties.UPLOAD_DIR, "images")
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    async def process_uploads(self, files: List[UploadFile], screen_type: VideoScreenType) -> ImageBatchResponse:
+        batch = self._new_batch()
+        try:
+            for file in files:
+                file_name = os.path.basename(file.filename or "")
+                if is_zip(file_name):
+                    archive_path = batch.new_path(file_name)
+                    await self._stage_upload(file, archive_path)
+                    await asyncio.to_thread(self._stage_archive, archive_path, file_name, batch)
+                elif is_image(file_name):
+                    batch.check_count()
+                    path = batch.new_path(file_name)
+                    content_hash = await self._stage_upload(file, path, batch)
+                    batch.images.append(IncomingImage(file_name, path, content_hash))
+                else:
+                    batch.skipped.append(SkippedImage(file_name=file_name, reason="Not an image or zip file"))
+            return await self._process(batch, screen_type)
+        finally:
+            shutil.rmtree(batch.work_dir, ignore_errors=True)
+
+    async def process_url(self, url: str, screen_type: VideoScreenType) -> ImageBatchResponse:
+        """Process an image or a zip of images behind a URL, downloaded through the fetch stage's cache."""
+        batch = self._new_batch()
+        try:
+            try:
+                result = await container.url_fetcher.fetch(url)
+            except Exception as e:
+                logger.error(f"Fetching images from {url} failed: {e}")
+                raise HTTPException(status_code=400, detail=f"Could not download {url}")
+            file_name = os.path.basename(url.split("?")[0]) or os.path.basename(result.path)
+            if await asyncio.to_thread(zipfile.is_zipfile, result.path):
+                await asyncio.to_thread(self._stage_archive, result.path, file_name, batch)
+            else:
+                # The cached copy is processed in place; the batch doesn't own it
+                batch.add_bytes(os.path.getsize(result.path))
+                content_hash = await asyncio.to_thread(self._hash_file, result.path)
+                batch.images.append(IncomingImage(file_name, result.path, content_hash))
+            return await self._process(batch, screen_type)
+        finally:
+            shutil.rmtree(batch.work_dir, ignore_errors=True)
+
+    def _new_batch(self) -> ImageBatch:
+        # Staged outside the directories the media mount serves
+        work_dir = os.path.join(properties.TRIMMED_DIR, "incoming_images", uuid.uuid4().hex)
+        os.makedirs(work_dir, exist_ok=True)
+        return ImageBatch(work_dir)
+
+    @staticmethod
+    async def _stage_upload(file: UploadFile, path: str, batch: Optional[ImageBatch] = None) -> str:
+        """
+        Stream an upload to path a chunk at a time, hashing it on the way, and return its sha256.
+        Counts towards the batch's byte limit when a batch is given; archives are limited by what they expand to.
+        """
+        digest = hashlib.sha256()
+        written = 0
+        async with aiofiles.open(path, "wb") as f:
+            while chunk := await file.read(properties.CHUNK_SIZE):
+                if batch:
+                    batch.add_bytes(len(chunk))
+                else:
+                    written += len(chunk)
+                    if written > properties.IMAGE_MAX_BATCH_BYTES:
+                        raise HTTPException(status_code=413, detail="Zip file too large")
+                digest.update(chunk)
+                await f.write(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _stage_archive(archive_path: str, archive_name: str, batch: ImageBatch) -> None:
+        """Extract the images of a zip into the batch, hashing each member as it is copied out."""
+        try:
+            archive = zipfile.ZipFile(archive_path)
+        except zipfile.BadZipFile:
+            batch.skipped.append(SkippedImage(file_name=archive_name, reason="Not a valid zip file"))
+            return
+        with archive:
+            for member in archive.infolist():
+                file_name = os.path.basename(member.filename)
+                if member.is_dir() or not file_name or member.filename.startswith("__MACOSX/"):
+                    continue
+                if not is_image(file_name):
+                    batch.skipped.append(SkippedImage(file_name=member.filename, reason="Not an image"))
+                    continue
+                # Sizes in the zip directory are checked before anything is decompressed, and reads stop there
+                batch.check_count()
+                batch.add_bytes(member.file_size)
+                path = batch.new_path(file_name)
+                digest = hashlib.sha256()
+                with archive.open(member) as source, open(path, "wb") as target:
+                    while chunk := source.read(HASH_CHUNK_SIZE):
+                        digest.update(chunk)
+                        target.write(chunk)
+                batch.images.append(IncomingImage(member.filename, path, digest.hexdigest()))
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _known_outputs(self, content_hashes: List[str], screen_type: VideoScreenType) -> Dict[str, ProcessedImage]:
+        known = self.processed_image_repo.get_by_hashes(content_hashes, screen_type.value)
+        # An output the storage janitor has evicted since is made again
+        backend = StorageManager.get_backend()
+        return {content_hash: image for content_hash, image in known.items() if backend.exists(image.location)}
+
+    @staticmethod
+    def _store_output(location: str) -> None:
+        StorageManager.get_backend().publish(location)
+        if os.path.isfile(location):
+            container.storage_janitor.record(location, evictable=True)
+
+    async def _process(self, batch: ImageBatch, screen_type: VideoScreenType) -> ImageBatchResponse:
+        if screen_type == VideoScreenType.PORTRAIT:
+            width, height = properties.HEIGHT_720P, properties.WIDTH_720P
+        else:
+            width, height = properties.WIDTH_720P, properties.HEIGHT_720P
+
+        # One source per distinct content; repeats within the batch share its output
+        unique = {}
+        for image in batch.images:
+            unique.setdefault(image.content_hash, image)
+        known = await asyncio.to_thread(self._known_outputs, list(unique), screen_type)
+
+        pending = [image for content_hash, image in unique.items() if content_hash not in known]
+        loop = asyncio.get_running_loop()
+        targets = [os.path.join(self.output_dir, f"{image.content_hash}-{screen_type.value}.jpg") for image in pending]
+        results = await asyncio.gather(*(
+            loop.run_in_executor(container.image_pool, image_utils.fit_image, image.path, target, width, height,
+                                 properties.IMAGE_JPEG_QUALITY, properties.IMAGE_MAX_PIXELS)
+            for image, target in zip(pending, targets)), return_exceptions=True)
+
+        processed, failed = {}, {}
+        for image, target, result in zip(pending, targets, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Processing image {image.file_name} failed: {result}")
+                failed[image.content_hash] = "Could not decode image"
+                continue
+            output_width, output_height, size = result
+            await asyncio.to_thread(self._store_output, target)
+            processed[image.content_hash] = ProcessedImage(
+                content_hash=image.content_hash, screen_type=screen_type.value, file_name=image.file_name,
+                location=target, width=output_width, height=output_height, size=size)
+        if processed:
+            await asyncio.to_thread(self.processed_image_repo.save_images, list(processed.values()))
+
+        images, skipped = [], list(batch.skipped)
+        for image in batch.images:
+            if image.content_hash in failed:
+                skipped.append(SkippedImage(file_name=image.file_name, reason=failed[image.content_hash]))
+                continue
+            output = known.get(image.content_hash) or processed[image.content_hash]
+            images.append(ImageResult(
+                file_name=image.file_name,
+                content_hash=image.content_hash,
+                location=generate_full_path_from_location(output.location),
+                width=output.width,
+                height=output.height,
+                reused=image.content_hash in known or unique[image.content_hash] is not image
+            ))
+        logger.info(f"Image batch: {len(processed)} processed, {len(images) - len(processed)} reused, "
+                    f"{len(skipped)} skipped")
+        return ImageBatchResponse(
+            status="completed" if images else "failed",
+            images=images,
+            skipped=skipped,
+            message=f"{len(processed)} processed, {len(images) - len(processed)} reused, {len(skipped)} skipped"
+        )
@@ -0,0 +1,116 @@
+import logging
+import time
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Dict, List, Optional
+
+from config import constants
+from config.config import config_properties as properties
+from database.database_models import JobRecord
+from database.repository.job_record_repository import JobRecordRepository
+from monitoring import metrics
+from redis_queue import codec
+from redis_queue.redis_client import RedisManager
+
+logger = logging.getLogger(__name__)
+
+
+class JobArchiver:
+    """Moves finished job hashes out of Redis into the job_records table, in batches."""
+
+    def __init__(self):
+        self.job_record_repo = JobRecordRepository()
+
+    @cached_property
+    def redis_client(self):
+        return RedisManager.get_client()
+
+    @cached_property
+    def binary_redis_client(self):
+        return RedisManager.get_binary_client()
+
+    def archive_batch(self) -> int:
+        """Archive up to JOB_ARCHIVE_BATCH_SIZE jobs that finished at least JOB_ARCHIVE_DELAY ago."""
+        cutoff = time.time() - properties.JOB_ARCHIVE_DELAY
+        job_keys = self.redis_client.zrangebyscore(constants.REDIS_JOB_ARCHIVE_QUEUE_NAME, "-inf", cutoff,
+                                                   start=0, num=properties.JOB_ARCHIVE_BATCH_SIZE)
+        if not job_keys:
+            return 0
+
+        # Claim the keys first so concurrent archivers never archive the same job twice
+        pipeline = self.redis_client.pipeline()
+        for job_key in job_keys:
+            pipeline.zrem(constants.REDIS_JOB_ARCHIVE_QUEUE_NAME, job_key)
+        claimed = [job_key for job_key, removed in zip(job_keys, pipeline.execute()) if removed]
+        if claimed:
+            # Dead letters are archived once their retention is up; they can't be requeued after that
+            self.redis_client.zrem(constants.REDIS_DEAD_LETTER_KEY, *claimed)
+        if not claimed:
+            return 0
+
+        # Payloads may be binary depending on the codec, so read raw bytes
+        pipeline = self.binary_redis_client.pipeline()
+        for job_key in claimed:
+            pipeline.hgetall(job_key)
+            pipeline.hgetall(f"{job_key}:{constants.REDIS_HLS_SUFFIX}")
+        results = pipeline.execute()
+        # Jobs whose TTL already ran out come back empty and are simply dropped
+        records, unreadable = [], set()
+        for job_key, fields, hls_segments in zip(claimed, results[::2], results[1::2]):
+            if not fields:
+                continue
+            try:
+                records.append(self.to_record(job_key, fields, hls_segments))
+            except Exception as e:
+                # Left in Redis until its TTL, rather than holding back the rest of the batch
+                logger.error(f"Job {job_key} could not be archived: {e}")
+                metrics.JOBS_ARCHIVE_FAILED.inc()
+                unreadable.add(job_key)
+
+        try:
+            self.job_record_repo.upsert_all(records)
+        except Exception:
+            # Put the jobs back so the next pass retries them
+            self.redis_client.zadd(constants.REDIS_JOB_ARCHIVE_QUEUE_NAME, {job_key: cutoff for job_key in claimed})
+            raise
+        # The sidecars go with the hash, rather than lingering until their own TTL runs out
+        pipeline = self.redis_client.pipeline()
+        for job_key in claimed:
+            if job_key in unreadable:
+                continue
+            pipeline.delete(job_key, *(f"{job_key}:{suffix}" for suffix in constants.REDIS_JOB_SIDECAR_SUFFIXES))
+        pipeline.execute()
+
+        metrics.JOBS_ARCHIVED.inc(len(records))
+        logger.info(f"Archived {len(records)} job records")
+        return len(claimed)
+
+    @staticmethod
+    def to_record(job_key: str, raw_fields: Dict[bytes, bytes],
+                  hls_segments: Optional[Dict[bytes, bytes]] = None) -> JobRecord:
+        payload = raw_fields.get(codec.DATA_FIELD.encode())
+        fields = {key.decode(): value.decode() for key, value in raw_fields.items()
+                  if key.decode().removeprefix(codec.QUEUED_PREFIX) not in codec.PAYLOAD_FIELDS}
+        data = None
+        if payload:
+            data = codec.decode_payload(payload, raw_fields.get(codec.CODEC_FIELD.encode()),
+                                        raw_fields.get(codec.SCHEMA_FIELD.encode()))
+        if hls_segments:
+            # Kept so the HLS preview outlives the job hash
+            fields["hls_segments"] = {start.decode(): segment.decode() for start, segment in hls_segments.items()}
+        return JobRecord(
+            job_id=job_key.removeprefix(f"{constants.REDIS_JOB_KEY_PREFIX}:"),
+            status=fields.pop("status", ""),
+            trace_id=fields.pop("trace_id", None),
+            data=data,
+            enqueued_at=JobArchiver.to_datetime(fields.pop("enqueued_at", None)),
+            finished_at=JobArchiver.to_datetime(fields.pop("updated_at", None)),
+            attributes=fields
+        )
+
+    @staticmethod
+    def to_datetime(timestamp: Optional[str]) -> Optional[datetime]:
+        return datetime.fromtimestamp(float(timestamp), tz=timezone.utc) if timestamp else None
+
+    def pending(self) -> List[str]:
+        return self.redis_client.zrange(constants.REDIS_JOB_ARCHIVE_QUEUE_NAME, 0, -1)
@@ -0,0 +1,128 @@
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import List, Optional
+
+from config import constants
+from config.config import config_properties as properties
+from models.job_models import DeadLetterJob, DeadLetterPage
+from redis_queue.redis_client import RedisManager
+from services.container import container
+
+logger = logging.getLogger(__name__)
+
+# KEYS: scheduled jobs zset. ARGV: now, limit
+# Claims the due jobs by removing them, so concurrent schedulers never release a job twice.
+CLAIM_DUE_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+
+def retry_delay(attempt: int) -> float:
+    """
+    Seconds to wait before retrying after the given failed attempt: exponential backoff with equal jitter,
+    so jobs failing together don't all come back at the same moment.
+    """
+    delay = min(properties.JOB_RETRY_BASE_DELAY * 2 ** max(attempt - 1, 0), properties.JOB_RETRY_MAX_DELAY)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def to_timestamp(moment: datetime) -> float:
+    """Epoch seconds of a datetime; naive datetimes are taken as UTC."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+class JobScheduler:
+    """
+    Delayed execution on Redis sorted sets scored by time: jobs waiting for a retry or for the time
+    a user scheduled them at, and the dead-letter queue of jobs that ran out of attempts.
+    """
+
+    @cached_property
+    def redis_client(self):
+        return RedisManager.get_client()
+
+    @cached_property
+    def _claim_due_script(self):
+        return self.redis_client.register_script(CLAIM_DUE_SCRIPT)
+
+    def schedule(self, job_key: str, run_at: float) -> None:
+        pipeline = self.redis_client.pipeline()
+        pipeline.hset(job_key, "run_at", run_at)
+        pipeline.zadd(constants.REDIS_SCHEDULED_JOBS_KEY, {job_key: run_at})
+        pipeline.execute()
+
+    def claim_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[str]:
+        return self._claim_due_script(
+            keys=[constants.REDIS_SCHEDULED_JOBS_KEY],
+            args=[time.time() if now is None else now, limit or properties.SCHEDULER_BATCH_SIZE]
+        )
+
+    def release_due(self) -> int:
+        """Put the jobs that are due back into the pipeline. Returns how many were released."""
+        released = 0
+        for job_key in self.claim_due():
+            try:
+                container.redis_service.resume_job(job_key)
+                released += 1
+            except Exception as e:
+                # Claiming took it off the schedule, so it has to be failed or put back to not be lost
+                logger.error(f"Releasing scheduled job {job_key} failed: {e}")
+                self.fail_release(job_key, str(e))
+        return released
+
+    def fail_release(self, job_key: str, error: str) -> None:
+        """Count a failed release as a failed attempt, retried later or dead-lettered once out of attempts."""
+        try:
+            stage = self.redis_client.hget(job_key, "stage") or constants.JOB_STAGE_PLAN
+            container.redis_service.fail_job(job_key, stage, f"Releasing the job failed: {error}")
+        except Exception as e:
+            logger.error(f"Failing scheduled job {job_key} failed, scheduling it again: {e}")
+            self.schedule(job_key, time.time() + retry_delay(1))
+
+    def scheduled_count(self) -> int:
+        return self.redis_client.zcard(constants.REDIS_SCHEDULED_JOBS_KEY)
+
+    def add_dead_letter(self, job_key: str, failed_at: float) -> None:
+        self.redis_client.zadd(constants.REDIS_DEAD_LETTER_KEY, {job_key: failed_at})
+
+    def remove_dead_letter(self, job_key: str) -> bool:
+        return bool(self.redis_client.zrem(constants.REDIS_DEAD_LETTER_KEY, job_key))
+
+    def dead_letters(self, offset: int, limit: int) -> DeadLetterPage:
+        """A page of the dead-letter queue, most recent failure first."""
+        pipeline = self.redis_client.pipeline()
+        pipeline.zrevrange(constants.REDIS_DEAD_LETTER_KEY, offset, offset + limit - 1, withscores=True)
+        pipeline.zcard(constants.REDIS_DEAD_LETTER_KEY)
+        page, total = pipeline.execute()
+
+        pipeline = self.redis_client.pipeline()
+        for job_key, _ in page:
+            pipeline.hmget(job_key, ["stage", "attempts", "last_error"])
+        items = []
+        for (job_key, failed_at), (stage, attempts, last_error) in zip(page, pipeline.execute()):
+            transfer_doc = container.redis_service.load_transfer_doc(
+                job_key, queued=stage == constants.JOB_STAGE_WORKERS)
+            if transfer_doc is None and stage is None:
+                # The job record expired; nothing left to requeue
+                self.remove_dead_letter(job_key)
+                total -= 1
+                continue
+            items.append(DeadLetterJob(
+                job_id=job_key,
+                stage=stage,
+                attempts=int(attempts or 0),
+                last_error=last_error,
+                failed_at=datetime.fromtimestamp(failed_at, tz=timezone.utc),
+                url=transfer_doc and (transfer_doc.source_url or transfer_doc.url),
+                original_video_id=transfer_doc and transfer_doc.original_video_id
+            ))
+        return DeadLetterPage(items=items, total=total)
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional, Tuple
+
+from config import constants
+from config.config import config_properties as properties
+from models.redis_model import TransferDocument
+from utils import scene_detection, silence_detection
+
+logger = logging.getLogger(__name__)
+
+
+class MediaAnalyzer:
+    """Decodes cheap proxies of a job's source with ffmpeg to plan its segments before it is queued."""
+
+    async def plan(self, source: str, transfer_doc: TransferDocument) -> None:
+        """
+        Fill in the document's planned cuts: silent stretches are merged into skip_pairs first,
+        so the segment boundaries are then planned over the time that is kept.
+        Each step that fails is left out and logged; the job then runs without it.
+        """
+        if transfer_doc.skip_silence:
+            try:
+                silences = await asyncio.wait_for(self.silent_skip_pairs(source, transfer_doc),
+                                                  properties.ANALYSIS_TIMEOUT)
+                transfer_doc.skip_pairs = silence_detection.merge_skip_pairs(transfer_doc.skip_pairs, silences)
+            except Exception as e:
+                logger.warning(f"Silence detection on {source} failed, keeping the given skip_pairs: {e}")
+
+        if transfer_doc.edit_type == constants.EDIT_TYPE_SCENE:
+            try:
+                transfer_doc.segment_boundaries = await asyncio.wait_for(
+                    self.scene_boundaries(source, transfer_doc), properties.ANALYSIS_TIMEOUT)
+            except Exception as e:
+                logger.warning(f"Scene detection on {source} failed, cutting at fixed intervals: {e}")
+
+    async def silent_skip_pairs(self, source: str, transfer_doc: TransferDocument) -> List[Tuple[int, int]]:
+        """skip_pairs covering the silent stretches of the trim window, in whole seconds."""
+        np = scene_detection.require_numpy()
+        start, duration = self._window(transfer_doc)
+        sample_rate = properties.SILENCE_SAMPLE_RATE
+        window = max(int(sample_rate * properties.SILENCE_WINDOW), 1)
+        tracker = silence_detection.SilenceTracker(window / sample_rate, properties.SILENCE_THRESHOLD_DB,
+                                                   properties.SILENCE_MIN_DURATION, offset=start)
+        arguments = ("-vn", "-sn", "-dn", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "pipe:1")
+        # Whole windows per read, so no window straddles two chunks
+        chunk_size = window * 2 * max(properties.SILENCE_CHUNK_SECONDS * sample_rate // window, 1)
+        async for chunk in self._ffmpeg_stream(source, start, duration, arguments, chunk_size, window * 2):
+            tracker.feed(silence_detection.window_levels(np.frombuffer(chunk, dtype="<i2"), window))
+        if not tracker.windows:
+            raise RuntimeError(f"ffmpeg decoded no audio from {source}")
+        return silence_detection.to_skip_pairs(tracker.finish(), properties.SILENCE_PADDING,
+                                               properties.SILENCE_MIN_DURATION)
+
+    async def scene_boundaries(self, source: str, transfer_doc: TransferDocument) -> List[float]:
+        """
+        Segment boundaries, start and end included, with every fixed interval cut moved to the nearest
+        scene change within SCENE_SNAP_TOLERANCE seconds.
+        """
+        np = scene_detection.require_numpy()
+        start, duration = self._window(transfer_doc)
+        segment_time = transfer_doc.segment_time or constants.DEFAULT_VIDEO_SEGMENT_TIME
+        tolerance = min(properties.SCENE_SNAP_TOLERANCE, segment_time / 3)
+        fps = properties.SCENE_PROXY_FPS
+        width, height = properties.SCENE_PROXY_WIDTH, properties.SCENE_PROXY_HEIGHT
+        frame_size = width * height
+
+        # Frames are scored a batch at a time and only the ones over the threshold are kept,
+        # so memory stays flat however long the source is
+        times, scores = [], []
+        previous = None
+        decoded = 0
+        arguments = ("-an", "-sn", "-dn", "-vf", f"fps={fps},scale={width}:{height}",
+                     "-pix_fmt", "gray", "-f", "rawvideo", "pipe:1")
+        # The last boundary can move past end_time, so look a little beyond it
+        async for chunk in self._ffmpeg_stream(source, start, duration and duration + tolerance, arguments,
+                                               frame_size * properties.SCENE_BATCH_FRAMES, frame_size):
+            frames = np.frombuffer(chunk, dtype=np.uint8).reshape(-1, height, width)
+            batch_scores = scene_detection.frame_scores(frames, previous)
+            over = np.flatnonzero(batch_scores >= properties.SCENE_THRESHOLD)
+            times.append(start + (decoded + over) / fps)
+            scores.append(batch_scores[over])
+            previous = frames[-1]
+            decoded += len(frames)
+        if not decoded:
+            raise RuntimeError(f"ffmpeg decoded no video frames from {source}")
+
+        end = start + duration if duration else start + decoded / fps
+        boundaries = scene_detection.nominal_boundaries(start, end, segment_time, transfer_doc.skip_pairs or [])
+        changes = scene_detection.pick_changes(np.concatenate(times), np.concatenate(scores),
+                                               properties.SCENE_THRESHOLD, tolerance)
+        return scene_detection.snap_boundaries(boundaries, changes, tolerance)
+
+    @staticmethod
+    def _window(transfer_doc: TransferDocument) -> Tuple[int, Optional[int]]:
+        """Start and length in seconds of the part of the source the job uses; no length means to the end."""
+        start = transfer_doc.start_time or 0
+        if transfer_doc.end_time and transfer_doc.end_time > start:
+            return start, transfer_doc.end_time - start
+        return start, None
+
+    async def _ffmpeg_stream(self, source: str, start: float, duration: Optional[float], arguments: tuple,
+                             chunk_size: int, unit: int) -> AsyncIterator[bytes]:
+        """Run ffmpeg on start..start+duration of source and yield its output in chunks of whole units."""
+        process = await asyncio.create_subprocess_exec(
+            properties.FFMPEG_BINARY, "-v", "error", "-nostdin",
+            "-ss", str(start), *(("-t", str(duration)) if duration else ()), "-i", source, *arguments,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        try:
+            while True:
+                try:
+                    chunk = await process.stdout.readexactly(chunk_size)
+                except asyncio.IncompleteReadError as e:
+                    chunk = e.partial[:len(e.partial) - len(e.partial) % unit]
+                    if chunk:
+                        yield chunk
+                    break
+                yield chunk
+            stderr = await process.stderr.read()
+            if await process.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed on {source}: {stderr.decode(errors='replace').strip()[-500:]}")
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
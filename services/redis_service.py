@@ -1,26 +1,117 @@
+import asyncio
 import json
+import logging
+import os
+import time
 import uuid
+from datetime import timedelta
+from functools import cached_property
+from typing import Dict, Optional
+
+import httpx
+from fastapi import HTTPException
 
 from config import constants
+from config.config import config_properties as properties
 from database.database_models import OriginalVideo, TrimmedVideo
 from database.repository.original_video_repository import OriginalVideoRepository
 from database.repository.trimmed_video_repository import TrimmedVideoRepository
 from models.redis_model import TransferDocument, ProcessedDataReceiver
-from models.video_models import VideoProcessInfo, VideoUploadResponse, ProcessingStatus
+from models.video_models import VideoProcessInfo, VideoUploadResponse, ProcessingStatus, TERMINAL_STATUSES, \
+    JobPriority
+from monitoring import metrics, tracing
+from redis_queue import codec
 from redis_queue.redis_client import RedisManager
-from telegram_bot.messenger import TelegramMessenger
+from services.admission_controller import describe_wait
+from services.container import container
+from services.job_scheduler import retry_delay, to_timestamp
+from services.worker_registry import job_type
+from services.usage_rollup_service import source_type
+from storage.storage_manager import StorageManager
+from utils.validators import generate_full_path_from_location, location_from_full_path
+
+logger = logging.getLogger(__name__)
+
+# Responses to a fetch that are client errors but may still succeed later
+RETRYABLE_STATUS_CODES = (408, 425, 429)
+
+# Job hash fields naming the local files pinned until the job finishes
+PINNED_FIELDS = ("source_location", "subtitles_location")
 
 
 class RedisService:
     def __init__(self):
-        self.redis_client = RedisManager.get_client()
         self.original_video_repo = OriginalVideoRepository()
         self.trimmed_video_repo = TrimmedVideoRepository()
-        self.telegram_messenger = TelegramMessenger(None, None)
+        # Latest Telegram send of each job's segments, which the next one waits for
+        self._deliveries: Dict[str, asyncio.Task] = {}
+
+    @cached_property
+    def redis_client(self):
+        return RedisManager.get_client()
+
+    @cached_property
+    def binary_redis_client(self):
+        return RedisManager.get_binary_client()
+
+    @property
+    def telegram_messenger(self):
+        return container.telegram_messenger
+
+    @property
+    def fair_scheduler(self):
+        return container.fair_scheduler
+
+    @property
+    def admission_controller(self):
+        return container.admission_controller
+
+    @property
+    def url_fetcher(self):
+        return container.url_fetcher
+
+    @property
+    def media_analyzer(self):
+        return container.media_analyzer
+
+    @property
+    def storage_janitor(self):
+        return container.storage_janitor
+
+    @property
+    def usage_rollups(self):
+        return container.usage_rollups
+
+    @property
+    def subtitle_service(self):
+        return container.subtitle_service
+
+    @property
+    def hls_packager(self):
+        return container.hls_packager
+
+    @property
+    def job_scheduler(self):
+        return container.job_scheduler
+
+    @property
+    def worker_registry(self):
+        return container.worker_registry
 
     def upload_to_redis(self, video_process_info: VideoProcessInfo, telegram_chat_id : int):
         if video_process_info and video_process_info.url:
+            client = self.fair_scheduler.client_key(telegram_chat_id, video_process_info.client_id,
+                                                    video_process_info.client_address)
+            run_at = to_timestamp(video_process_info.run_at) if video_process_info.run_at else None
+            scheduled = run_at is not None and run_at > time.time()
+            if scheduled and run_at > time.time() + properties.JOB_SCHEDULE_MAX_AHEAD:
+                raise HTTPException(status_code=400, detail="run_at is too far ahead")
+            # Rate limits are per address (or chat), whatever X-Client-Id label the caller sends
+            estimated_wait = self.admission_controller.admit(
+                client, self.fair_scheduler.client_key(telegram_chat_id, None, video_process_info.client_address))
             job_id = str(uuid.uuid4())
+            job_key = self.job_key(job_id)
+            trace_id = tracing.get_trace_id() or tracing.start_trace().trace_id
             # Save to database
             original_video = OriginalVideo(
                 name=video_process_info.file_name,
@@ -34,37 +125,487 @@ class RedisService:
                 addon={}
             )
 
-            saved_data, video_id = self.original_video_repo.save(original_video)
-            transfer_doc = TransferDocument.from_video_process_info(video_process_info, video_id)
-            transfer_doc.original_video_id= video_id
-            transfer_doc.telegram_chat_id = telegram_chat_id
+            with tracing.span("db_insert", job_id=job_id):
+                saved_data, video_id = self.original_video_repo.save(original_video)
+            self.usage_rollups.record_original(original_video.category, original_video.location)
+            transfer_doc = TransferDocument.from_video_process_info(video_process_info, video_id,
+                                                                    telegram_chat_id=telegram_chat_id,
+                                                                    trace_id=trace_id)
+
+            with tracing.span("enqueue", job_id=job_id):
+                self.redis_client.hset(job_key, mapping={
+                    **codec.encode_payload(transfer_doc),
+                    "status": ProcessingStatus.SCHEDULED if scheduled else ProcessingStatus.PENDING,
+                    "enqueued_at": time.time(),
+                    "trace_id": trace_id,
+                    "client": client,
+                    "priority": video_process_info.priority.value,
+                    "segments_done": 0,
+                    "category": original_video.category,
+                    "source_type": source_type(video_process_info.url),
+                    **({"subtitles_url": subtitles_url} if (subtitles_url := video_process_info.subtitles_url) else {}),
+                    **({"hls": 1} if video_process_info.hls else {}),
+                    **({"segments_total": segments} if (segments := transfer_doc.expected_segments()) else {})
+                })
+
+                source_location = location_from_full_path(video_process_info.url)
+                if source_location:
+                    self.pin_source(job_key, source_location)
+                subtitles_location = location_from_full_path(subtitles_url) if subtitles_url else None
+                if subtitles_location:
+                    self.pin_file(job_key, "subtitles_location", subtitles_location)
+
+                needs_fetch = self.needs_fetch(video_process_info.url) or (
+                        subtitles_url and not subtitles_location and self.needs_fetch(subtitles_url))
+                if scheduled:
+                    # Even the download waits, so the source is as fresh as it can be when the job runs
+                    self.redis_client.hset(job_key, "stage",
+                                           constants.JOB_STAGE_FETCH if needs_fetch else constants.JOB_STAGE_PLAN)
+                    self.job_scheduler.schedule(job_key, run_at)
+                elif needs_fetch:
+                    # The fetch stage downloads the source once and queues the job when it is local
+                    self.redis_client.lpush(constants.REDIS_FETCH_QUEUE_NAME, job_key)
+                else:
+                    self.enqueue_prepared_job(job_key, transfer_doc, client, video_process_info.priority)
+            metrics.JOBS_ENQUEUED.inc()
+            if scheduled:
+                logger.info(f"Job {job_id} scheduled for {video_process_info.run_at.isoformat()}")
+                return VideoUploadResponse(file=video_process_info.url, file_id=job_id,
+                                           status=ProcessingStatus.SCHEDULED.value,
+                                           message=f"Scheduled for {video_process_info.run_at.isoformat()}",
+                                           job_id=job_key)
+            logger.info(f"Job {job_id} enqueued")
+            return VideoUploadResponse(file=video_process_info.url, file_id=job_id, status="pending",
+                                       message=f"Estimated wait: {describe_wait(estimated_wait)}",
+                                       job_id=job_key)
+
+    def enqueue_job(self, job_key: str, client: str, priority: JobPriority, job_type: Optional[str] = None) -> None:
+        """Queue a job for the workers, on the queue of its job type if a live worker serves that type."""
+        queue = self.worker_registry.queue_for(job_type)
+        if properties.FAIR_QUEUE_ENABLED:
+            fair_scheduler = container.fair_schedulers[queue]
+            fair_scheduler.enqueue(job_key, client, priority)
+            # Hand the job straight to the workers if there is room, instead of waiting for the dispatcher
+            fair_scheduler.dispatch(self.worker_registry.dispatch_window(queue))
+        else:
+            self.redis_client.lpush(queue, job_key)
+
+    def enqueue_prepared_job(self, job_key: str, transfer_doc: TransferDocument, client: str,
+                             priority: JobPriority) -> None:
+        """Queue a job whose source is available, through the analysis stage if its segments need planning."""
+        if self.needs_analysis(transfer_doc):
+            self.redis_client.lpush(constants.REDIS_ANALYSIS_QUEUE_NAME, job_key)
+        else:
+            self.hand_to_workers(job_key, transfer_doc, client, priority)
+
+    def hand_to_workers(self, job_key: str, transfer_doc: TransferDocument, client: str,
+                        priority: JobPriority) -> None:
+        """Queue a job whose plan is final for the workers, keeping a copy of its payload for retries."""
+        self.subtitle_service.plan(job_key, transfer_doc)
+        worker_job_type = job_type(transfer_doc)
+        self.redis_client.hset(job_key, mapping={**codec.encode_payload(transfer_doc, prefix=codec.QUEUED_PREFIX),
+                                                 "job_type": worker_job_type})
+        self.enqueue_job(job_key, client, priority, worker_job_type)
+
+    @staticmethod
+    def needs_analysis(transfer_doc: TransferDocument) -> bool:
+        return transfer_doc.edit_type == constants.EDIT_TYPE_SCENE or bool(transfer_doc.skip_silence)
+
+    @staticmethod
+    def needs_fetch(url: str) -> bool:
+        """Remote sources go through the fetch stage; files uploaded to this service are already local."""
+        return (properties.FETCH_STAGE_ENABLED and url.startswith(("http://", "https://"))
+                and not url.startswith(properties.COMPLETE_BASE_URL))
+
+    def load_transfer_doc(self, job_key: str, queued: bool = False) -> Optional[TransferDocument]:
+        """
+        The payload of a job still waiting in the pipeline, or with queued the copy handed to the workers;
+        None if the job hash has expired.
+        """
+        prefix = codec.QUEUED_PREFIX if queued else ""
+        payload, codec_name, schema_version = self.binary_redis_client.hmget(
+            job_key, [prefix + field for field in codec.PAYLOAD_FIELDS])
+        if not payload:
+            return None
+        return TransferDocument.model_validate(codec.decode_payload(payload, codec_name, schema_version))
+
+    async def fetch_and_enqueue(self, job_key: str) -> None:
+        """Download a queued job's source and subtitles into the download cache, point the job at them and queue it."""
+        transfer_doc = self.load_transfer_doc(job_key)
+        if not transfer_doc:
+            logger.warning(f"Job {job_key} expired before its source was fetched")
+            return
+        client, priority, subtitles_url = self.redis_client.hmget(job_key, ["client", "priority", "subtitles_url"])
+        tracing.start_trace(transfer_doc.trace_id)
 
+        from_cache = False
+        if self.needs_fetch(transfer_doc.url):
+            window = None
+            if transfer_doc.end_time and transfer_doc.end_time > (transfer_doc.start_time or 0):
+                window = (transfer_doc.start_time or 0, transfer_doc.end_time)
+            try:
+                with tracing.span("fetch", job_id=job_key):
+                    result = await self.url_fetcher.fetch(transfer_doc.url, window)
+            except Exception as e:
+                # Client errors won't go away on their own; everything else is worth another try
+                permanent = (isinstance(e, httpx.HTTPStatusError) and 400 <= e.response.status_code < 500
+                             and e.response.status_code not in RETRYABLE_STATUS_CODES)
+                self.fail_job(job_key, constants.JOB_STAGE_FETCH, f"Fetching {transfer_doc.url} failed: {e}",
+                              retry=not permanent)
+                return
 
-            # Convert TransferDocument to dictionary before JSON serialization
-            transfer_doc_dict = transfer_doc.to_dict() if hasattr(transfer_doc, 'to_dict') else vars(transfer_doc)
+            self.pin_source(job_key, result.path)
+            transfer_doc.source_url = transfer_doc.url
+            transfer_doc.url = generate_full_path_from_location(result.path)
+            # Copies that start part way into the source (HLS windows) shift the job onto their own timeline
+            source_offset = self.shift_times(transfer_doc, result.offset)
+            self.redis_client.hset(job_key, mapping={**codec.encode_payload(transfer_doc),
+                                                     "source_offset": source_offset})
+            from_cache = result.from_cache
 
-            self.redis_client.hset(job_id, mapping={
-                "data": json.dumps(transfer_doc_dict),
-                "status": ProcessingStatus.PENDING
-            })
+        if subtitles_url and self.needs_fetch(subtitles_url):
+            try:
+                subtitles_result = await self.url_fetcher.fetch(subtitles_url)
+                self.pin_file(job_key, "subtitles_location", subtitles_result.path)
+            except Exception as e:
+                logger.warning(f"Fetching subtitles {subtitles_url} for job {job_key} failed, "
+                               f"continuing without them: {e}")
 
-            self.redis_client.lpush(constants.REDIS_VIDEO_QUEUE_NAME, job_id)
-            return VideoUploadResponse(file=video_process_info.url, file_id=job_id, status="pending")
+        self.enqueue_prepared_job(job_key, transfer_doc, client or constants.ANONYMOUS_CLIENT,
+                                  JobPriority(priority) if priority else JobPriority.NORMAL)
+        logger.info(f"Job {job_key} fetched{' from cache' if from_cache else ''} and queued")
 
-    def get_processed_video_and_upload(self, job_id: str):
+    async def analyze_and_enqueue(self, job_key: str) -> None:
+        """Plan a queued job's skipped silences and segment boundaries from its source, then hand it to the workers."""
+        transfer_doc = self.load_transfer_doc(job_key)
+        if not transfer_doc:
+            logger.warning(f"Job {job_key} expired before it was analyzed")
+            return
+        client, priority = self.redis_client.hmget(job_key, ["client", "priority"])
+        tracing.start_trace(transfer_doc.trace_id)
+
+        source_location = location_from_full_path(transfer_doc.url)
+        source = source_location if source_location and os.path.isfile(source_location) else transfer_doc.url
+        with tracing.span("analyze", job_id=job_key):
+            # The plan only improves the cuts; whatever part of it fails, the job still runs
+            await self.media_analyzer.plan(source, transfer_doc)
+        segments_total = transfer_doc.expected_segments()
+        self.redis_client.hset(job_key, mapping={**codec.encode_payload(transfer_doc),
+                                                 **({"segments_total": segments_total} if segments_total else {})})
+        self.hand_to_workers(job_key, transfer_doc, client or constants.ANONYMOUS_CLIENT,
+                             JobPriority(priority) if priority else JobPriority.NORMAL)
+        logger.info(f"Job {job_key} analyzed and queued")
+
+    def pin_source(self, job_key: str, location: str) -> None:
+        """Keep the job's local source file from being evicted until the job finishes."""
+        self.pin_file(job_key, "source_location", location)
+
+    def pin_file(self, job_key: str, field: str, location: str) -> None:
+        """Pin a local file the job needs, remembering it in the given field of the job hash."""
+        self.storage_janitor.pin(location)
+        self.redis_client.hset(job_key, field, location)
+
+    @staticmethod
+    def shift_times(transfer_doc: TransferDocument, offset: float) -> float:
+        """Move the document's times offset seconds earlier. Returns the offset applied."""
+        if offset:
+            transfer_doc.start_time = max((transfer_doc.start_time or 0) - offset, 0)
+            transfer_doc.end_time = max((transfer_doc.end_time or 0) - offset, 0)
+            transfer_doc.skip_pairs = [(max(start - offset, 0), max(end - offset, 0))
+                                       for start, end in transfer_doc.skip_pairs or []]
+        return offset
+
+    @staticmethod
+    def job_key(job_id: str) -> str:
+        """Redis key of a job's hash. The key itself is what goes through the queues."""
+        return f"{constants.REDIS_JOB_KEY_PREFIX}:{job_id}"
+
+    def fail_job(self, job_key: str, stage: str, error: str, retry: bool = True) -> None:
+        """
+        Record a failed attempt at a job. It is retried from the stage that failed after an exponential backoff,
+        until JOB_MAX_ATTEMPTS attempts have failed (or right away without retry) and it goes to the dead-letter queue.
+        """
+        status = self.redis_client.hget(job_key, "status")
+        if status is None or status in TERMINAL_STATUSES:
+            logger.warning(f"Ignoring failure of job {job_key} with status {status}: {error}")
+            return
+        now = time.time()
+        attempts = self.redis_client.hincrby(job_key, "attempts", 1)
+        self.redis_client.hset(job_key, mapping={"stage": stage, "last_error": error[:1000], "failed_at": now})
+        self.flush_segments(job_key)
+        if retry and attempts < properties.JOB_MAX_ATTEMPTS:
+            delay = retry_delay(attempts)
+            self.job_scheduler.schedule(job_key, now + delay)
+            self.mark_job_status(job_key, ProcessingStatus.SCHEDULED)
+            metrics.JOBS_RETRIED.labels(stage=stage).inc()
+            logger.warning(f"Job {job_key} failed in the {stage} stage (attempt {attempts}), "
+                           f"retrying in {delay:.0f}s: {error}")
+        else:
+            self.job_scheduler.add_dead_letter(job_key, now)
+            # Kept in Redis, out of the archive, for as long as it can still be requeued
+            self.mark_job_status(job_key, ProcessingStatus.FAILED, archive_after=properties.DEAD_LETTER_RETENTION)
+            metrics.JOBS_DEAD_LETTERED.labels(stage=stage).inc()
+            logger.error(f"Job {job_key} failed in the {stage} stage after {attempts} attempts, "
+                         f"moved to the dead-letter queue: {error}")
+
+    def handle_worker_failure(self, job_key: str) -> None:
+        """A worker pushed the job to the failed queue, with its reason in the job's error field."""
+        error = self.redis_client.hget(job_key, "error") or "The worker reported a failure"
+        self.fail_job(job_key, constants.JOB_STAGE_WORKERS, error)
+
+    def resume_job(self, job_key: str) -> Optional[str]:
+        """
+        Put a scheduled, retried or requeued job back into the pipeline at its stage. Returns why it could not
+        be, for a job whose record expired or whose source is gone.
+        """
+        if not self.redis_client.exists(job_key):
+            logger.warning(f"Job {job_key} expired before it was due")
+            return "The job record has expired"
+        stage, client, priority = self.redis_client.hmget(job_key, ["stage", "client", "priority"])
+        client = client or constants.ANONYMOUS_CLIENT
+        priority = JobPriority(priority) if priority else JobPriority.NORMAL
+        self.mark_job_status(job_key, ProcessingStatus.PENDING)
+        if stage == constants.JOB_STAGE_FETCH:
+            self.redis_client.lpush(constants.REDIS_FETCH_QUEUE_NAME, job_key)
+            return None
+
+        transfer_doc = self.load_transfer_doc(job_key, queued=stage == constants.JOB_STAGE_WORKERS)
+        if not transfer_doc:
+            logger.error(f"Job {job_key} has no payload to resume from")
+            self.mark_job_status(job_key, ProcessingStatus.FAILED)
+            return "The job has no payload to resume from"
+        if not self.redis_client.hexists(job_key, "source_location"):
+            # Dead letters release their source; pin it again, or download it again if it has been evicted
+            source_location = location_from_full_path(transfer_doc.url)
+            if source_location and os.path.isfile(source_location):
+                self.pin_source(job_key, source_location)
+            elif transfer_doc.source_url:
+                self.restore_source_url(job_key, transfer_doc)
+                self.redis_client.lpush(constants.REDIS_FETCH_QUEUE_NAME, job_key)
+                return None
+            elif source_location and not StorageManager.get_backend().exists(source_location):
+                # An upload that has been evicted can't be fetched again; running it would only fail every attempt
+                error = f"Source {source_location} is no longer available"
+                self.fail_job(job_key, stage or constants.JOB_STAGE_PLAN, error, retry=False)
+                return error
+
+        if stage == constants.JOB_STAGE_WORKERS:
+            # Workers redo the whole job, so its segments are counted from zero again
+            self.redis_client.hset(job_key, mapping={**codec.encode_payload(transfer_doc), "segments_done": 0})
+            self.enqueue_job(job_key, client, priority, job_type(transfer_doc))
+        else:
+            self.enqueue_prepared_job(job_key, transfer_doc, client, priority)
+        return None
+
+    def restore_source_url(self, job_key: str, transfer_doc: TransferDocument) -> None:
+        """Point a job whose fetched copy is gone back at its remote source, on the source's own timeline."""
+        source_offset = float(self.redis_client.hget(job_key, "source_offset") or 0)
+        self.shift_times(transfer_doc, -source_offset)
+        transfer_doc.url = transfer_doc.source_url
+        transfer_doc.source_url = None
+        transfer_doc.segment_boundaries = None
+        self.redis_client.hset(job_key, mapping={**codec.encode_payload(transfer_doc), "source_offset": 0})
+
+    def requeue_dead_letter(self, job_key: str) -> bool:
+        """
+        Give a dead-lettered job a fresh set of attempts. False if it is not in the dead-letter queue; raises
+        if it can't run again, e.g. because its source is gone.
+        """
+        if not self.job_scheduler.remove_dead_letter(job_key) or not self.redis_client.exists(job_key):
+            return False
+        pipeline = self.redis_client.pipeline()
+        pipeline.zrem(constants.REDIS_JOB_ARCHIVE_QUEUE_NAME, job_key)
+        pipeline.persist(job_key)
+        pipeline.hset(job_key, "attempts", 0)
+        pipeline.execute()
+        error = self.resume_job(job_key)
+        if error:
+            raise HTTPException(status_code=409, detail=error)
+        logger.info(f"Job {job_key} requeued from the dead-letter queue")
+        return True
+
+    def discard_dead_letter(self, job_key: str) -> bool:
+        """Drop a job from the dead-letter queue and archive it now. False if it is not in the dead-letter queue."""
+        if not self.job_scheduler.remove_dead_letter(job_key):
+            return False
+        self.redis_client.zadd(constants.REDIS_JOB_ARCHIVE_QUEUE_NAME, {job_key: time.time()})
+        logger.info(f"Job {job_key} discarded from the dead-letter queue")
+        return True
+
+    def mark_job_status(self, job_key: str, status: ProcessingStatus, archive_after: float = 0) -> None:
+        """
+        Update a job's status. Terminal jobs get a TTL and are queued for archival,
+        archive_after seconds later than usual if given.
+        """
+        now = time.time()
+        if status in TERMINAL_STATUSES:
+            for field in PINNED_FIELDS:
+                location = self.redis_client.hget(job_key, field)
+                if location and self.redis_client.hdel(job_key, field):
+                    self.storage_janitor.unpin(location)
+        pipeline = self.redis_client.pipeline()
+        pipeline.hset(job_key, mapping={"status": status.value, "updated_at": now})
+        if status in TERMINAL_STATUSES:
+            pipeline.expire(job_key, int(properties.JOB_RECORD_TTL + archive_after))
+            pipeline.zadd(constants.REDIS_JOB_ARCHIVE_QUEUE_NAME, {job_key: now + archive_after})
+        if properties.TELEGRAM_PROGRESS_ENABLED and (status in TERMINAL_STATUSES
+                                                     or status == ProcessingStatus.SCHEDULED):
+            # Let the progress message show the outcome or the wait, wherever the status was set
+            pipeline.lpush(constants.REDIS_JOB_PROGRESS_QUEUE_NAME, job_key)
+        pipeline.execute()
+
+    async def get_processed_video_and_upload(self, job_id: str):
+        # job_id is the queue item, i.e. the job's Redis key
         # Get the processed video from Redis
-        video_data = self.redis_client.hget(job_id, "data")
-        if video_data:
-            video_data = json.loads(video_data)
+        payload, codec_name, schema_version = self.binary_redis_client.hmget(
+            job_id, [codec.DATA_FIELD, codec.CODEC_FIELD, codec.SCHEMA_FIELD])
+        if payload:
+            video_data = codec.decode_payload(payload, codec_name, schema_version)
             processed_data = ProcessedDataReceiver.model_validate(video_data)
+            job_fields = self.redis_client.hmget(job_id, ["trace_id", "enqueued_at", "started_at", "finished_at",
+                                                          "source_offset", "category", "source_type", "hls"])
+            trace_id, enqueued_at, started_at, finished_at, source_offset, category, source, hls = job_fields
+            source_offset = float(source_offset or 0)
+
+            # Restore the trace started by the producer
+            tracing.start_trace(processed_data.trace_id or trace_id)
+            self.record_worker_spans(job_id, enqueued_at, started_at, finished_at)
+
             db_entity : TrimmedVideo = TrimmedVideo(
                 original_video_id=processed_data.original_video_id,
+                start_time=timedelta(seconds=processed_data.start_time + source_offset),
+                end_time=timedelta(seconds=processed_data.end_time + source_offset),
                 file_name = processed_data.file_name,
                 location = processed_data.location
             )
-            self.trimmed_video_repo.save(db_entity)
+            # Workers sharing a filesystem with this node leave their output here rather than in the bucket.
+            # Uploads run off the event loop, so progress edits and notifications keep flowing meanwhile.
+            await asyncio.to_thread(StorageManager.get_backend().publish, processed_data.location)
+            if processed_data.location and os.path.isfile(processed_data.location):
+                self.storage_janitor.record(processed_data.location)
+            await asyncio.to_thread(self.subtitle_service.write_segment, job_id, processed_data.start_time,
+                                    processed_data.location)
+            with tracing.span("db_save", job_id=job_id):
+                self.trimmed_video_repo.save(db_entity)
+            self.usage_rollups.record_segment(category, source, processed_data.end_time - processed_data.start_time)
+            metrics.observe_job_completion(enqueued_at)
+            # Each completion is one segment; the job is done once all expected segments are in. Without a
+            # planned count it stays in progress until the worker reports the total with its last segment.
+            if processed_data.segments_total:
+                self.redis_client.hsetnx(job_id, "segments_total", processed_data.segments_total)
+            segments_done = self.redis_client.hincrby(job_id, "segments_done", 1)
+            segments_total = self.redis_client.hget(job_id, "segments_total")
+            finished = bool(segments_total) and segments_done >= int(segments_total)
+            if finished:
+                self.mark_job_status(job_id, ProcessingStatus.COMPLETED)
+            else:
+                self.mark_job_status(job_id, ProcessingStatus.PROCESSING)
+                if properties.TELEGRAM_PROGRESS_ENABLED:
+                    container.progress_reporter.report(job_id)
+            if hls and processed_data.location:
+                # Queued after the status, so the packager sees the job completed when it packages the last segment
+                self.hls_packager.queue_segment(job_id, processed_data.start_time, processed_data.end_time,
+                                                processed_data.location)
             if processed_data.telegram_chat_id:
-                self.telegram_messenger.send_message_with_chat_id(int(processed_data.telegram_chat_id), processed_data.location)
+                with tracing.span("notify", job_id=job_id):
+                    self.deliver_segment(job_id, int(processed_data.telegram_chat_id), processed_data.location,
+                                         processed_data.start_time, finished)
+            logger.info(f"Job {job_id}: segment at {processed_data.start_time}s done "
+                        f"({segments_done}/{segments_total or '?'})")
+            if finished:
+                logger.info(f"Job {job_id} completed")
             return video_data
         else:
             return None
+
+    def segments_key(self, job_key: str) -> str:
+        return f"{job_key}:{constants.REDIS_SEGMENTS_SUFFIX}"
+
+    def delivered_key(self, job_key: str) -> str:
+        return f"{job_key}:{constants.REDIS_DELIVERED_SUFFIX}"
+
+    def deliver_segment(self, job_key: str, chat_id: int, location: str, start_time: float, finished: bool) -> None:
+        """
+        Collect a job's segments and send them to Telegram a full album at a time, and the rest at the end.
+        Segments already delivered, or collected and waiting, are skipped when a retry produces them again.
+        """
+        start = str(float(start_time))
+        pipeline = self.redis_client.pipeline()
+        pipeline.sismember(self.delivered_key(job_key), start)
+        pipeline.lrange(self.segments_key(job_key), 0, -1)
+        delivered, collected = pipeline.execute()
+        if delivered or any(json.loads(item)["start"] == start for item in collected):
+            logger.info(f"Job {job_key}: segment at {start_time}s was already delivered")
+            count = len(collected)
+        else:
+            pipeline.rpush(self.segments_key(job_key), json.dumps({"start": start, "location": location}))
+            pipeline.expire(self.segments_key(job_key), properties.JOB_RECORD_TTL)
+            count = pipeline.execute()[0]
+        if finished or count >= properties.TELEGRAM_MEDIA_GROUP_SIZE:
+            self.send_collected_segments(job_key, chat_id, everything=finished)
+
+    def flush_segments(self, job_key: str) -> None:
+        """Send the segments a job collected short of a full album, so a failed attempt does not hold them back."""
+        if not self.redis_client.llen(self.segments_key(job_key)):
+            return
+        transfer_doc = self.load_transfer_doc(job_key, queued=True)
+        if transfer_doc and transfer_doc.telegram_chat_id:
+            self.send_collected_segments(job_key, int(transfer_doc.telegram_chat_id), everything=True)
+
+    def send_collected_segments(self, job_key: str, chat_id: int, everything: bool) -> None:
+        """
+        Send the job's collected segments, all of them or only full albums. On the event loop this runs as a
+        task chained after the job's previous send, so albums go out in order and none is sent twice.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            try:
+                asyncio.run(self._send_collected_segments(job_key, chat_id, everything))
+            except Exception as e:
+                logger.error(f"Job {job_key}: sending segments to chat ID {chat_id} failed, "
+                             f"they stay collected: {e}")
+            return
+        previous = self._deliveries.get(job_key)
+        if previous is not None and (previous.done() or previous.get_loop() is not loop):
+            previous = None
+        task = loop.create_task(self._send_collected_segments(job_key, chat_id, everything, previous))
+        self._deliveries[job_key] = task
+        task.add_done_callback(lambda done: self._delivery_done(job_key, chat_id, done))
+
+    async def _send_collected_segments(self, job_key: str, chat_id: int, everything: bool,
+                                       previous: Optional[asyncio.Task] = None) -> None:
+        if previous is not None:
+            # Its outcome is reported by its own callback
+            await asyncio.wait([previous])
+        group_size = properties.TELEGRAM_MEDIA_GROUP_SIZE
+        while True:
+            collected = self.redis_client.llen(self.segments_key(job_key))
+            count = min(collected if everything else collected - collected % group_size, group_size)
+            if not count:
+                return
+            album = [json.loads(item) for item in self.redis_client.lrange(self.segments_key(job_key), 0, count - 1)]
+            await self.telegram_messenger.send_segments(chat_id, [segment["location"] for segment in album])
+            # Only now that Telegram has them are they taken off the list and marked delivered
+            pipeline = self.redis_client.pipeline()
+            pipeline.ltrim(self.segments_key(job_key), count, -1)
+            pipeline.sadd(self.delivered_key(job_key), *(segment["start"] for segment in album))
+            pipeline.expire(self.delivered_key(job_key), properties.JOB_RECORD_TTL)
+            pipeline.execute()
+
+    def _delivery_done(self, job_key: str, chat_id: int, task: asyncio.Task) -> None:
+        if self._deliveries.get(job_key) is task:
+            del self._deliveries[job_key]
+        if not task.cancelled() and task.exception():
+            logger.error(f"Job {job_key}: sending segments to chat ID {chat_id} failed, "
+                         f"they stay collected: {task.exception()}")
+
+    @staticmethod
+    def record_worker_spans(job_id: str, enqueued_at, started_at, finished_at):
+        """Record queue wait and processing spans from the timestamps written by the worker, if any."""
+        if enqueued_at and started_at:
+            tracing.record_span("queue_wait", float(enqueued_at), float(started_at), job_id=job_id)
+        if started_at and finished_at:
+            tracing.record_span("processing", float(started_at), float(finished_at), job_id=job_id)
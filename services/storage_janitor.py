@@ -0,0 +1,254 @@
+import json
+import logging
+import os
+import shutil
+import socket
+import time
+from functools import cached_property
+from typing import Dict, Iterable, List, Optional
+
+from config import constants
+from config.config import config_properties as properties
+from monitoring import metrics
+from redis_queue.redis_client import RedisManager
+
+logger = logging.getLogger(__name__)
+
+INDEX_BATCH_SIZE = 1000  # files per round trip when indexing existing files
+
+# KEYS: access times zset, sizes hash, parts hash, total bytes. ARGV: location, size, now, parts json, evictable.
+# Only evictable files get an access time, which is what makes them candidates for eviction.
+RECORD_SCRIPT = """
+local previous = tonumber(redis.call('HGET', KEYS[2], ARGV[1]) or '0')
+redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+if ARGV[5] == '1' then
+    redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+else
+    redis.call('ZREM', KEYS[1], ARGV[1])
+end
+if ARGV[4] ~= '' then
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[4])
+else
+    redis.call('HDEL', KEYS[3], ARGV[1])
+end
+return redis.call('INCRBY', KEYS[4], tonumber(ARGV[2]) - previous)
+"""
+
+# KEYS: access times zset, sizes hash, parts hash, total bytes, pins hash.
+# ARGV: newest access time allowed, bytes wanted, candidates to scan.
+# Claims unpinned files least recently used first by removing them from the index; the caller deletes them.
+EVICT_SCRIPT = """
+local candidates = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[3]))
+local wanted = tonumber(ARGV[2])
+local freed = 0
+local claimed = {}
+for _, location in ipairs(candidates) do
+    if freed >= wanted then
+        break
+    end
+    if tonumber(redis.call('HGET', KEYS[5], location) or '0') <= 0 then
+        local size = tonumber(redis.call('HGET', KEYS[2], location) or '0')
+        table.insert(claimed, location)
+        table.insert(claimed, redis.call('HGET', KEYS[3], location) or '')
+        redis.call('ZREM', KEYS[1], location)
+        redis.call('HDEL', KEYS[2], location)
+        redis.call('HDEL', KEYS[3], location)
+        redis.call('DECRBY', KEYS[4], size)
+        freed = freed + size
+    end
+end
+return claimed
+"""
+
+# KEYS: pins hash, access times zset. ARGV: location, delta, now
+PIN_SCRIPT = """
+local pins = redis.call('HINCRBY', KEYS[1], ARGV[1], tonumber(ARGV[2]))
+if pins <= 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+end
+redis.call('ZADD', KEYS[2], 'XX', ARGV[3], ARGV[1])
+return pins
+"""
+
+
+def allocated_size(stat: os.stat_result) -> int:
+    """Bytes a file takes on disk, which for sparse files such as windowed downloads is far below their size."""
+    blocks = getattr(stat, "st_blocks", None)
+    return blocks * 512 if blocks is not None else stat.st_size
+
+
+def file_size(path: str) -> int:
+    return allocated_size(os.stat(path))
+
+
+class StorageJanitor:
+    """
+    Keeps UPLOAD_DIR and TRIMMED_DIR under a disk usage high watermark by deleting the least recently
+    used files that can be made again until usage drops to the low watermark: downloads, originals and
+    images. Outputs (trimmed segments, their subtitles, HLS previews) count towards usage but are kept.
+
+    Files are tracked in a per-node Redis index (size on disk, last access, companion files) as they are
+    written, so eviction never walks the directories. Jobs pin the local file they read until they reach
+    a terminal status, and pinned or recently used files are never evicted.
+    """
+
+    def __init__(self, node: str = ""):
+        self.node = node or properties.STORAGE_NODE_NAME or socket.gethostname()
+        prefix = f"{constants.REDIS_STORAGE_INDEX_PREFIX}:{self.node}"
+        self.access_key = f"{prefix}:access"
+        self.sizes_key = f"{prefix}:sizes"
+        self.parts_key = f"{prefix}:parts"
+        self.total_key = f"{prefix}:total"
+        self.indexed_key = f"{prefix}:indexed"  # set once the files written before the index existed are in it
+        # Locations are unique across nodes, so pins are shared and any node can release them
+        self.pins_key = f"{constants.REDIS_STORAGE_INDEX_PREFIX}:pins"
+        self.directories = [properties.UPLOAD_DIR, properties.TRIMMED_DIR]
+        # Where files made again on demand live; originals are the files directly in UPLOAD_DIR
+        self.evictable_directories = [
+            properties.FETCH_CACHE_DIR or os.path.join(properties.UPLOAD_DIR, "download_cache"),
+            properties.IMAGE_OUTPUT_DIR or os.path.join(properties.UPLOAD_DIR, "images"),
+            properties.UPLOAD_DIR
+        ]
+
+    @cached_property
+    def redis_client(self):
+        return RedisManager.get_client()
+
+    @cached_property
+    def _record_script(self):
+        return self.redis_client.register_script(RECORD_SCRIPT)
+
+    @cached_property
+    def _evict_script(self):
+        return self.redis_client.register_script(EVICT_SCRIPT)
+
+    @cached_property
+    def _pin_script(self):
+        return self.redis_client.register_script(PIN_SCRIPT)
+
+    def record(self, location: str, size: Optional[int] = None, parts: Iterable[str] = (),
+               evictable: bool = False) -> None:
+        """
+        Index a file written to local disk. parts are companion file names in the same directory. Only
+        evictable files, ones that are fetched or made again when missing, may be deleted to free space.
+        """
+        parts = list(parts)
+        if size is None:
+            size = file_size(location)
+            directory = os.path.dirname(location)
+            size += sum(file_size(os.path.join(directory, part)) for part in parts)
+        total = self._record_script(keys=[self.access_key, self.sizes_key, self.parts_key, self.total_key],
+                                    args=[location, size, time.time(), json.dumps(parts) if parts else "",
+                                          int(evictable)])
+        metrics.STORAGE_INDEXED_BYTES.set(total)
+
+    def touch(self, location: str) -> None:
+        self.redis_client.zadd(self.access_key, {location: time.time()}, xx=True)
+
+    def pin(self, location: str) -> None:
+        """Protect a file from eviction while a job needs it."""
+        self._pin_script(keys=[self.pins_key, self.access_key], args=[location, 1, time.time()])
+
+    def unpin(self, location: str) -> None:
+        self._pin_script(keys=[self.pins_key, self.access_key], args=[location, -1, time.time()])
+
+    def bytes_over(self) -> int:
+        """Bytes to delete to get from above the high watermark down to the low one, 0 below it."""
+        if properties.STORAGE_QUOTA_BYTES:
+            used, capacity = int(self.redis_client.get(self.total_key) or 0), properties.STORAGE_QUOTA_BYTES
+            return self._over(used, capacity)
+        over = 0
+        filesystems = set()
+        for directory in self.directories:
+            device = os.stat(directory).st_dev
+            if device not in filesystems:
+                filesystems.add(device)
+                usage = shutil.disk_usage(directory)
+                over = max(over, self._over(usage.used, usage.total))
+        return over
+
+    @staticmethod
+    def _over(used: int, capacity: int) -> int:
+        if used < capacity * properties.STORAGE_HIGH_WATERMARK:
+            return 0
+        return int(used - capacity * properties.STORAGE_LOW_WATERMARK)
+
+    def evict(self, wanted: int) -> int:
+        """Delete least recently used, unpinned files until wanted bytes are freed. Returns bytes freed."""
+        freed = 0
+        while freed < wanted:
+            claimed = self._evict_script(
+                keys=[self.access_key, self.sizes_key, self.parts_key, self.total_key, self.pins_key],
+                args=[time.time() - properties.STORAGE_EVICT_MIN_AGE, wanted - freed, properties.STORAGE_EVICT_BATCH]
+            )
+            if not claimed:
+                logger.warning(f"Storage over its watermark by {wanted - freed} bytes with nothing left to evict")
+                break
+            for location, parts in zip(claimed[::2], claimed[1::2]):
+                freed += self._delete(location, json.loads(parts) if parts else [])
+        metrics.STORAGE_INDEXED_BYTES.set(int(self.redis_client.get(self.total_key) or 0))
+        return freed
+
+    @staticmethod
+    def _delete(location: str, parts: List[str]) -> int:
+        directory = os.path.dirname(location)
+        freed = 0
+        for path in [location, *(os.path.join(directory, part) for part in parts)]:
+            try:
+                size = file_size(path)
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            freed += size
+            metrics.STORAGE_EVICTED_FILES.inc()
+        metrics.STORAGE_EVICTED_BYTES.inc(freed)
+        logger.info(f"Evicted {location} ({freed} bytes)")
+        return freed
+
+    def run_once(self) -> int:
+        wanted = self.bytes_over()
+        return self.evict(wanted) if wanted else 0
+
+    def evictable(self, path: str) -> bool:
+        directory = os.path.abspath(os.path.dirname(path))
+        return any(directory == os.path.abspath(evictable) for evictable in self.evictable_directories)
+
+    def index_existing(self) -> int:
+        """
+        Index files that were written before this node had an index. This is the one directory walk;
+        files are indexed by modification time so older ones are evicted first, and files recorded since
+        are left as they are. Returns files indexed.
+        """
+        if self.redis_client.exists(self.indexed_key):
+            return 0
+        # Companions are counted with the file they belong to
+        companions = {os.path.join(os.path.dirname(location), part)
+                      for location, parts in self.redis_client.hgetall(self.parts_key).items()
+                      for part in json.loads(parts)}
+        found: Dict[str, os.stat_result] = {}
+        for directory in self.directories:
+            for root, _, files in os.walk(directory):
+                for file_name in files:
+                    path = os.path.join(root, file_name)
+                    if path not in companions:
+                        found[path] = os.stat(path)
+        paths = list(found)
+        indexed = 0
+        for start in range(0, len(paths), INDEX_BATCH_SIZE):
+            batch = paths[start:start + INDEX_BATCH_SIZE]
+            pipeline = self.redis_client.pipeline()
+            for path in batch:
+                pipeline.hsetnx(self.sizes_key, path, allocated_size(found[path]))
+            added = [path for path, new in zip(batch, pipeline.execute()) if new]
+            if not added:
+                continue
+            pipeline = self.redis_client.pipeline()
+            access_times = {path: found[path].st_mtime for path in added if self.evictable(path)}
+            if access_times:
+                pipeline.zadd(self.access_key, access_times, nx=True)
+            pipeline.incrby(self.total_key, sum(allocated_size(found[path]) for path in added))
+            pipeline.execute()
+            indexed += len(added)
+        self.redis_client.set(self.indexed_key, time.time())
+        logger.info(f"Indexed {indexed} existing files on {self.node}")
+        return indexed
@@ -0,0 +1,106 @@
+import bisect
+import json
+import logging
+import os
+from functools import cached_property
+from typing import List, Optional
+
+from config import constants
+from config.config import config_properties as properties
+from models.redis_model import TransferDocument
+from redis_queue.redis_client import RedisManager
+from services.container import container
+from storage.storage_manager import StorageManager
+from utils import subtitles
+from utils.scene_detection import nominal_boundaries
+
+logger = logging.getLogger(__name__)
+
+STARTS_FIELD = "starts"
+# Workers report whole second segment times; scene planned boundaries fall between them
+SEGMENT_MATCH_TOLERANCE = 1.0  # seconds
+
+
+class SubtitleService:
+    """
+    Cuts a job's SRT sidecar to its segments. All planned segments are sliced in one sweep when the job is
+    handed to the workers, and each segment's SRT is written next to its output as the segment completes.
+    """
+
+    @cached_property
+    def redis_client(self):
+        return RedisManager.get_client()
+
+    @staticmethod
+    def subtitles_key(job_key: str) -> str:
+        return f"{job_key}:{constants.REDIS_SUBTITLES_SUFFIX}"
+
+    def plan(self, job_key: str, transfer_doc: TransferDocument) -> None:
+        """Slice the job's subtitles, if it has any, for its final plan. Failures are logged; the job runs without."""
+        location, source_offset = self.redis_client.hmget(job_key, ["subtitles_location", "source_offset"])
+        if not location:
+            return
+        try:
+            index = subtitles.load_cue_index(location)
+            # The sidecar is timed against the original source; the plan may be on a fetched window's timeline
+            offset = float(source_offset or 0)
+            boundaries = self.planned_boundaries(transfer_doc, index.end - offset)
+            if len(boundaries) < 2:
+                return
+            segments = index.split([boundary + offset for boundary in boundaries],
+                                   [(start + offset, end + offset) for start, end in transfer_doc.skip_pairs or []])
+        except Exception as e:
+            logger.warning(f"Slicing subtitles {location} for job {job_key} failed, continuing without them: {e}")
+            return
+
+        key = self.subtitles_key(job_key)
+        pipeline = self.redis_client.pipeline()
+        pipeline.delete(key)
+        pipeline.hset(key, mapping={
+            STARTS_FIELD: json.dumps(boundaries[:-1]),
+            **{str(number): subtitles.compose(cues) for number, cues in enumerate(segments) if cues}
+        })
+        pipeline.expire(key, properties.JOB_RECORD_TTL)
+        pipeline.execute()
+        logger.info(f"Job {job_key}: {len(index)} subtitle cues sliced into {len(segments)} segments")
+
+    @staticmethod
+    def planned_boundaries(transfer_doc: TransferDocument, subtitles_end: float) -> List[float]:
+        """The job's segment boundaries; without an end_time, planned up to the last cue."""
+        if transfer_doc.segment_boundaries:
+            return list(transfer_doc.segment_boundaries)
+        start = transfer_doc.start_time or 0
+        end = transfer_doc.end_time if transfer_doc.end_time and transfer_doc.end_time > start else subtitles_end
+        if end <= start:
+            return []
+        return nominal_boundaries(start, end, transfer_doc.segment_time or constants.DEFAULT_VIDEO_SEGMENT_TIME,
+                                  transfer_doc.skip_pairs or [])
+
+    def write_segment(self, job_key: str, start_time: float, location: Optional[str]) -> Optional[str]:
+        """Write the SRT of the completed segment starting at start_time next to its output. Returns its location."""
+        key = self.subtitles_key(job_key)
+        starts = self.redis_client.hget(key, STARTS_FIELD)
+        if not starts or not location:
+            return None
+        try:
+            starts = json.loads(starts)
+            number = bisect.bisect_right(starts, start_time + SEGMENT_MATCH_TOLERANCE) - 1
+            if number < 0 or abs(starts[number] - start_time) > SEGMENT_MATCH_TOLERANCE:
+                logger.warning(f"Job {job_key}: no planned segment starts at {start_time}s, its subtitles are skipped")
+                return None
+            text = self.redis_client.hget(key, str(number))
+            if not text:
+                return None
+            subtitles_location = f"{os.path.splitext(location)[0]}.srt"
+            os.makedirs(os.path.dirname(subtitles_location) or ".", exist_ok=True)
+            temp_path = f"{subtitles_location}.part"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(temp_path, subtitles_location)
+            StorageManager.get_backend().publish(subtitles_location)
+            if os.path.isfile(subtitles_location):
+                container.storage_janitor.record(subtitles_location)
+            return subtitles_location
+        except Exception as e:
+            logger.warning(f"Writing subtitles of job {job_key} next to {location} failed: {e}")
+            return None
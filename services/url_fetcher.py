@@ -0,0 +1,379 @@
+import asyncio
+import logging
+import math
+import mimetypes
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiofiles
+import httpx
+
+from config.config import config_properties as properties
+from monitoring import metrics
+from services.container import container
+from utils import mp4_index
+from utils.download_cache import CacheEntry, DownloadCache
+from utils.hls_playlist import parse_playlist, render_playlist
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+INDEX_PROBE_BYTES = 256 * 1024  # read up front; usually covers ftyp and a moov placed before mdat
+MAX_INDEX_BYTES = 64 * 1024 * 1024  # larger non-mdat boxes mean this is not worth windowing
+RANGE_MERGE_GAP = 512 * 1024  # fetch small gaps between wanted ranges rather than issuing another request
+WINDOW_MAX_FRACTION = 0.5  # windows covering more of the file than this download the whole file
+
+HLS_CONTENT_TYPES = ("application/vnd.apple.mpegurl", "application/x-mpegurl", "audio/mpegurl")
+MP4_CONTENT_TYPES = ("video/mp4", "video/quicktime", "audio/mp4")
+MP4_EXTENSIONS = (".mp4", ".m4v", ".mov")
+
+
+@dataclass
+class FetchResult:
+    entry: CacheEntry
+    path: str
+    from_cache: bool
+
+    @property
+    def offset(self) -> float:
+        """Seconds of the source timeline cut from the start of the local copy."""
+        return self.entry.offset
+
+
+def cache_directory() -> str:
+    return properties.FETCH_CACHE_DIR or os.path.join(properties.UPLOAD_DIR, "download_cache")
+
+
+def merge_ranges(ranges: List[Tuple[int, int]]) -> List[List[int]]:
+    """Sorted [start, end) ranges with the overlapping and adjacent ones joined."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class UrlFetcher:
+    """
+    Downloads job sources into the shared DownloadCache with a bounded pool of concurrent downloads,
+    a per-host concurrency limit, and parallel range requests for large files. Pages that are not
+    media (YouTube, Instagram, ...) are handed to yt-dlp.
+
+    Given a trim window, MP4 sources are read through their moov index and only the byte ranges for
+    the window are downloaded, and HLS sources only get the segments overlapping the window.
+    """
+
+    def __init__(self, cache: Optional[DownloadCache] = None):
+        self.cache = cache or DownloadCache(cache_directory())
+        self._pool = asyncio.Semaphore(properties.FETCH_MAX_CONCURRENCY)
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=httpx.Timeout(properties.FETCH_TIMEOUT, connect=10)
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @asynccontextmanager
+    async def _host_limit(self, url: str):
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(properties.FETCH_PER_HOST_CONCURRENCY)
+        async with self._host_limits[host]:
+            yield
+
+    async def fetch(self, url: str, window: Optional[Tuple[float, float]] = None) -> FetchResult:
+        """
+        Return a local copy of url, downloading it only if the cache has no valid copy. window is the
+        (start, end) seconds the job needs; sources that support it are only fetched around it.
+        """
+        window_name = f"{window[0]:g}-{window[1]:g}" if window and properties.FETCH_WINDOW_ENABLED else ""
+        key = self.cache.key(url, window_name)
+        # Jobs for the same source share one download
+        if key not in self._in_flight:
+            self._in_flight[key] = asyncio.ensure_future(self._fetch(url, window if window_name else None,
+                                                                     window_name))
+            self._in_flight[key].add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(self._in_flight[key])
+
+    async def _fetch(self, url: str, window: Optional[Tuple[float, float]], window_name: str) -> FetchResult:
+        # A full copy serves every window
+        cached = self.cache.get(url) or (window_name and self.cache.get(url, window_name)) or None
+        if cached and cached.immutable:
+            return self._hit(cached, "hit")
+
+        headers = {}
+        if cached and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        temp_path = self.cache.temp_path(url)
+        async with self._pool, self._host_limit(url):
+            try:
+                async with self.client.stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304 and cached:
+                        return self._hit(cached, "revalidated")
+                    response.raise_for_status()
+
+                    content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+                    extension = self._extension(url, content_type)
+                    size = int(response.headers.get("content-length") or 0)
+                    ranges_supported = response.headers.get("accept-ranges") == "bytes"
+                    validators = {
+                        "etag": response.headers.get("etag"),
+                        "last_modified": response.headers.get("last-modified"),
+                        "content_type": content_type or None,
+                    }
+                    kind = self._kind(content_type, extension)
+                    if kind == "hls":
+                        playlist = await response.aread()
+                        playlist_url = str(response.url)
+                    elif kind != "page":
+                        windowed = (window is not None and kind == "mp4" and ranges_supported
+                                    and size >= properties.FETCH_WINDOW_MIN_SIZE)
+                        ranged = ranges_supported and size >= properties.FETCH_RANGE_THRESHOLD
+                        # Anything not fetched in ranges is streamed from this first response
+                        if not windowed and not ranged:
+                            await self._stream_to_file(response, temp_path)
+
+                if kind == "page":
+                    return await self._fetch_with_extractor(url)
+                if kind == "hls":
+                    return await self._fetch_hls(url, playlist.decode(), playlist_url, window, window_name,
+                                                 validators)
+                if windowed:
+                    result = await self._fetch_mp4_window(url, size, window, window_name, extension, validators)
+                    if result:
+                        return result
+                    if not ranged:
+                        await self._download(url, temp_path)
+                if ranged:
+                    await self._download_ranges(url, temp_path, size, validators["etag"])
+            except Exception:
+                metrics.FETCH_REQUESTS.labels(result="error").inc()
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+        entry = self.cache.put(url, temp_path, extension, **validators)
+        return self._miss(url, entry, entry.size)
+
+    def _hit(self, entry: CacheEntry, result: str) -> FetchResult:
+        self.cache.touch(entry)
+        container.storage_janitor.touch(self.cache.path(entry))
+        metrics.FETCH_REQUESTS.labels(result=result).inc()
+        return FetchResult(entry, self.cache.path(entry), True)
+
+    def _miss(self, url: str, entry: CacheEntry, downloaded: int) -> FetchResult:
+        metrics.FETCH_REQUESTS.labels(result="miss").inc()
+        metrics.FETCH_BYTES.inc(downloaded)
+        window = f" window {entry.window}" if entry.window else ""
+        logger.info(f"Fetched {url}{window} ({downloaded} bytes)")
+        path = self.cache.path(entry)
+        container.storage_janitor.record(path, parts=self.cache.companions(entry), evictable=True)
+        return FetchResult(entry, path, False)
+
+    @staticmethod
+    def _kind(content_type: str, extension: str) -> str:
+        if content_type == "text/html":
+            return "page"
+        if content_type in HLS_CONTENT_TYPES or extension == ".m3u8":
+            return "hls"
+        if content_type in MP4_CONTENT_TYPES or extension in MP4_EXTENSIONS:
+            return "mp4"
+        return "file"
+
+    @staticmethod
+    def _extension(url: str, content_type: str = "") -> str:
+        extension = os.path.splitext(urlsplit(url).path)[1].lower()
+        if extension and len(extension) <= 5:
+            return extension
+        return mimetypes.guess_extension(content_type) or ""
+
+    @staticmethod
+    async def _stream_to_file(response: httpx.Response, path: str) -> None:
+        async with aiofiles.open(path, "wb") as f:
+            async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                await f.write(chunk)
+
+    async def _download(self, url: str, path: str) -> int:
+        async with self.client.stream("GET", url) as response:
+            response.raise_for_status()
+            await self._stream_to_file(response, path)
+        return os.path.getsize(path)
+
+    async def _read_range(self, url: str, start: int, end: int, etag: Optional[str]) -> bytes:
+        """Bytes start..end (exclusive) of url."""
+        response = await self.client.get(url, headers=self._range_headers(start, end, etag))
+        if response.status_code != 206:
+            raise RuntimeError(f"Range request for {url} returned {response.status_code}")
+        return response.content
+
+    async def _download_range(self, url: str, path: str, start: int, end: int, etag: Optional[str]) -> None:
+        """Write bytes start..end (exclusive) of url at the same offset of the preallocated file at path."""
+        async with self.client.stream("GET", url, headers=self._range_headers(start, end, etag)) as response:
+            if response.status_code != 206:
+                raise RuntimeError(f"Range request for {url} returned {response.status_code}")
+            async with aiofiles.open(path, "r+b") as f:
+                await f.seek(start)
+                async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+                    await f.write(chunk)
+
+    @staticmethod
+    def _range_headers(start: int, end: int, etag: Optional[str]) -> Dict[str, str]:
+        headers = {"Range": f"bytes={start}-{end - 1}"}
+        if etag:
+            # Fail instead of stitching together parts of two different versions
+            headers["If-Range"] = etag
+        return headers
+
+    async def _download_ranges(self, url: str, path: str, size: int, etag: Optional[str]) -> None:
+        """Download size bytes of url as FETCH_RANGE_PARTS concurrent range requests into one file."""
+        with open(path, "wb") as f:
+            f.truncate(size)
+        part_size = -(-size // properties.FETCH_RANGE_PARTS)
+        try:
+            await asyncio.gather(*(
+                self._download_range(url, path, start, min(start + part_size, size), etag)
+                for start in range(0, size, part_size)
+            ))
+        except Exception:
+            os.remove(path)
+            raise
+
+    async def _fetch_mp4_window(self, url: str, size: int, window: Tuple[float, float], window_name: str,
+                                extension: str, validators: dict) -> Optional[FetchResult]:
+        """
+        Fetch the boxes around mdat, read the sample index from moov and download only the samples for
+        window into a sparse file of the original size. Offsets and timestamps stay those of the source,
+        so the copy plays like the original for anything within the window. Returns None when the source
+        cannot or should not be windowed.
+        """
+        etag = validators["etag"]
+        probe = await self._read_range(url, 0, min(size, INDEX_PROBE_BYTES), etag)
+
+        async def read(offset: int, length: int) -> bytes:
+            if offset + length <= len(probe):
+                return probe[offset:offset + length]
+            return await self._read_range(url, offset, min(offset + length, size), etag)
+
+        # Walk the top level boxes, keeping everything except the media data itself
+        boxes, moov, offset = [], None, 0
+        while offset + 8 <= size:
+            header = await read(offset, 16)
+            box_type, header_length, box_size = mp4_index.read_box_header(header)
+            box_size = box_size or size - offset
+            if box_type == b"moof" or box_size < header_length:
+                return None
+            if box_type == b"mdat":
+                boxes.append((offset, header[:header_length]))
+            elif box_size > MAX_INDEX_BYTES:
+                return None
+            else:
+                box = await read(offset, box_size)
+                boxes.append((offset, box))
+                if box_type == b"moov":
+                    moov = box[header_length:]
+            offset += box_size
+        if moov is None:
+            return None
+
+        try:
+            tracks = mp4_index.parse_moov(moov)
+        except (mp4_index.Mp4IndexError, IndexError, ValueError) as e:
+            logger.info(f"Not windowing {url}: {e}")
+            return None
+        start, end = window
+        ranges, keyframe_time = mp4_index.plan_window(tracks, start, end + properties.FETCH_WINDOW_PADDING,
+                                                      RANGE_MERGE_GAP)
+        wanted = sum(range_end - range_start for range_start, range_end in ranges)
+        if not ranges or wanted > size * WINDOW_MAX_FRACTION:
+            return None
+
+        path = self.cache.temp_path(url, window_name)
+        with open(path, "wb") as f:
+            f.truncate(size)
+            for box_offset, box in boxes:
+                f.seek(box_offset)
+                f.write(box)
+        parts = asyncio.Semaphore(properties.FETCH_RANGE_PARTS)
+
+        async def download(range_start: int, range_end: int):
+            async with parts:
+                await self._download_range(url, path, range_start, range_end, etag)
+
+        try:
+            await asyncio.gather(*(download(range_start, range_end) for range_start, range_end in ranges))
+        except Exception:
+            os.remove(path)
+            raise
+        logger.info(f"Windowed {url} to {start}-{end}s from the keyframe at {keyframe_time:.2f}s")
+        # Only these hold data; the media mount refuses to serve the holes between them
+        held = merge_ranges([*ranges, *((box_offset, box_offset + len(box)) for box_offset, box in boxes)])
+        entry = self.cache.put(url, path, extension, window=window_name, ranges=held, **validators)
+        return self._miss(url, entry, wanted + sum(len(box) for _, box in boxes))
+
+    async def _fetch_hls(self, url: str, text: str, playlist_url: str, window: Optional[Tuple[float, float]],
+                         window_name: str, validators: dict) -> FetchResult:
+        """
+        Download the segments of an HLS stream that overlap window (all of them without one) and write a
+        local playlist for them. The copy starts at the first segment, recorded as the entry's offset.
+        """
+        playlist = parse_playlist(text, playlist_url)
+        if playlist.is_master:
+            response = await self.client.get(playlist.best_variant())
+            response.raise_for_status()
+            playlist = parse_playlist(response.text, str(response.url))
+        start, end = window or (0, math.inf)
+        segments = playlist.window(start, end + properties.FETCH_WINDOW_PADDING)
+        if not segments:
+            raise RuntimeError(f"No segments of {url} overlap {start}-{end}s")
+
+        key = self.cache.key(url, window_name)
+        file_names = [f"{key}-{index}{self._extension(segment.uri) or '.ts'}"
+                      for index, segment in enumerate(segments)]
+        parts = asyncio.Semaphore(properties.FETCH_RANGE_PARTS)
+
+        async def download(segment, file_name):
+            async with parts:
+                return await self._download(segment.uri, os.path.join(self.cache.directory, file_name))
+
+        downloaded = sum(await asyncio.gather(*(download(segment, file_name)
+                                                for segment, file_name in zip(segments, file_names))))
+        path = self.cache.temp_path(url, window_name)
+        with open(path, "w") as f:
+            f.write(render_playlist(playlist.header, segments, file_names))
+        entry = self.cache.put(url, path, ".m3u8", window=window_name, offset=segments[0].start,
+                               parts=file_names, **validators)
+        return self._miss(url, entry, downloaded)
+
+    async def _fetch_with_extractor(self, url: str) -> FetchResult:
+        path = await asyncio.to_thread(self._extract, url, self.cache.temp_path(url))
+        entry = self.cache.put(url, path, os.path.splitext(path)[1], immutable=True)
+        return self._miss(url, entry, entry.size)
+
+    @staticmethod
+    def _extract(url: str, temp_base: str) -> str:
+        import yt_dlp
+
+        options = {"outtmpl": f"{temp_base}.%(ext)s", "format": "best[ext=mp4]/best", "quiet": True,
+                   "noprogress": True, "noplaylist": True}
+        with yt_dlp.YoutubeDL(options) as downloader:
+            info = downloader.extract_info(url, download=True)
+            return downloader.prepare_filename(info)
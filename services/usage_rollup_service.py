@@ -0,0 +1,115 @@
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+
+from config import constants
+from database.database_dto import UsageStatsDTO, UsageCountsDTO, UsageBucketDTO
+from database.database_models import OriginalVideo, TrimmedVideo
+from database.repository.usage_rollup_repository import UsageRollupRepository, COUNTER_COLUMNS
+from utils.validators import location_from_full_path
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def source_type(url: Optional[str]) -> str:
+    return constants.SOURCE_TYPE_UPLOAD if not url or location_from_full_path(url) else constants.SOURCE_TYPE_URL
+
+
+def _day(moment: Optional[datetime]) -> date:
+    if moment is None:
+        return datetime.now(timezone.utc).date()
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.date()
+
+
+class UsageRollupService:
+    """
+    Per day, category and source type counters of originals, segments and output seconds, updated as videos
+    come in so the dashboards never aggregate original_video or trimmed_videos.
+    """
+
+    def __init__(self):
+        self.repository = UsageRollupRepository()
+
+    def record_original(self, category: Optional[str], url: Optional[str]) -> None:
+        self._increment(category, source_type(url), originals=1)
+
+    def record_segment(self, category: Optional[str], source: Optional[str], output_seconds: int) -> None:
+        self._increment(category, source or constants.SOURCE_TYPE_UPLOAD, segments=1,
+                        output_seconds=max(int(output_seconds), 0))
+
+    def _increment(self, category: Optional[str], source: str, **counters) -> None:
+        # A missed update only skews the dashboards (and backfill repairs it), so it never fails the job
+        try:
+            self.repository.increment(_day(None), category or constants.UNCATEGORIZED, source, **counters)
+        except Exception as e:
+            logger.error(f"Error updating usage rollup: {e}")
+
+    def stats(self, date_from: Optional[date] = None, date_to: Optional[date] = None,
+              category: Optional[str] = None, source: Optional[str] = None) -> UsageStatsDTO:
+        """Totals and per day, category and source type breakdowns, read from the rollups alone."""
+        totals = UsageCountsDTO()
+        breakdowns = {"day": {}, "category": {}, "source_type": {}}
+        for rollup in self.repository.get_range(date_from, date_to, category, source):
+            for name, buckets in breakdowns.items():
+                key = str(getattr(rollup, name))
+                bucket = buckets.get(key) or buckets.setdefault(key, UsageBucketDTO(key=key))
+                for column in COUNTER_COLUMNS:
+                    setattr(bucket, column, getattr(bucket, column) + getattr(rollup, column))
+            for column in COUNTER_COLUMNS:
+                setattr(totals, column, getattr(totals, column) + getattr(rollup, column))
+        return UsageStatsDTO(
+            date_from=date_from,
+            date_to=date_to,
+            totals=totals,
+            by_day=list(breakdowns["day"].values()),
+            by_category=sorted(breakdowns["category"].values(), key=lambda bucket: -bucket.originals),
+            by_source_type=sorted(breakdowns["source_type"].values(), key=lambda bucket: -bucket.originals)
+        )
+
+    def backfill(self) -> int:
+        """
+        Recompute every rollup from original_video and trimmed_videos in one streaming pass over each,
+        overwriting the stored counters. Returns the number of buckets written.
+        """
+        buckets: Dict[Tuple[date, str, str], Dict[str, int]] = defaultdict(
+            lambda: dict.fromkeys(COUNTER_COLUMNS, 0))
+        with self.repository.get_session() as db:
+            originals = select(OriginalVideo.created_date, OriginalVideo.category, OriginalVideo.location)
+            for created_date, category, location in db.execute(
+                    originals.execution_options(yield_per=BACKFILL_BATCH_SIZE)):
+                buckets[(_day(created_date), category or constants.UNCATEGORIZED, source_type(location))][
+                    "originals"] += 1
+
+            segments = select(TrimmedVideo.created_time, TrimmedVideo.start_time, TrimmedVideo.end_time,
+                              OriginalVideo.category, OriginalVideo.location) \
+                .join(OriginalVideo, TrimmedVideo.original_video_id == OriginalVideo.id)
+            for created_time, start_time, end_time, category, location in db.execute(
+                    segments.execution_options(yield_per=BACKFILL_BATCH_SIZE)):
+                counters = buckets[(_day(created_time), category or constants.UNCATEGORIZED, source_type(location))]
+                counters["segments"] += 1
+                counters["output_seconds"] += max(int((end_time - start_time).total_seconds()), 0)
+
+        # Buckets whose rows are all gone are reset rather than left with stale counts
+        for rollup in self.repository.get_range():
+            buckets[(rollup.day, rollup.category, rollup.source_type)]
+        written = self.repository.replace(
+            {"day": day, "category": category, "source_type": source, **counters}
+            for (day, category, source), counters in buckets.items())
+        logger.info(f"Backfilled {written} usage rollup buckets")
+        return written
+
+
+if __name__ == "__main__":
+    # python -m services.usage_rollup_service rebuilds the rollups of existing data
+    import database.database_config as database_config
+
+    logging.basicConfig(level=logging.INFO)
+    database_config.Base.metadata.create_all(bind=database_config.engine)
+    UsageRollupService().backfill()
@@ -1,20 +1,22 @@
 import logging
 import os
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-import redis
+import aiofiles
 from fastapi import HTTPException, UploadFile
-from telegram import Update
-from telegram.ext import CallbackContext
 
 import utils.validators as validators
 import utils.video_utils as video_utils
+from config import constants
 from config.config import config_properties
-from database.database_dto import OriginalVideoDTO, TrimmedVideoDTO
+from database.database_dto import OriginalVideoDTO, TrimmedVideoDTO, OriginalVideoSearchDTO, FacetCountDTO
 from database.repository.original_video_repository import OriginalVideoRepository
 from database.repository.trimmed_video_repository import TrimmedVideoRepository
 from models.video_models import VideoProcessInfo, VideoUploadResponse
-from services.redis_service import RedisService
+from services.admission_controller import AdmissionRejectedError
+from services.container import container
+from storage.storage_manager import StorageManager
 
 logger = logging.getLogger(__name__)
 
@@ -22,45 +24,101 @@ class VideoService:
     def __init__(self):
         self.original_video_repo = OriginalVideoRepository()
         self.trimmed_video_repo = TrimmedVideoRepository()
-        self.redis_service = RedisService()
+        self.redis_service = container.redis_service
 
-    async def upload_and_send_to_redis(self, file : UploadFile, video_process_info : VideoProcessInfo, telegram_chat_id : int) -> VideoUploadResponse:
+    async def upload_and_send_to_redis(self, file : UploadFile, video_process_info : VideoProcessInfo, telegram_chat_id : int,
+                                       subtitles: Optional[UploadFile] = None) -> VideoUploadResponse:
         # Validate file
         validators.validate_video_file(file.filename)
+        if subtitles is not None:
+            validators.validate_subtitle_file(subtitles.filename)
+
+        # Refuse before writing the file if the queue is already over its limits
+        if config_properties.ADMISSION_ENABLED:
+            container.admission_controller.check_capacity()
 
         # Generate unique filename and ID
         unique_filename, file_id = validators.generate_unique_filename(file.filename)
 
-        # Save video file
+        # Save video file, after its subtitles so an oversized sidecar is refused before the video is written
         file_path = os.path.join(config_properties.UPLOAD_DIR, unique_filename)
+        subtitles_path = await self.save_subtitles(subtitles, file_path) if subtitles is not None else None
         await video_utils.save_file_in_chunks(file, file_path)
+        if os.path.isfile(file_path):
+            container.storage_janitor.record(file_path, evictable=True)
 
         video_process_info.url= validators.generate_full_path_from_location(file_path)
+        if subtitles_path:
+            video_process_info.subtitles_url = validators.generate_full_path_from_location(subtitles_path)
 
-        self.redis_service.upload_to_redis(video_process_info)
+        try:
+            queued = self.redis_service.upload_to_redis(video_process_info, telegram_chat_id)
+        except AdmissionRejectedError:
+            StorageManager.get_backend().delete(file_path)
+            if subtitles_path and os.path.isfile(subtitles_path):
+                os.remove(subtitles_path)
+            raise
 
         return VideoUploadResponse(
             file=unique_filename,
             file_id=file_id,
             status="Uploaded Successfully",
-            message="Video processing started"
+            message=f"Video processing started. {queued.message}",
+            job_id=queued.job_id
         )
 
+    @staticmethod
+    async def save_subtitles(subtitles: UploadFile, video_path: str) -> str:
+        """Save an SRT sidecar next to its video. Always on local disk: it is read back when the job is queued."""
+        content = await subtitles.read(config_properties.SUBTITLE_MAX_BYTES + 1)
+        if len(content) > config_properties.SUBTITLE_MAX_BYTES:
+            raise HTTPException(status_code=413,
+                                detail=f"Subtitles are limited to {config_properties.SUBTITLE_MAX_BYTES} bytes")
+        subtitles_path = os.path.join(config_properties.UPLOAD_DIR,
+                                      f"{os.path.splitext(os.path.basename(video_path))[0]}{constants.SUBTITLE_EXTENSION}")
+        async with aiofiles.open(subtitles_path, "wb") as f:
+            await f.write(content)
+        container.storage_janitor.record(subtitles_path, evictable=True)
+        return subtitles_path
+
     async def get_all_original_videos(self) -> List[OriginalVideoDTO]:
         """Retrieve all records from the OriginalVideo table."""
         try:
-            original_videos = await self.original_video_repo.get_all()
+            original_videos = self.original_video_repo.get_all()
             return [OriginalVideoDTO(**{**video.__dict__, "location": config_properties.COMPLETE_BASE_URL+"/"+video.location}) for video in original_videos]
         except Exception as e:
             logger.error(f"Error retrieving original videos: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Failed to retrieve original videos: {str(e)}")
 
+    async def search_original_videos(self, query: Optional[str], category: Optional[str], created_user: Optional[str],
+                                     created_from: Optional[datetime], created_to: Optional[datetime],
+                                     cursor: Optional[int], limit: int) -> OriginalVideoSearchDTO:
+        """Search the OriginalVideo table, one keyset page at a time."""
+        filters = dict(query=query, category=category, created_user=created_user,
+                       created_from=created_from, created_to=created_to)
+        try:
+            original_videos, next_cursor = self.original_video_repo.search(**filters, after_id=cursor, limit=limit)
+            facets = None
+            if cursor is None:
+                # Facets describe the whole result set, so later pages don't recount them
+                facets = {name: [FacetCountDTO(value=value, count=count) for value, count in values]
+                          for name, values in self.original_video_repo.facets(
+                              **filters, limit=config_properties.SEARCH_FACET_LIMIT).items()}
+            return OriginalVideoSearchDTO(
+                items=[OriginalVideoDTO(**{**video.__dict__, "location": config_properties.COMPLETE_BASE_URL+"/"+video.location}) for video in original_videos],
+                next_cursor=next_cursor,
+                facets=facets
+            )
+        except Exception as e:
+            logger.error(f"Error searching original videos: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Failed to search original videos: {str(e)}")
+
     async def get_trimmed_videos_by_original_file_id(self, file_id: str) -> List[TrimmedVideoDTO]:
         """Retrieve all trimmed videos for a given original file ID."""
         try:
-            original_video_db_data = await self.original_video_repo.get_by_columns({"video_id": file_id})
+            original_video_db_data = self.original_video_repo.get_by_columns({"video_id": file_id})
             original_video_db_data = original_video_db_data[0]
-            trimmed_videos = await self.trimmed_video_repo.get_by_columns({"original_video_id": original_video_db_data.id})
+            trimmed_videos = self.trimmed_video_repo.get_by_columns({"original_video_id": original_video_db_data.id})
 
             return [TrimmedVideoDTO(**{**video.__dict__, "location":validators.generate_full_path_from_location(video.location) }) for video in trimmed_videos]
         except Exception as e:
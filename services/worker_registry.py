@@ -0,0 +1,221 @@
+import logging
+import math
+import os
+import socket
+import time
+from datetime import datetime, timezone
+from functools import cached_property
+from typing import Iterable, List, Optional
+
+from config import constants
+from config.config import config_properties as properties
+from models.job_models import WorkerFleet, WorkerQueueState, WorkerState
+from models.redis_model import TransferDocument
+from models.video_models import VideoScreenType
+from redis_queue.redis_client import RedisManager
+from services.container import container
+from services.fair_scheduler import FairScheduler
+
+logger = logging.getLogger(__name__)
+
+# Worker hashes outlive their heartbeat so the reaper can still read which jobs a dead worker held
+WORKER_RECORD_TTL_FACTOR = 10
+
+
+def worker_queue(job_type: Optional[str]) -> str:
+    """The worker queue of a job type; jobs without one, or no worker for it, use the shared queue."""
+    return f"{constants.REDIS_VIDEO_QUEUE_NAME}:{job_type}" if job_type else constants.REDIS_VIDEO_QUEUE_NAME
+
+
+def worker_queues(job_types: Iterable[str]) -> List[str]:
+    """
+    The queues a worker serving job_types pops, in order. Only workers that take every job type
+    also pop the shared queue, where jobs go while no live worker serves their type.
+    """
+    job_types = [job_type for job_type in constants.JOB_TYPES if job_type in set(job_types)]
+    queues = [worker_queue(job_type) for job_type in job_types]
+    if len(job_types) == len(constants.JOB_TYPES):
+        queues.append(constants.REDIS_VIDEO_QUEUE_NAME)
+    return queues
+
+
+def job_type(transfer_doc: TransferDocument) -> str:
+    """
+    Stream copy keeps the source's frames and cuts at keyframes, so jobs that change the picture
+    or need cuts at exact times are re-encoded.
+    """
+    if (transfer_doc.screen_type == VideoScreenType.PORTRAIT or transfer_doc.edit_type
+            or transfer_doc.skip_pairs or transfer_doc.segment_boundaries):
+        return constants.JOB_TYPE_REENCODE
+    return constants.JOB_TYPE_COPY
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromtimestamp(float(value), tz=timezone.utc) if value else None
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [item for item in (value or "").split(",") if item]
+
+
+class WorkerRegistry:
+    """
+    Live view of the worker fleet. Every worker publishes a heartbeat at least every WORKER_HEARTBEAT_TTL / 3
+    seconds: its capacity and the job types it serves in workers:<id>, and its id scored by the time in
+    REDIS_WORKERS_KEY. Jobs are routed to the queue of their type when a live worker serves it, and the
+    dispatcher keeps every queue filled to the free slots of the workers popping it.
+    """
+
+    def __init__(self):
+        self._snapshot: List[WorkerState] = []
+        self._snapshot_at = 0.0
+
+    @cached_property
+    def redis_client(self):
+        return RedisManager.get_client()
+
+    @staticmethod
+    def worker_key(worker_id: str) -> str:
+        return f"{constants.REDIS_WORKERS_KEY}:{worker_id}"
+
+    def heartbeat(self, worker_id: str, slots: int, free_slots: int, job_types: Iterable[str],
+                  jobs: Iterable[str] = (), cpu_count: Optional[int] = None, started_at: Optional[float] = None) -> None:
+        """Publish a worker's state. For workers written in Python; others write the same hash and sorted set."""
+        now = time.time()
+        key = self.worker_key(worker_id)
+        pipeline = self.redis_client.pipeline()
+        pipeline.hset(key, mapping={
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "cpu_count": cpu_count or os.cpu_count() or 1,
+            "slots": slots,
+            "free_slots": free_slots,
+            "job_types": ",".join(job_types),
+            "jobs": ",".join(jobs),
+            "last_seen": now
+        })
+        pipeline.hsetnx(key, "started_at", started_at or now)
+        pipeline.expire(key, math.ceil(properties.WORKER_HEARTBEAT_TTL * WORKER_RECORD_TTL_FACTOR))
+        pipeline.zadd(constants.REDIS_WORKERS_KEY, {worker_id: now})
+        pipeline.execute()
+
+    def deregister(self, worker_id: str) -> None:
+        """Take a worker that is shutting down cleanly out of the registry."""
+        pipeline = self.redis_client.pipeline()
+        pipeline.zrem(constants.REDIS_WORKERS_KEY, worker_id)
+        pipeline.delete(self.worker_key(worker_id))
+        pipeline.execute()
+
+    def live_workers(self) -> List[WorkerState]:
+        cutoff = time.time() - properties.WORKER_HEARTBEAT_TTL
+        worker_ids = self.redis_client.zrangebyscore(constants.REDIS_WORKERS_KEY, cutoff, "+inf")
+        pipeline = self.redis_client.pipeline()
+        for worker_id in worker_ids:
+            pipeline.hgetall(self.worker_key(worker_id))
+        workers = []
+        for worker_id, fields in zip(worker_ids, pipeline.execute()):
+            if not fields:
+                continue
+            job_types = _split(fields.get("job_types"))
+            workers.append(WorkerState(
+                worker_id=worker_id,
+                host=fields.get("host"),
+                pid=int(fields["pid"]) if fields.get("pid") else None,
+                cpu_count=int(fields["cpu_count"]) if fields.get("cpu_count") else None,
+                slots=int(fields.get("slots") or 0),
+                free_slots=int(fields.get("free_slots") or 0),
+                job_types=job_types,
+                queues=worker_queues(job_types),
+                jobs=_split(fields.get("jobs")),
+                started_at=_timestamp(fields.get("started_at")),
+                last_seen=_timestamp(fields.get("last_seen"))
+            ))
+        return workers
+
+    def snapshot(self) -> List[WorkerState]:
+        """live_workers, reused for WORKER_REGISTRY_CACHE seconds so routing costs no Redis reads per job."""
+        now = time.monotonic()
+        if now - self._snapshot_at >= properties.WORKER_REGISTRY_CACHE:
+            self._snapshot = self.live_workers()
+            self._snapshot_at = now
+        return self._snapshot
+
+    def queue_for(self, job_type: Optional[str]) -> str:
+        if job_type and any(job_type in worker.job_types for worker in self.snapshot()):
+            return worker_queue(job_type)
+        return constants.REDIS_VIDEO_QUEUE_NAME
+
+    def dispatch_window(self, queue: str) -> int:
+        """
+        Jobs to keep in a worker queue: the free slots of the workers popping it, plus WORKER_PREFETCH each so
+        none waits for the dispatcher. The shared queue keeps FAIR_DISPATCH_WINDOW for workers that send no heartbeats.
+        """
+        serving = [worker for worker in self.snapshot() if queue in worker.queues]
+        if not serving:
+            return properties.FAIR_DISPATCH_WINDOW if queue == constants.REDIS_VIDEO_QUEUE_NAME else 0
+        return sum(max(worker.free_slots, 0) + properties.WORKER_PREFETCH for worker in serving)
+
+    def fleet(self) -> WorkerFleet:
+        """Live workers and the state of every worker queue."""
+        workers = self.live_workers()
+        queues = [(None, constants.REDIS_VIDEO_QUEUE_NAME)] + [(job_type, worker_queue(job_type))
+                                                              for job_type in constants.JOB_TYPES]
+        pipeline = self.redis_client.pipeline()
+        for _, queue in queues:
+            pipeline.llen(queue)
+        lengths = pipeline.execute()
+        schedulers = container.fair_schedulers if properties.FAIR_QUEUE_ENABLED else {}
+        states = []
+        for (queue_job_type, queue), waiting in zip(queues, lengths):
+            serving = [worker for worker in workers if queue in worker.queues]
+            states.append(WorkerQueueState(
+                queue=queue,
+                job_type=queue_job_type,
+                waiting=waiting,
+                backlog=schedulers[queue].backlog_size() if queue in schedulers else 0,
+                workers=len(serving),
+                free_slots=sum(worker.free_slots for worker in serving)
+            ))
+        return WorkerFleet(workers=workers, queues=states)
+
+    def reap_dead_workers(self) -> int:
+        """
+        Take workers whose heartbeats stopped out of the registry and fail the jobs they held, so those are retried.
+        Returns the number of workers reaped.
+        """
+        cutoff = time.time() - properties.WORKER_HEARTBEAT_TTL
+        reaped = 0
+        for worker_id in self.redis_client.zrangebyscore(constants.REDIS_WORKERS_KEY, "-inf", cutoff):
+            # Whoever removes the id reaps the worker, so concurrent reapers never fail its jobs twice
+            if not self.redis_client.zrem(constants.REDIS_WORKERS_KEY, worker_id):
+                continue
+            key = self.worker_key(worker_id)
+            jobs = _split(self.redis_client.hget(key, "jobs"))
+            self.redis_client.delete(key)
+            reaped += 1
+            logger.warning(f"Worker {worker_id} stopped sending heartbeats, failing its {len(jobs)} jobs")
+            for job_key in jobs:
+                container.redis_service.fail_job(job_key, constants.JOB_STAGE_WORKERS,
+                                                 f"Worker {worker_id} stopped sending heartbeats")
+        self.rehome_orphaned_jobs()
+        return reaped
+
+    def rehome_orphaned_jobs(self) -> int:
+        """
+        Move jobs waiting for a job type no live worker serves anymore to the shared queue, from the worker
+        queue and from the fair scheduling backlog in front of it. Returns the number of jobs moved.
+        """
+        served = {job_type for worker in self.live_workers() for job_type in worker.job_types}
+        moved = 0
+        for orphaned_type in set(constants.JOB_TYPES) - served:
+            queue = worker_queue(orphaned_type)
+            while self.redis_client.rpoplpush(queue, constants.REDIS_VIDEO_QUEUE_NAME):
+                moved += 1
+            # The typed sub-queues drain into the shared queue like its own, within its window
+            fair_scheduler = container.fair_schedulers[queue]
+            if properties.FAIR_QUEUE_ENABLED and fair_scheduler.backlog_size():
+                moved += FairScheduler(fair_scheduler.prefix, constants.REDIS_VIDEO_QUEUE_NAME).dispatch(
+                    self.dispatch_window(constants.REDIS_VIDEO_QUEUE_NAME))
+        if moved:
+            logger.info(f"Moved {moved} jobs without a live worker for their type to the shared queue")
+        return moved
@@ -0,0 +1,36 @@
+import os
+import shutil
+from typing import AsyncIterator
+
+import aiofiles
+
+from storage.storage_backend import StorageBackend
+from utils.validators import generate_full_path_from_location
+
+
+class LocalStorage(StorageBackend):
+    """Files on the local filesystem, served by the API's static media mount."""
+    name = "local"
+
+    async def write_stream(self, location: str, chunks: AsyncIterator[bytes]) -> int:
+        size = 0
+        async with aiofiles.open(location, 'wb') as f:
+            async for chunk in chunks:
+                await f.write(chunk)
+                size += len(chunk)
+        return size
+
+    def upload_file(self, local_path: str, location: str) -> None:
+        if os.path.abspath(local_path) != os.path.abspath(location):
+            os.makedirs(os.path.dirname(location) or ".", exist_ok=True)
+            shutil.copyfile(local_path, location)
+
+    def url(self, location: str) -> str:
+        return generate_full_path_from_location(location)
+
+    def exists(self, location: str) -> bool:
+        return os.path.isfile(location)
+
+    def delete(self, location: str) -> None:
+        if os.path.isfile(location):
+            os.remove(location)
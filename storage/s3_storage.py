@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, List
+
+from config.config import config_properties as properties
+from storage.storage_backend import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+
+class S3Storage(StorageBackend):
+    """
+    Files in an S3-compatible bucket (AWS S3, MinIO, ...), keyed by location. Large files are sent as
+    multipart uploads with S3_MULTIPART_CONCURRENCY parts in flight, and downloads go through
+    presigned URLs so workers on other machines need no shared filesystem.
+    """
+    name = "s3"
+
+    def __init__(self):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+        except ImportError:
+            raise RuntimeError("The s3 storage backend needs boto3 (pip install boto3)")
+
+        self.bucket = properties.S3_BUCKET
+        self.part_size = properties.S3_MULTIPART_PART_SIZE
+        concurrency = properties.S3_MULTIPART_CONCURRENCY
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=properties.S3_ENDPOINT_URL or None,
+            region_name=properties.S3_REGION,
+            aws_access_key_id=properties.S3_ACCESS_KEY_ID or None,
+            aws_secret_access_key=properties.S3_SECRET_ACCESS_KEY or None,
+            config=Config(signature_version="s3v4", max_pool_connections=max(10, concurrency * 2))
+        )
+        self.transfer_config = TransferConfig(multipart_threshold=self.part_size, multipart_chunksize=self.part_size,
+                                              max_concurrency=concurrency)
+        self._executor = ThreadPoolExecutor(concurrency, thread_name_prefix="s3-upload")
+        self._concurrency = concurrency
+
+    async def write_stream(self, location: str, chunks: AsyncIterator[bytes]) -> int:
+        """Upload the chunks as parts of a multipart upload, or with a single PUT if they fit in one part."""
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self._concurrency)
+        buffer, size = bytearray(), 0
+        upload_id, pending = None, []
+
+        async def upload_part(number: int, body: bytes) -> dict:
+            try:
+                response = await loop.run_in_executor(self._executor, partial(
+                    self.client.upload_part, Bucket=self.bucket, Key=location, UploadId=upload_id,
+                    PartNumber=number, Body=body))
+                return {"ETag": response["ETag"], "PartNumber": number}
+            finally:
+                slots.release()
+
+        async def start_part(body: bytes) -> None:
+            nonlocal upload_id
+            if upload_id is None:
+                response = await loop.run_in_executor(self._executor, partial(
+                    self.client.create_multipart_upload, Bucket=self.bucket, Key=location))
+                upload_id = response["UploadId"]
+            # Waiting for a free slot bounds memory to S3_MULTIPART_CONCURRENCY parts
+            await slots.acquire()
+            pending.append(asyncio.ensure_future(upload_part(len(pending) + 1, body)))
+
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                size += len(chunk)
+                if len(buffer) >= self.part_size:
+                    await start_part(bytes(buffer))
+                    buffer = bytearray()
+
+            if upload_id is None:
+                await loop.run_in_executor(self._executor, partial(
+                    self.client.put_object, Bucket=self.bucket, Key=location, Body=bytes(buffer)))
+                return size
+            if buffer:
+                await start_part(bytes(buffer))
+            parts: List[dict] = await asyncio.gather(*pending)
+            await loop.run_in_executor(self._executor, partial(
+                self.client.complete_multipart_upload, Bucket=self.bucket, Key=location, UploadId=upload_id,
+                MultipartUpload={"Parts": parts}))
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            if upload_id is not None:
+                await asyncio.gather(*pending, return_exceptions=True)
+                await loop.run_in_executor(self._executor, partial(
+                    self.client.abort_multipart_upload, Bucket=self.bucket, Key=location, UploadId=upload_id))
+            raise
+        return size
+
+    def upload_file(self, local_path: str, location: str) -> None:
+        self.client.upload_file(local_path, self.bucket, location, Config=self.transfer_config)
+
+    def url(self, location: str) -> str:
+        return self.client.generate_presigned_url("get_object", Params={"Bucket": self.bucket, "Key": location},
+                                                  ExpiresIn=properties.S3_PRESIGNED_URL_EXPIRY)
+
+    def exists(self, location: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=location)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        return True
+
+    def delete(self, location: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=location)
+
+    def publish(self, location: str) -> None:
+        # Workers that still write to a shared directory get their output moved into the bucket
+        if os.path.isfile(location) and not self.exists(location):
+            self.upload_file(location, location)
+            os.remove(location)
+            logger.info(f"Published {location} to bucket {self.bucket}")
@@ -0,0 +1,33 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator
+
+
+class StorageBackend(ABC):
+    """
+    Where uploaded sources and trimmed outputs live. Files are addressed by their location, the same
+    relative path stored in the database (e.g. media/uploaded_videos/clip.mp4).
+    """
+    name: str
+
+    @abstractmethod
+    async def write_stream(self, location: str, chunks: AsyncIterator[bytes]) -> int:
+        """Store the chunks as the file at location. Returns the number of bytes written."""
+
+    @abstractmethod
+    def upload_file(self, local_path: str, location: str) -> None:
+        """Store a file from the local filesystem at location."""
+
+    @abstractmethod
+    def url(self, location: str) -> str:
+        """A URL the file can be downloaded from."""
+
+    @abstractmethod
+    def exists(self, location: str) -> bool:
+        pass
+
+    @abstractmethod
+    def delete(self, location: str) -> None:
+        pass
+
+    def publish(self, location: str) -> None:
+        """Make a file a worker left on the local filesystem available through this backend."""
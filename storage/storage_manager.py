@@ -0,0 +1,27 @@
+from typing import Optional
+
+from config.config import config_properties as properties
+from storage.storage_backend import StorageBackend
+
+
+class StorageManager:
+    __backend: Optional[StorageBackend] = None
+
+    def __init__(self) -> None:
+        raise RuntimeError("Use get_backend() instead")
+
+    @classmethod
+    def get_backend(cls) -> StorageBackend:
+        if cls.__backend is None:
+            cls.__backend = cls.__create(properties.STORAGE_BACKEND)
+        return cls.__backend
+
+    @classmethod
+    def __create(cls, name: str) -> StorageBackend:
+        if name == "local":
+            from storage.local_storage import LocalStorage
+            return LocalStorage()
+        if name == "s3":
+            from storage.s3_storage import S3Storage
+            return S3Storage()
+        raise ValueError(f"Unknown STORAGE_BACKEND {name!r}, expected local or s3")
@@ -0,0 +1,53 @@
+import hashlib
+import logging
+from functools import cached_property
+from typing import Dict, Iterable
+
+from config import constants
+from database.repository.telegram_file_repository import TelegramFileRepository
+from redis_queue.redis_client import RedisManager
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class TelegramFileIdCache:
+    """
+    Maps the content hash of an uploaded output to the file_id Telegram assigned it, so identical
+    outputs are re-sent by reference instead of uploaded again. The telegram_files table is the
+    persistent copy; a Redis hash in front of it answers repeat lookups without a query.
+    """
+
+    def __init__(self):
+        self.telegram_file_repo = TelegramFileRepository()
+
+    @cached_property
+    def redis_client(self):
+        return RedisManager.get_client()
+
+    @staticmethod
+    def content_hash(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(HASH_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def get_many(self, content_hashes: Iterable[str]) -> Dict[str, str]:
+        content_hashes = list(dict.fromkeys(content_hashes))
+        if not content_hashes:
+            return {}
+        cached = self.redis_client.hmget(constants.REDIS_TELEGRAM_FILE_ID_KEY, content_hashes)
+        found = {content_hash: file_id for content_hash, file_id in zip(content_hashes, cached) if file_id}
+        missing = [content_hash for content_hash in content_hashes if content_hash not in found]
+        if missing:
+            stored = self.telegram_file_repo.get_file_ids(missing)
+            if stored:
+                self.redis_client.hset(constants.REDIS_TELEGRAM_FILE_ID_KEY, mapping=stored)
+            found.update(stored)
+        return found
+
+    def put(self, content_hash: str, file_id: str, file_unique_id: str = None, size: int = None) -> None:
+        self.telegram_file_repo.save_file(content_hash, file_id, file_unique_id, size)
+        self.redis_client.hset(constants.REDIS_TELEGRAM_FILE_ID_KEY, content_hash, file_id)
@@ -5,9 +5,13 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CallbackContext
 
 import telegram_bot.handlers.video.questions as questions
+from config.config import config_properties as properties
 from controllers.controller_factory import ControllerFactory
 from models.file_type_model import FileData
 from models.video_models import VideoProcessInfo, VideoScreenType
+from monitoring import tracing
+from services.admission_controller import AdmissionRejectedError, describe_wait
+from services.container import container
 from telegram_bot.handlers.video.questions import QuestionType, QuestionConfig
 from telegram_bot.messenger import TelegramMessenger
 
@@ -257,6 +261,7 @@ async def handle_text_input(update: Update, context: CallbackContext):
         await send_video_update(answers, update, context)
 
 async def send_video_update(answers: Dict[QuestionType, Any], update: Update, context: CallbackContext):
+    tracing.start_trace()
     # Create VideoProcessInfo or call your upload handler
     video_process = VideoProcessInfo()
     video_process.screen_type = VideoScreenType(answers.get(QuestionType.ORIENTATION).lower())
@@ -267,15 +272,24 @@ async def send_video_update(answers: Dict[QuestionType, Any], update: Update, co
     # Get the video file information
     file_data = FileData.generate(context.user_data.get('video_info'))
     readable_answers = "\n".join([f"{key.name}: {value}" for key, value in answers.items()])
-    await TelegramMessenger(update, context).send_text_message(
-        f"Processing Started !\nAnswers:\n{readable_answers}"
-    )
+    messenger = TelegramMessenger(update, context)
     # Trigger the upload process
-    await ControllerFactory().get_upload_controller(file_data).upload(
-        video_process,
-        file_data,
-        update.effective_chat.id
-    )
+    try:
+        response = await ControllerFactory().get_upload_controller(file_data).upload(
+            video_process,
+            file_data,
+            update.effective_chat.id
+        )
+    except AdmissionRejectedError as e:
+        await messenger.send_text_message(
+            f"We're busy right now and can't take this video. Please try again in {describe_wait(e.retry_after)}."
+        )
+        return
+    header = f"Processing Started !\nAnswers:\n{readable_answers}\n{response.message or ''}"
+    message = await messenger.send_text_message(header)
+    if message and response.job_id and properties.TELEGRAM_PROGRESS_ENABLED:
+        # This message is edited in place as the job progresses
+        container.progress_reporter.attach(response.job_id, message, header)
 
 class MessageHandlerInterface(ABC):
     @abstractmethod
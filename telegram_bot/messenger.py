@@ -1,37 +1,141 @@
 import asyncio
+import logging
+import os
+from contextlib import ExitStack
+from functools import cached_property
+from typing import Awaitable, Callable, Dict, List, Optional, Set
 
-from telegram import Update
+from telegram import InputMediaVideo, Message, Update
+from telegram.error import RetryAfter
 from telegram.ext import CallbackContext
 
+from config.config import config_properties as properties
+from monitoring.metrics import observe_telegram_send
+from services.container import container
 from telegram_bot.telegram_client import TelegramManager
+from utils.validators import generate_full_path_from_location
+
+logger = logging.getLogger(__name__)
+
+FLOOD_WAIT_ATTEMPTS = 3  # sends made before giving up on a chat that keeps being flood limited
+
+# Sends running as tasks on the event loop
+_pending_sends: Set[asyncio.Task] = set()
 
 
 class TelegramMessenger:
-    async def send_text_message(self, message: str):
+    async def send_text_message(self, message: str) -> Optional[Message]:
         if not self.update or not self.context:
-            return
+            return None
         try:
             # self.update.message.reply_text(message)
-            await self.update.callback_query.message.reply_text(
+            return await observe_telegram_send("reply_text", self.update.callback_query.message.reply_text(
                     text=message
-                )
+                ))
         except Exception as e:
             chat_id = self.update.effective_chat.id
-            await self.context.bot.send_message(chat_id=chat_id, text=message)
+            return await observe_telegram_send("send_message",
+                                               self.context.bot.send_message(chat_id=chat_id, text=message))
 
     def __init__(self, update: Update, context: CallbackContext):
         self.update = update
         self.context = context
-        self.telegram_client = TelegramManager.get_client()
+
+    @cached_property
+    def telegram_client(self):
+        return TelegramManager.get_client()
 
     def send_message_with_chat_id(self, chat_id: int, message: str):
+        self._run(lambda: observe_telegram_send(
+            "send_message", self.telegram_client.bot.send_message(chat_id=chat_id, text=message)), chat_id)
+
+    @staticmethod
+    def _run(make_send: Callable[[], Awaitable], chat_id: int):
+        """Run the send made by make_send(), as a task if the event loop is running; it is only made here."""
         try:
-            loop = asyncio.get_running_loop()
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
             if loop and loop.is_running():
-                # If we're already in an async context, create a task
-                loop.create_task(self.telegram_client.bot.send_message(chat_id=chat_id, text=message))
+                # Referenced until done, so it isn't collected mid-send and its failure is logged
+                task = loop.create_task(make_send())
+                _pending_sends.add(task)
+                task.add_done_callback(lambda done: TelegramMessenger._send_done(done, chat_id))
             else:
                 # If no loop is running, create one
-                asyncio.run(self.telegram_client.bot.send_message(chat_id=chat_id, text=message))
+                asyncio.run(make_send())
         except Exception as e:
-            print(f"Error sending message to chat ID {chat_id}: {e}")
\ No newline at end of file
+            logger.error(f"Error sending message to chat ID {chat_id}: {e}")
+
+    @staticmethod
+    def _send_done(task: asyncio.Task, chat_id: int):
+        _pending_sends.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Error sending message to chat ID {chat_id}: {task.exception()}")
+
+    async def send_segments(self, chat_id: int, locations: List[str]) -> None:
+        """
+        Deliver one album of trimmed segments, uploading small local files and linking the rest. If Telegram
+        refuses the upload they are all sent as links instead; raises if they could not be delivered at all.
+        """
+        bot = self.telegram_client.bot
+        file_cache = container.telegram_file_cache
+        # Outputs Telegram already has are re-sent by file_id instead of uploaded again
+        hashes = await asyncio.to_thread(self._content_hashes, locations)
+        file_ids = await asyncio.to_thread(file_cache.get_many, hashes.values())
+        sendable = [location for location in locations
+                    if hashes.get(location) in file_ids or self._uploadable(location)]
+        links = [location for location in locations if location not in sendable]
+        try:
+            messages = await self._flood_wait(lambda: self._send_videos(chat_id, sendable, hashes, file_ids))
+        except RetryAfter:
+            raise
+        except Exception as e:
+            logger.warning(f"Uploading {len(sendable)} segments to chat ID {chat_id} failed, "
+                           f"sending links instead: {e}")
+            sendable, messages, links = [], [], locations
+        uploaded = [(hashes[location], message.video) for location, message in zip(sendable, messages)
+                    if hashes[location] not in file_ids and message.video]
+        for content_hash, video in uploaded:
+            await asyncio.to_thread(file_cache.put, content_hash, video.file_id, video.file_unique_id,
+                                    video.file_size)
+        if links:
+            text = "\n".join(generate_full_path_from_location(location) for location in links)
+            await self._flood_wait(lambda: observe_telegram_send("send_message",
+                                                                 bot.send_message(chat_id=chat_id, text=text)))
+
+    async def _send_videos(self, chat_id: int, locations: List[str], hashes: Dict[str, str],
+                           file_ids: Dict[str, str]) -> List[Message]:
+        bot = self.telegram_client.bot
+        with ExitStack() as files:
+            videos = [file_ids.get(hashes.get(location)) or files.enter_context(open(location, "rb"))
+                      for location in locations]
+            if len(videos) == 1:
+                # Media groups need at least two items
+                return [await observe_telegram_send("send_video", bot.send_video(chat_id=chat_id, video=videos[0]))]
+            if videos:
+                return await observe_telegram_send("send_media_group", bot.send_media_group(
+                    chat_id=chat_id, media=[InputMediaVideo(video) for video in videos]))
+            return []
+
+    @staticmethod
+    async def _flood_wait(send: Callable[[], Awaitable]):
+        """Await a send made by send(), making it again after the wait Telegram asks for when flood limited."""
+        for attempt in range(FLOOD_WAIT_ATTEMPTS):
+            try:
+                return await send()
+            except RetryAfter as e:
+                if attempt == FLOOD_WAIT_ATTEMPTS - 1:
+                    raise
+                await asyncio.sleep(float(e.retry_after))
+
+    @staticmethod
+    def _content_hashes(locations: List[str]) -> Dict[str, str]:
+        return {location: container.telegram_file_cache.content_hash(location)
+                for location in locations if os.path.isfile(location)}
+
+    @staticmethod
+    def _uploadable(location: str) -> bool:
+        """Small enough to upload from local disk; anything else is sent as a link."""
+        return os.path.isfile(location) and os.path.getsize(location) <= properties.TELEGRAM_UPLOAD_MAX_BYTES
\ No newline at end of file
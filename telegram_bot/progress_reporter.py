@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from functools import cached_property
+from typing import Dict, Optional
+
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter
+
+from config import constants
+from config.config import config_properties as properties
+from models.video_models import TERMINAL_STATUSES, ProcessingStatus
+from monitoring.metrics import observe_telegram_send
+from redis_queue.redis_client import RedisManager
+from services.admission_controller import describe_wait
+from telegram_bot.telegram_client import TelegramManager
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_FIELDS = ["progress_chat_id", "progress_message_id", "progress_header", "segments_done",
+                   "segments_total", "started_at", "enqueued_at", "status", "run_at", "attempts"]
+
+
+class ProgressReporter:
+    """
+    Keeps one Telegram message per job up to date with its progress, editing it in place.
+
+    Progress events only mark a job as changed; a flush loop renders the latest state from the job hash,
+    so any number of events between two flushes costs a single edit. Edits to a chat are at least
+    TELEGRAM_PROGRESS_MIN_INTERVAL apart and all chats together stay under TELEGRAM_PROGRESS_MAX_EDITS
+    per flush, so a fast job or a busy bot never runs into Telegram's edit limits.
+    """
+
+    def __init__(self):
+        self._changed: Dict[str, float] = {}  # job key -> when it first changed since its last edit
+        self._next_edit: Dict[int, float] = {}  # chat id -> earliest time of its next edit
+        self._last_text: Dict[str, str] = {}
+
+    @cached_property
+    def redis_client(self):
+        return RedisManager.get_client()
+
+    @cached_property
+    def telegram_client(self):
+        return TelegramManager.get_client()
+
+    def attach(self, job_key: str, message: Message, header: str) -> None:
+        """Use message, already sent to the user, as the job's progress message."""
+        self.redis_client.hset(job_key, mapping={
+            "progress_chat_id": message.chat_id,
+            "progress_message_id": message.message_id,
+            "progress_header": header
+        })
+
+    def report(self, job_key: str) -> None:
+        """Note that a job's progress changed."""
+        self._changed.setdefault(job_key, time.time())
+
+    def collect(self) -> int:
+        """Pick up progress events pushed by workers. Returns how many were read."""
+        job_keys = self.redis_client.rpop(constants.REDIS_JOB_PROGRESS_QUEUE_NAME, properties.TELEGRAM_PROGRESS_BATCH)
+        for job_key in job_keys or []:
+            self.report(job_key)
+        return len(job_keys or [])
+
+    async def run(self) -> None:
+        while True:
+            try:
+                self.collect()
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error updating progress messages: {e}")
+            await asyncio.sleep(properties.TELEGRAM_PROGRESS_FLUSH_INTERVAL)
+
+    async def flush(self) -> int:
+        """Edit the progress message of changed jobs whose chat may be edited now. Returns edits sent."""
+        now = time.time()
+        edits = 0
+        # Oldest changes first so no job starves behind busier ones
+        for job_key in sorted(self._changed, key=self._changed.get):
+            if edits >= properties.TELEGRAM_PROGRESS_MAX_EDITS:
+                break
+            state = dict(zip(PROGRESS_FIELDS, self.redis_client.hmget(job_key, PROGRESS_FIELDS)))
+            if not state["progress_message_id"]:
+                # Not a Telegram job, or the job record is gone
+                self._forget(job_key)
+                continue
+            chat_id = int(state["progress_chat_id"])
+            if self._next_edit.get(chat_id, 0) > now:
+                continue
+
+            text = self.render(state, now)
+            if text != self._last_text.get(job_key):
+                if not await self._edit(chat_id, int(state["progress_message_id"]), text):
+                    continue
+                edits += 1
+                self._next_edit[chat_id] = now + properties.TELEGRAM_PROGRESS_MIN_INTERVAL
+                self._last_text[job_key] = text
+            if state["status"] in TERMINAL_STATUSES:
+                self._forget(job_key)
+            else:
+                self._changed.pop(job_key, None)
+        return edits
+
+    async def _edit(self, chat_id: int, message_id: int, text: str) -> bool:
+        try:
+            await observe_telegram_send("edit_message_text", self.telegram_client.bot.edit_message_text(
+                chat_id=chat_id, message_id=message_id, text=text))
+        except RetryAfter as e:
+            # Keep the job marked as changed and back off the whole chat
+            self._next_edit[chat_id] = time.time() + float(e.retry_after)
+            return False
+        except BadRequest as e:
+            # Deleted or identical message; nothing more to do for this edit
+            logger.info(f"Progress message {message_id} in chat {chat_id} not edited: {e}")
+        return True
+
+    def _forget(self, job_key: str) -> None:
+        self._changed.pop(job_key, None)
+        self._last_text.pop(job_key, None)
+
+    @staticmethod
+    def render(state: Dict[str, Optional[str]], now: float) -> str:
+        done = int(state["segments_done"] or 0)
+        total = int(state["segments_total"] or 0)
+        status = state["status"]
+        if status == ProcessingStatus.FAILED:
+            line = f"Failed after {done} segment{'s' if done != 1 else ''}."
+        elif status == ProcessingStatus.SCHEDULED:
+            wait = describe_wait(max(float(state["run_at"] or now) - now, 0))
+            line = f"Retrying in {wait}." if state["attempts"] else f"Scheduled to start in {wait}."
+        elif status == ProcessingStatus.COMPLETED or (total and done >= total):
+            line = f"Done: {done} segment{'s' if done != 1 else ''} ready."
+        elif total:
+            line = f"Processing: {done}/{total} segments ({done * 100 // total}%)"
+            started = float(state["started_at"] or state["enqueued_at"] or now)
+            if done:
+                remaining = (now - started) / done * (total - done)
+                line += f"\nETA: {describe_wait(remaining)}"
+        else:
+            line = f"Processing: {done} segment{'s' if done != 1 else ''} done"
+        header = state["progress_header"]
+        return f"{header}\n\n{line}" if header else line
@@ -0,0 +1,30 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.environment import prepare  # noqa: E402
+
+# Config and the database engine are created at import time, so the offline stand-ins (fakeredis, SQLite,
+# a fake Bot API) go in before any test module imports the application
+WORKDIR = tempfile.mkdtemp(prefix="trimflow-tests-")
+prepare(WORKDIR)
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+
+@pytest.fixture(scope="session")
+def database():
+    """The benchmark SQLite database with every table created."""
+    import database.database_config as database_config
+    import database.database_models  # noqa: F401
+
+    database_config.Base.metadata.create_all(bind=database_config.engine)
+    return database_config
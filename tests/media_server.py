@@ -0,0 +1,88 @@
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+@dataclass
+class Request:
+    path: str
+    headers: Dict[str, str]  # lower-cased names
+    sent: int  # body bytes written
+
+
+class MediaRequestHandler(BaseHTTPRequestHandler):
+    server: "MediaServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        headers = {name.lower(): value for name, value in self.headers.items()}
+        if path not in self.server.files:
+            self.server.requests.append(Request(path, headers, 0))
+            self.send_error(404)
+            return
+        body, content_type, etag = self.server.files[path]
+
+        if etag and headers.get("if-none-match") == etag:
+            self.server.requests.append(Request(path, headers, 0))
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        requested = headers.get("range")
+        if requested and headers.get("if-range", etag) == etag:
+            start, end = requested[len("bytes="):].split("-")
+            start, end = int(start), min(int(end) if end else len(body) - 1, len(body) - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+            body = body[start:end + 1]
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.server.requests.append(Request(path, headers, len(body)))
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # Clients read only the headers of the first response when they go on with range requests
+            pass
+
+
+class MediaServer(ThreadingHTTPServer):
+    """
+    A local HTTP server standing in for a media host: it serves byte ranges (honouring If-Range) and
+    answers If-None-Match with 304, and records every request it gets.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), MediaRequestHandler)
+        self.files: Dict[str, Tuple[bytes, str, Optional[str]]] = {}
+        self.requests: List[Request] = []
+
+    def add(self, path: str, body: bytes, content_type: str, etag: Optional[str] = None) -> str:
+        """Serve body at path and return its URL."""
+        self.files[path] = (body, content_type, etag)
+        return self.url(path)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_port}{path}"
+
+    def requests_for(self, path: str) -> List[Request]:
+        return [request for request in self.requests if request.path == path]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
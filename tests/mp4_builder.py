@@ -0,0 +1,87 @@
+import struct
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class TrackSpec:
+    handler: bytes
+    timescale: int
+    sample_delta: int
+    sample_sizes: List[int]
+    samples_per_chunk: int = 1
+    sync_samples: Optional[List[int]] = None  # 1-based; None writes no stss box
+
+
+@dataclass
+class BuiltMp4:
+    data: bytes
+    sample_offsets: List[List[int]]  # per track, the file offset of every sample
+
+
+def box(box_type: bytes, *payload: bytes) -> bytes:
+    body = b"".join(payload)
+    return struct.pack(">I4s", 8 + len(body), box_type) + body
+
+
+def full_box(box_type: bytes, *payload: bytes, version: int = 0) -> bytes:
+    return box(box_type, struct.pack(">I", version << 24), *payload)
+
+
+def sample_byte(track: int, sample: int) -> int:
+    """The byte every sample is filled with; never 0, so holes in a sparse copy stand out."""
+    return (track * 97 + sample) % 255 + 1
+
+
+def _chunks(spec: TrackSpec) -> List[int]:
+    count = len(spec.sample_sizes)
+    return [min(spec.samples_per_chunk, count - start) for start in range(0, count, spec.samples_per_chunk)]
+
+
+def _track(spec: TrackSpec, chunk_offsets: List[int]) -> bytes:
+    chunks = _chunks(spec)
+    runs = []
+    for number, per_chunk in enumerate(chunks, 1):
+        if not runs or runs[-1][1] != per_chunk:
+            runs.append((number, per_chunk))
+    count = len(spec.sample_sizes)
+    tables = [
+        full_box(b"stts", struct.pack(">III", 1, count, spec.sample_delta)),
+        full_box(b"stsc", struct.pack(">I", len(runs)),
+                 *(struct.pack(">III", first, per_chunk, 1) for first, per_chunk in runs)),
+        full_box(b"stsz", struct.pack(f">II{count}I", 0, count, *spec.sample_sizes)),
+        full_box(b"stco", struct.pack(f">I{len(chunk_offsets)}I", len(chunk_offsets), *chunk_offsets)),
+    ]
+    if spec.sync_samples is not None:
+        tables.append(full_box(b"stss", struct.pack(f">I{len(spec.sync_samples)}I", len(spec.sync_samples),
+                                                    *spec.sync_samples)))
+    mdhd = full_box(b"mdhd", struct.pack(">IIIIHH", 0, 0, spec.timescale, count * spec.sample_delta, 0, 0))
+    hdlr = full_box(b"hdlr", struct.pack(">I4s12x", 0, spec.handler), b"\0")
+    return box(b"trak", box(b"mdia", mdhd, hdlr, box(b"minf", box(b"stbl", *tables))))
+
+
+def build_mp4(tracks: List[TrackSpec]) -> BuiltMp4:
+    """
+    A minimal progressive MP4 (ftyp, moov, then mdat) with the sample tables of the given tracks. Sample
+    data is filler; each track's chunks follow those of the track before it in mdat.
+    """
+    ftyp = box(b"ftyp", b"isom", struct.pack(">I", 512), b"isomiso2mp41")
+    placeholder = [[0] * len(_chunks(spec)) for spec in tracks]
+    moov_size = len(box(b"moov", *(_track(spec, offsets) for spec, offsets in zip(tracks, placeholder))))
+
+    offset = len(ftyp) + moov_size + 8
+    chunk_offsets, sample_offsets, media = [], [], []
+    for number, spec in enumerate(tracks):
+        chunk_offsets.append([])
+        sample_offsets.append([])
+        sample = 0
+        for per_chunk in _chunks(spec):
+            chunk_offsets[-1].append(offset)
+            for size in spec.sample_sizes[sample:sample + per_chunk]:
+                sample_offsets[-1].append(offset)
+                media.append(bytes([sample_byte(number, sample)]) * size)
+                offset += size
+                sample += 1
+
+    moov = box(b"moov", *(_track(spec, offsets) for spec, offsets in zip(tracks, chunk_offsets)))
+    return BuiltMp4(ftyp + moov + box(b"mdat", *media), sample_offsets)
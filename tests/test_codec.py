@@ -0,0 +1,67 @@
+import json
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+from config.config import config_properties as properties
+from redis_queue import codec
+from redis_queue.redis_client import RedisManager
+
+
+class Payload(BaseModel):
+    url: str
+    start: float
+    tags: List[str]
+    note: Optional[str] = None
+
+
+DOCUMENT = Payload(url="https://example.com/v.mp4", start=12.5, tags=["ünïcode", "🎬"])
+
+
+@pytest.mark.parametrize("name", sorted(codec.CODECS))
+def test_payload_round_trips_through_a_redis_hash(name):
+    client = RedisManager.get_binary_client()
+    client.hset(f"test:codec:{name}", mapping=codec.encode_payload(DOCUMENT, codec.get_codec(name)))
+
+    # Redis hands every field back as bytes
+    data, codec_name, schema_version = client.hmget(f"test:codec:{name}", list(codec.PAYLOAD_FIELDS))
+
+    assert codec_name == name.encode() and int(schema_version) == codec.PAYLOAD_SCHEMA_VERSION
+    assert Payload.model_validate(codec.decode_payload(data, codec_name, schema_version)) == DOCUMENT
+
+
+def test_encode_payload_prefixes_the_fields():
+    fields = codec.encode_payload(DOCUMENT, codec.get_codec("json"), prefix=codec.QUEUED_PREFIX)
+
+    assert set(fields) == {"queued_data", "queued_codec", "queued_schema"}
+    assert json.loads(fields["queued_data"]) == DOCUMENT.model_dump(mode="json")
+
+
+def test_encode_payload_defaults_to_the_configured_codec(monkeypatch):
+    monkeypatch.setattr(properties, "QUEUE_PAYLOAD_CODEC", "msgpack")
+
+    assert codec.encode_payload(DOCUMENT)[codec.CODEC_FIELD] == "msgpack"
+
+
+def test_legacy_payload_without_codec_fields_is_json():
+    legacy = json.dumps(DOCUMENT.model_dump(mode="json"))
+
+    assert codec.decode_payload(legacy) == DOCUMENT.model_dump(mode="json")
+    assert codec.decode_payload(legacy.encode(), None, None) == DOCUMENT.model_dump(mode="json")
+
+
+def test_newer_schema_version_is_refused():
+    data = codec.get_codec("json").dumps({})
+
+    with pytest.raises(ValueError, match="newer than supported"):
+        codec.decode_payload(data, b"json", str(codec.PAYLOAD_SCHEMA_VERSION + 1).encode())
+
+
+def test_unknown_codec_is_refused():
+    with pytest.raises(ValueError, match="Unknown queue payload codec"):
+        codec.get_codec("pickle")
+
+
+def test_codecs_are_shared_instances():
+    assert codec.get_codec("orjson") is codec.get_codec("orjson")
@@ -0,0 +1,113 @@
+from utils.hls_playlist import Segment, parse_playlist, render_joined_playlist, render_playlist
+
+BASE_URL = "https://cdn.example.com/live/stream/index.m3u8"
+
+MASTER = """#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360
+low/index.m3u8
+#EXT-X-STREAM-INF:BANDWIDTH=2500000,RESOLUTION=1280x720
+https://other.example.com/high/index.m3u8
+#EXT-X-STREAM-INF:RESOLUTION=320x180
+tiny/index.m3u8
+"""
+
+MEDIA = """#EXTM3U
+#EXT-X-VERSION:7
+#EXT-X-TARGETDURATION:4
+#EXT-X-MEDIA-SEQUENCE:100
+#EXT-X-MAP:URI="init.mp4"
+#EXTINF:4.000,
+seg0.m4s
+#EXTINF:4.000,
+seg1.m4s
+#EXT-X-KEY:METHOD=AES-128,URI="/keys/k1"
+#EXTINF:3.5,title
+seg2.m4s
+
+#EXTINF:4,
+../other/seg3.m4s
+#EXT-X-ENDLIST
+"""
+
+
+def test_master_playlist_picks_the_highest_bandwidth():
+    playlist = parse_playlist(MASTER, BASE_URL)
+
+    assert playlist.is_master and not playlist.segments
+    assert playlist.variants == [
+        (800000, "https://cdn.example.com/live/stream/low/index.m3u8"),
+        (2500000, "https://other.example.com/high/index.m3u8"),
+        (0, "https://cdn.example.com/live/stream/tiny/index.m3u8"),
+    ]
+    assert playlist.best_variant() == "https://other.example.com/high/index.m3u8"
+
+
+def test_media_playlist_segments_and_tags():
+    playlist = parse_playlist(MEDIA, BASE_URL)
+
+    assert not playlist.is_master
+    assert playlist.header == ["#EXT-X-VERSION:7", "#EXT-X-TARGETDURATION:4"]
+    assert [(segment.uri.rsplit("/", 2)[-2:], segment.start, segment.duration) for segment in playlist.segments] == [
+        (["stream", "seg0.m4s"], 0.0, 4.0),
+        (["stream", "seg1.m4s"], 4.0, 4.0),
+        (["stream", "seg2.m4s"], 8.0, 3.5),
+        (["other", "seg3.m4s"], 11.5, 4.0),
+    ]
+    init = '#EXT-X-MAP:URI="https://cdn.example.com/live/stream/init.mp4"'
+    key = '#EXT-X-KEY:METHOD=AES-128,URI="https://cdn.example.com/keys/k1"'
+    assert [segment.map for segment in playlist.segments] == [init] * 4
+    assert [segment.key for segment in playlist.segments] == [None, None, key, key]
+
+
+def test_window_keeps_segments_overlapping_it():
+    playlist = parse_playlist(MEDIA, BASE_URL)
+
+    assert [segment.start for segment in playlist.window(4.0, 8.0)] == [4.0]
+    assert [segment.start for segment in playlist.window(3.9, 8.1)] == [0.0, 4.0, 8.0]
+    assert [segment.start for segment in playlist.window(12, float("inf"))] == [11.5]
+    assert playlist.window(20, 30) == []
+
+
+def test_render_playlist_points_at_local_files():
+    playlist = parse_playlist(MEDIA, BASE_URL)
+    segments = playlist.window(5, 12)
+
+    text = render_playlist(playlist.header, segments, ["a.m4s", "b.m4s", "c.m4s"])
+
+    assert text.splitlines() == [
+        "#EXTM3U", "#EXT-X-VERSION:7", "#EXT-X-TARGETDURATION:4", "#EXT-X-PLAYLIST-TYPE:VOD",
+        '#EXT-X-MAP:URI="https://cdn.example.com/live/stream/init.mp4"',
+        "#EXTINF:4.000,", "a.m4s",
+        '#EXT-X-KEY:METHOD=AES-128,URI="https://cdn.example.com/keys/k1"',
+        "#EXTINF:3.500,", "b.m4s",
+        "#EXTINF:4.000,", "c.m4s",
+        "#EXT-X-ENDLIST",
+    ]
+    # The local copy parses back to the same timeline
+    local = parse_playlist(text, "file:///cache/copy.m3u8")
+    assert [(segment.duration, segment.uri) for segment in local.segments] == [
+        (4.0, "file:///cache/a.m4s"), (3.5, "file:///cache/b.m4s"), (4.0, "file:///cache/c.m4s")]
+
+
+
+def test_joined_playlist_separates_parts_with_discontinuities():
+    first = [Segment("/media/a/0.m4s", 4.0, 0.0, map='#EXT-X-MAP:URI="/media/a/init.mp4"'),
+             Segment("/media/a/1.m4s", 2.2, 4.0, map='#EXT-X-MAP:URI="/media/a/init.mp4"')]
+    second = [Segment("/media/b/0.m4s", 4.5, 0.0, map='#EXT-X-MAP:URI="/media/b/init.mp4"')]
+
+    growing = render_joined_playlist([first], complete=False).splitlines()
+    joined = render_joined_playlist([first, second], complete=True).splitlines()
+
+    # Players keep reloading a playlist without an end while parts are still being packaged
+    assert "#EXT-X-ENDLIST" not in growing and "#EXT-X-PLAYLIST-TYPE:VOD" not in growing
+    assert joined == [
+        "#EXTM3U", "#EXT-X-VERSION:7", "#EXT-X-TARGETDURATION:5", "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+        '#EXT-X-MAP:URI="/media/a/init.mp4"',
+        "#EXTINF:4.000,", "/media/a/0.m4s",
+        "#EXTINF:2.200,", "/media/a/1.m4s",
+        "#EXT-X-DISCONTINUITY",
+        '#EXT-X-MAP:URI="/media/b/init.mp4"',
+        "#EXTINF:4.500,", "/media/b/0.m4s",
+        "#EXT-X-ENDLIST",
+    ]
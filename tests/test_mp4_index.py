@@ -0,0 +1,106 @@
+import struct
+
+import pytest
+
+from mp4_builder import TrackSpec, box, build_mp4
+from utils import mp4_index
+
+VIDEO = TrackSpec(b"vide", timescale=1000, sample_delta=500, sample_sizes=[100 + sample for sample in range(40)],
+                  samples_per_chunk=4, sync_samples=[1, 11, 21, 31])
+AUDIO = TrackSpec(b"soun", timescale=48000, sample_delta=24000, sample_sizes=[50] * 40, samples_per_chunk=8)
+
+
+def moov_payload(data: bytes) -> bytes:
+    for box_type, start, end in mp4_index.iter_boxes(data):
+        if box_type == b"moov":
+            return data[start:end]
+    raise AssertionError("no moov box")
+
+
+@pytest.fixture(scope="module")
+def built():
+    return build_mp4([VIDEO, AUDIO])
+
+
+@pytest.fixture(scope="module")
+def tracks(built):
+    return mp4_index.parse_moov(moov_payload(built.data))
+
+
+def test_iter_boxes_reads_64_bit_and_open_ended_sizes():
+    large = struct.pack(">I4sQ", 1, b"free", 20) + b"abcd"
+    open_ended = struct.pack(">I4s", 0, b"mdat") + b"data"
+    data = box(b"ftyp", b"isom") + large + open_ended
+
+    assert [(box_type, end - start) for box_type, start, end in mp4_index.iter_boxes(data)] == [
+        (b"ftyp", 4), (b"free", 4), (b"mdat", 4)]
+
+
+def test_iter_boxes_rejects_a_box_smaller_than_its_header():
+    with pytest.raises(mp4_index.Mp4IndexError):
+        list(mp4_index.iter_boxes(struct.pack(">I4s", 4, b"moov")))
+
+
+def test_read_box_header():
+    assert mp4_index.read_box_header(struct.pack(">I4s", 24, b"moov")) == (b"moov", 8, 24)
+    assert mp4_index.read_box_header(struct.pack(">I4sQ", 1, b"mdat", 2 ** 33)) == (b"mdat", 16, 2 ** 33)
+
+
+def test_parse_moov_reads_the_sample_tables(built, tracks):
+    video, audio = tracks
+    assert (video.handler, video.timescale, video.sample_count) == (b"vide", 1000, 40)
+    assert video.sync_samples == [1, 11, 21, 31]
+    assert list(video.sample_sizes) == VIDEO.sample_sizes
+    assert list(video.chunk_offsets) == built.sample_offsets[0][::4]
+    assert (audio.handler, audio.sync_samples, audio.sample_to_chunk) == (b"soun", None, [(1, 8)])
+
+
+def test_parse_moov_rejects_fragmented_files():
+    with pytest.raises(mp4_index.Mp4IndexError, match="Fragmented"):
+        mp4_index.parse_moov(box(b"mvex"))
+
+
+def test_sample_timing(tracks):
+    video = tracks[0]
+    assert video.sample_at(0) == 0
+    assert video.sample_at(7.4) == 14
+    assert video.sample_at(1000) == 39
+    assert video.time_of(14) == 7.0
+    assert video.time_of(40) == 20.0
+
+
+def test_keyframe_before(tracks):
+    video, audio = tracks
+    assert video.keyframe_before(14) == 10
+    assert video.keyframe_before(10) == 10
+    assert video.keyframe_before(39) == 30
+    # Without stss every sample is a keyframe
+    assert audio.keyframe_before(14) == 14
+
+
+def test_byte_ranges_start_and_end_inside_chunks(built, tracks):
+    video = tracks[0]
+    offsets, sizes = built.sample_offsets[0], VIDEO.sample_sizes
+
+    ranges = video.byte_ranges(5, 10)
+
+    # Samples 5-7 are the tail of chunk 2, 8-10 the head of chunk 3; chunks lie back to back here
+    assert mp4_index.merge_ranges(ranges) == [(offsets[5], offsets[10] + sizes[10])]
+    assert ranges[0] == (offsets[5], offsets[7] + sizes[7])
+
+
+def test_merge_ranges_joins_neighbours_within_the_gap():
+    ranges = [(50, 60), (0, 10), (12, 20), (5, 8)]
+    assert mp4_index.merge_ranges(ranges) == [(0, 10), (12, 20), (50, 60)]
+    assert mp4_index.merge_ranges(ranges, gap=2) == [(0, 20), (50, 60)]
+
+
+def test_plan_window_starts_every_track_at_the_video_keyframe(built, tracks):
+    ranges, keyframe_time = mp4_index.plan_window(tracks, 7.4, 9.0)
+
+    assert keyframe_time == 5.0
+    video_offsets, audio_offsets = built.sample_offsets
+    assert ranges == [
+        (video_offsets[10], video_offsets[18] + VIDEO.sample_sizes[18]),
+        (audio_offsets[10], audio_offsets[18] + AUDIO.sample_sizes[18]),
+    ]
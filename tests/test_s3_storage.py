@@ -0,0 +1,117 @@
+import asyncio
+import os
+import threading
+
+import httpx
+import pytest
+
+from config.config import config_properties as properties
+
+moto_server = pytest.importorskip("moto.server")
+
+PART_SIZE = 5 * 1024 * 1024  # the smallest part S3 accepts
+
+
+@pytest.fixture(scope="module")
+def s3_endpoint():
+    """A local S3-compatible server, standing in for MinIO."""
+    server = moto_server.ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f"http://{host}:{port}"
+    server.stop()
+
+
+@pytest.fixture
+def storage(s3_endpoint, monkeypatch):
+    from storage.s3_storage import S3Storage
+
+    monkeypatch.setattr(properties, "S3_ENDPOINT_URL", s3_endpoint)
+    monkeypatch.setattr(properties, "S3_ACCESS_KEY_ID", "test")
+    monkeypatch.setattr(properties, "S3_SECRET_ACCESS_KEY", "test")
+    monkeypatch.setattr(properties, "S3_BUCKET", "trimflow-test")
+    monkeypatch.setattr(properties, "S3_MULTIPART_PART_SIZE", PART_SIZE)
+    monkeypatch.setattr(properties, "S3_MULTIPART_CONCURRENCY", 2)
+    storage = S3Storage()
+    storage.client.create_bucket(Bucket="trimflow-test")
+    yield storage
+    for item in storage.client.list_objects_v2(Bucket="trimflow-test").get("Contents", []):
+        storage.client.delete_object(Bucket="trimflow-test", Key=item["Key"])
+    storage.client.delete_bucket(Bucket="trimflow-test")
+
+
+def write(storage, location: str, data: bytes, chunk_size: int = 1024 * 1024) -> int:
+    async def chunks():
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+    return asyncio.run(storage.write_stream(location, chunks()))
+
+
+def test_large_stream_is_uploaded_in_concurrent_parts(storage, monkeypatch):
+    in_flight, most = 0, 0
+    lock = threading.Lock()
+    upload_part = storage.client.upload_part
+
+    def counting_upload_part(**kwargs):
+        nonlocal in_flight, most
+        with lock:
+            in_flight += 1
+            most = max(most, in_flight)
+        try:
+            return upload_part(**kwargs)
+        finally:
+            with lock:
+                in_flight -= 1
+
+    monkeypatch.setattr(storage.client, "upload_part", counting_upload_part)
+    data = os.urandom(3 * PART_SIZE + 12345)
+
+    assert write(storage, "media/uploaded_videos/big.mp4", data) == len(data)
+
+    head = storage.client.head_object(Bucket=storage.bucket, Key="media/uploaded_videos/big.mp4")
+    # Multipart objects carry the part count in their ETag
+    assert head["ETag"].strip('"').endswith("-4")
+    assert 1 <= most <= 2
+    assert httpx.get(storage.url("media/uploaded_videos/big.mp4")).content == data
+
+
+def test_small_stream_is_a_single_put(storage, monkeypatch):
+    monkeypatch.setattr(storage.client, "create_multipart_upload", None)
+
+    assert write(storage, "media/uploaded_videos/small.mp4", b"abc") == 3
+
+    assert httpx.get(storage.url("media/uploaded_videos/small.mp4")).content == b"abc"
+
+
+def test_failed_stream_aborts_the_upload(storage):
+    async def chunks():
+        yield os.urandom(PART_SIZE)
+        yield os.urandom(PART_SIZE)
+        raise ConnectionError("client went away")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(storage.write_stream("media/uploaded_videos/broken.mp4", chunks()))
+
+    assert not storage.exists("media/uploaded_videos/broken.mp4")
+    assert not storage.client.list_multipart_uploads(Bucket=storage.bucket).get("Uploads")
+
+
+def test_exists_and_delete(storage):
+    write(storage, "media/uploaded_videos/a.mp4", b"a")
+
+    assert storage.exists("media/uploaded_videos/a.mp4")
+    assert not storage.exists("media/uploaded_videos/missing.mp4")
+    storage.delete("media/uploaded_videos/a.mp4")
+    assert not storage.exists("media/uploaded_videos/a.mp4")
+
+
+def test_publish_moves_worker_output_into_the_bucket(storage, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("media/trimmed_videos")
+    with open("media/trimmed_videos/t.mp4", "wb") as f:
+        f.write(b"x" * 100)
+
+    storage.publish("media/trimmed_videos/t.mp4")
+
+    assert not os.path.exists("media/trimmed_videos/t.mp4")
+    assert httpx.get(storage.url("media/trimmed_videos/t.mp4")).content == b"x" * 100
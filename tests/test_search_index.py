@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import delete, text, update
+
+from database import search_index
+from database.database_models import OriginalVideo
+from database.repository.original_video_repository import OriginalVideoRepository
+
+
+def video(number: int, name: str, description: str, category: str, user: str, day: int) -> OriginalVideo:
+    return OriginalVideo(video_id=f"v{number}", name=name, description=description, category=category,
+                         created_user=user, created_date=datetime(2026, 3, day, 12, tzinfo=timezone.utc),
+                         location=f"media/uploaded_videos/v{number}.mp4", video_metadata={}, addon={}, remark="")
+
+
+def seed_videos() -> list:
+    return [video(number, f"cat clip {number}" if number % 3 else f"dog show {number}",
+                  "funny" if number % 2 else "serious", "pets" if number % 4 else "news", f"user{number % 2}",
+                  1 + number % 3)
+            for number in range(1, 31)]
+
+
+@pytest.fixture
+def repository(database):
+    """Seeded videos, indexed by an FTS table created after they were written."""
+    with database.engine.begin() as connection:
+        connection.execute(text(f"DROP TABLE IF EXISTS {search_index.SQLITE_FTS_TABLE}"))
+        for action in ("insert", "update", "delete"):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS original_video_fts_{action}"))
+        connection.execute(delete(OriginalVideo))
+    repository = OriginalVideoRepository()
+    repository.save_all(seed_videos())
+    search_index.ensure_search_index(database.engine)
+    return repository
+
+
+def names(videos) -> list:
+    return [video.name for video in videos]
+
+
+def test_ensure_search_index_is_idempotent(repository, database):
+    search_index.ensure_search_index(database.engine)
+
+    with database.engine.connect() as connection:
+        tables = connection.execute(text("SELECT count(*) FROM sqlite_master WHERE name = :name"),
+                                    {"name": search_index.SQLITE_FTS_TABLE}).scalar()
+    assert tables == 1
+    assert len(repository.search("cat", limit=100)[0]) == 20
+
+
+def test_rows_written_before_the_index_are_searchable(repository):
+    videos, _ = repository.search("dog serious", limit=100)
+
+    assert names(videos) == ["dog show 30", "dog show 24", "dog show 18", "dog show 12", "dog show 6"]
+
+
+def test_index_follows_inserts_updates_and_deletes(repository, database):
+    repository.save(OriginalVideo(video_id="late", name="parrot late", location="x", description="funny"))
+    with database.engine.begin() as connection:
+        connection.execute(update(OriginalVideo).where(OriginalVideo.video_id == "v1").values(name="parrot one"))
+        connection.execute(delete(OriginalVideo).where(OriginalVideo.video_id == "v2"))
+
+    assert names(repository.search("parrot")[0]) == ["parrot late", "parrot one"]
+    assert "cat clip 1" not in names(repository.search("cat", limit=100)[0])
+    assert "cat clip 2" not in names(repository.search("cat", limit=100)[0])
+
+
+def test_query_syntax_in_user_input_is_taken_literally(repository):
+    assert repository.search('"; DROP TABLE original_video; --')[0] == []
+    assert repository.search("cat OR NOT")[0] == []
+    assert names(repository.search('cat* "clip" 7')[0]) == ["cat clip 7"]
+    # Nothing but punctuation is no text filter at all
+    assert len(repository.search("?!", limit=100)[0]) == 30
+
+
+def test_keyset_pages_cover_every_match_once(repository):
+    pages, cursor = [], None
+    while True:
+        videos, cursor = repository.search("cat", category="pets", after_id=cursor, limit=4)
+        pages.append([video.id for video in videos])
+        if cursor is None:
+            break
+
+    ids = [video_id for page in pages for video_id in page]
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == len(set(ids)) == 15
+    assert [len(page) for page in pages] == [4, 4, 4, 3]
+
+
+def test_keyset_pages_are_stable_under_inserts(repository):
+    first, cursor = repository.search("funny", limit=5)
+    repository.save(OriginalVideo(video_id="new", name="funny new", location="x", description="funny"))
+
+    second, _ = repository.search("funny", after_id=cursor, limit=5)
+
+    assert max(video.id for video in second) < min(video.id for video in first)
+    assert "funny new" not in names(second)
+
+
+def test_facets_count_matches_and_ignore_their_own_filter(repository):
+    facets = repository.facets("cat", category="pets")
+
+    # The category facet still lists news, so the selection can be changed
+    assert facets["category"] == [("pets", 15), ("news", 5)]
+    assert facets["created_user"] == [("user1", 10), ("user0", 5)]
+    assert sum(count for _, count in facets["created_date"]) == 15
+    assert repository.facets("cat", limit=1)["category"] == [("pets", 15)]
+
+
+def test_created_range_filters_search_but_not_its_facet(repository):
+    # Every third video, from v1 on, is created on March 2
+    created_from = datetime(2026, 3, 2, tzinfo=timezone.utc)
+    created_to = datetime(2026, 3, 3, tzinfo=timezone.utc)
+
+    videos, _ = repository.search(created_from=created_from, created_to=created_to, limit=100)
+    facets = repository.facets(created_from=created_from, created_to=created_to)
+
+    assert {video.video_id for video in videos} == {f"v{number}" for number in range(1, 31, 3)}
+    assert len(facets["created_date"]) == 3
+    assert sum(count for _, count in facets["category"]) == 10
+
+
+def test_service_returns_facets_with_the_first_page_only(repository):
+    from services.container import container
+
+    first = asyncio.run(container.video_service.search_original_videos("cat funny", None, None, None, None,
+                                                                         None, 5))
+    second = asyncio.run(container.video_service.search_original_videos("cat funny", None, None, None, None,
+                                                                          first.next_cursor, 5))
+
+    assert len(first.items) == 5 and first.next_cursor is not None
+    assert {facet.value: facet.count for facet in first.facets["category"]} == {"pets": 10}
+    assert len(second.items) == 5 and second.facets is None
@@ -0,0 +1,202 @@
+import asyncio
+import os
+
+import pytest
+
+from config.config import config_properties as properties
+from media_server import MediaServer
+from mp4_builder import TrackSpec, build_mp4
+from services.url_fetcher import INDEX_PROBE_BYTES, FetchResult, UrlFetcher
+from utils import mp4_index
+from utils.download_cache import DownloadCache
+from utils.hls_playlist import parse_playlist
+
+# 100 s of 0.5 s video samples with a keyframe every 10 s, and audio in the same rhythm after it in mdat
+VIDEO = TrackSpec(b"vide", timescale=1000, sample_delta=500, sample_sizes=[10000] * 200, samples_per_chunk=5,
+                  sync_samples=list(range(1, 201, 20)))
+AUDIO = TrackSpec(b"soun", timescale=48000, sample_delta=24000, sample_sizes=[1000] * 200, samples_per_chunk=10)
+
+
+@pytest.fixture
+def server():
+    with MediaServer() as server:
+        yield server
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DownloadCache(str(tmp_path / "download_cache"))
+
+
+def fetch(cache: DownloadCache, url: str, window=None) -> FetchResult:
+    """Fetch url with a fetcher of its own, as a fresh process sharing the cache directory would."""
+    async def run():
+        fetcher = UrlFetcher(cache)
+        try:
+            return await fetcher.fetch(url, window)
+        finally:
+            await fetcher.close()
+    return asyncio.run(run())
+
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_cached_copy_is_revalidated_with_its_etag(server, cache):
+    body = os.urandom(20000)
+    url = server.add("/clip.bin", body, "application/octet-stream", etag='"v1"')
+
+    first = fetch(cache, url)
+    second = fetch(cache, url)
+
+    assert not first.from_cache and read(first.path) == body
+    assert second.from_cache and second.path == first.path
+    revalidation = server.requests[-1]
+    assert revalidation.headers["if-none-match"] == '"v1"' and revalidation.sent == 0
+
+
+def test_changed_source_is_downloaded_again(server, cache):
+    url = server.add("/clip.bin", b"old" * 1000, "application/octet-stream", etag='"v1"')
+    fetch(cache, url)
+    server.add("/clip.bin", b"new" * 1000, "application/octet-stream", etag='"v2"')
+
+    result = fetch(cache, url)
+
+    assert not result.from_cache
+    assert read(result.path) == b"new" * 1000
+    assert cache.get(url).etag == '"v2"'
+
+
+def test_tracking_parameters_share_a_cache_entry(server, cache):
+    url = server.add("/clip.bin", b"x" * 1000, "application/octet-stream", etag='"v1"')
+    fetch(cache, url + "?utm_source=feed")
+
+    assert fetch(cache, url).from_cache
+
+
+def test_large_source_is_downloaded_in_parallel_ranges(server, cache, monkeypatch):
+    monkeypatch.setattr(properties, "FETCH_RANGE_THRESHOLD", 10000)
+    monkeypatch.setattr(properties, "FETCH_RANGE_PARTS", 4)
+    body = os.urandom(50001)
+    url = server.add("/big.bin", body, "application/octet-stream", etag='"v1"')
+
+    result = fetch(cache, url)
+
+    assert read(result.path) == body
+    ranged = [request for request in server.requests if "range" in request.headers]
+    assert sorted(request.headers["range"] for request in ranged) == [
+        "bytes=0-12500", "bytes=12501-25001", "bytes=25002-37502", "bytes=37503-50000"]
+    # Parts of a changed source must not be stitched together
+    assert all(request.headers["if-range"] == '"v1"' for request in ranged)
+
+
+def test_small_source_is_streamed_from_one_response(server, cache, monkeypatch):
+    monkeypatch.setattr(properties, "FETCH_RANGE_THRESHOLD", 10000)
+    body = os.urandom(5000)
+    url = server.add("/small.bin", body, "application/octet-stream")
+
+    result = fetch(cache, url)
+
+    assert read(result.path) == body
+    assert [request.headers.get("range") for request in server.requests] == [None]
+
+
+def test_failed_range_download_leaves_nothing_behind(server, cache, monkeypatch):
+    monkeypatch.setattr(properties, "FETCH_RANGE_THRESHOLD", 10000)
+    url = server.add("/big.bin", os.urandom(50000), "application/octet-stream", etag='"v1"')
+    # The source changes between the first response and the range requests, so If-Range gets a full 200
+    original = UrlFetcher._download_ranges
+
+    async def change_then_download(self, *args):
+        server.add("/big.bin", os.urandom(50000), "application/octet-stream", etag='"v2"')
+        return await original(self, *args)
+
+    monkeypatch.setattr(UrlFetcher, "_download_ranges", change_then_download)
+
+    with pytest.raises(RuntimeError, match="returned 200"):
+        fetch(cache, url)
+    assert cache.get(url) is None
+    assert not [name for name in os.listdir(cache.directory) if name.endswith(".part")]
+
+
+@pytest.fixture
+def windowed_mp4(server, monkeypatch):
+    monkeypatch.setattr(properties, "FETCH_WINDOW_MIN_SIZE", 0)
+    monkeypatch.setattr(properties, "FETCH_WINDOW_PADDING", 2)
+    built = build_mp4([VIDEO, AUDIO])
+    return built, server.add("/movie.mp4", built.data, "video/mp4", etag='"m1"')
+
+
+def test_mp4_window_downloads_only_the_samples_it_needs(server, cache, windowed_mp4):
+    built, url = windowed_mp4
+
+    result = fetch(cache, url, window=(42, 45))
+
+    copy = read(result.path)
+    assert len(copy) == len(built.data) and result.entry.window == "42-45"
+    # The copy keeps the source's index, so offsets and timestamps stay valid
+    moov = next(copy[start:end] for box_type, start, end in mp4_index.iter_boxes(copy) if box_type == b"moov")
+    assert [track.sample_count for track in mp4_index.parse_moov(moov)] == [200, 200]
+
+    # From the keyframe at 40 s (sample 80) to the padded end at 47 s (sample 94) in both tracks
+    for track, spec in enumerate((VIDEO, AUDIO)):
+        offsets = built.sample_offsets[track]
+        for sample in (80, 94):
+            start, end = offsets[sample], offsets[sample] + spec.sample_sizes[sample]
+            assert copy[start:end] == built.data[start:end]
+        for sample in (79, 95, 199):
+            start, end = offsets[sample], offsets[sample] + spec.sample_sizes[sample]
+            assert copy[start:end] == bytes(end - start)
+    held = sum(end - start for start, end in result.entry.ranges)
+    assert held < len(built.data) / 4
+
+    ranged = [request for request in server.requests if "range" in request.headers]
+    assert all(request.headers["if-range"] == '"m1"' for request in ranged)
+    # The index probe plus samples 80-94 of each track
+    assert sum(request.sent for request in ranged) == INDEX_PROBE_BYTES + 15 * 10000 + 15 * 1000
+
+
+def test_mp4_window_is_revalidated_from_the_cache(server, cache, windowed_mp4):
+    _, url = windowed_mp4
+    first = fetch(cache, url, window=(42, 45))
+
+    second = fetch(cache, url, window=(42, 45))
+
+    assert second.from_cache and second.path == first.path
+    assert server.requests[-1].headers["if-none-match"] == '"m1"'
+
+
+def test_mp4_window_covering_most_of_the_file_downloads_it_whole(server, cache, windowed_mp4):
+    built, url = windowed_mp4
+
+    result = fetch(cache, url, window=(5, 90))
+
+    assert read(result.path) == built.data
+    assert not result.entry.ranges
+
+
+def test_hls_window_downloads_only_overlapping_segments(server, cache, monkeypatch):
+    monkeypatch.setattr(properties, "FETCH_WINDOW_PADDING", 2)
+    segments = {number: bytes([number + 1]) * 3000 for number in range(10)}
+    for number, body in segments.items():
+        server.add(f"/hls/high/seg{number}.ts", body, "video/mp2t")
+    server.add("/hls/high/index.m3u8", "\n".join(
+        ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:4"]
+        + [line for number in segments for line in ("#EXTINF:4.0,", f"seg{number}.ts")]
+        + ["#EXT-X-ENDLIST"]).encode(), "application/vnd.apple.mpegurl")
+    url = server.add("/hls/master.m3u8", (
+        "#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=400000\nlow/index.m3u8\n"
+        "#EXT-X-STREAM-INF:BANDWIDTH=1200000\nhigh/index.m3u8\n").encode(), "application/vnd.apple.mpegurl")
+
+    # 9-14 s plus 2 s of padding needs the segments starting at 8 and 12 s
+    result = fetch(cache, url, window=(9, 14))
+
+    assert result.offset == 8.0 and result.path.endswith(".m3u8")
+    with open(result.path) as f:
+        local = parse_playlist(f.read(), result.path)
+    assert [read(segment.uri) for segment in local.segments] == [segments[2], segments[3]]
+    assert [request.path for request in server.requests] == [
+        "/hls/master.m3u8", "/hls/high/index.m3u8", "/hls/high/seg2.ts", "/hls/high/seg3.ts"]
+    assert sorted(result.entry.parts) == sorted(os.path.basename(segment.uri) for segment in local.segments)
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "igshid", "si")
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL so trivially different spellings share one cache entry."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    file_name: str
+    size: int
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_type: Optional[str] = None
+    immutable: bool = False  # entries without validators that never need revalidation
+    fetched_at: float = 0.0
+    window: str = ""  # "start-end" seconds when only that part of the source was fetched
+    offset: float = 0.0  # seconds of the source timeline that precede the start of the copy
+    parts: List[str] = field(default_factory=list)  # companion files, e.g. the segments of an HLS copy
+    ranges: List[List[int]] = field(default_factory=list)  # [start, end) bytes holding data in a sparse windowed copy
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class DownloadCache:
+    """
+    Downloaded sources on local disk, keyed by normalized URL. Each entry is the file plus a small JSON
+    sidecar holding its HTTP validators, so repeat sources can be revalidated instead of downloaded again.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(url: str, window: str = "") -> str:
+        name = normalize_url(url)
+        if window:
+            name = f"{name}#window={window}"
+        return hashlib.sha256(name.encode()).hexdigest()
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def path(self, entry: CacheEntry) -> str:
+        return os.path.join(self.directory, entry.file_name)
+
+    def temp_path(self, url: str, window: str = "") -> str:
+        """A path of its own for one download, so concurrent downloads of the same source never share a file."""
+        return os.path.join(self.directory, f"{self.key(url, window)}.{uuid.uuid4().hex}.part")
+
+    def get(self, url: str, window: str = "") -> Optional[CacheEntry]:
+        try:
+            with open(self._meta_path(self.key(url, window))) as f:
+                entry = CacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+        if not os.path.exists(self.path(entry)):
+            return None
+        return entry
+
+    def entry_at(self, path: str) -> Optional[CacheEntry]:
+        """The entry whose file is at path, if path is a file of this cache."""
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.directory):
+            return None
+        try:
+            with open(self._meta_path(os.path.splitext(os.path.basename(path))[0])) as f:
+                return CacheEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def put(self, url: str, downloaded_path: str, extension: str = "", window: str = "", **fields) -> CacheEntry:
+        """Move a finished download into the cache and record its validators. Parts must already be in place."""
+        key = self.key(url, window)
+        entry = CacheEntry(url=normalize_url(url), file_name=f"{key}{extension}", size=os.path.getsize(downloaded_path),
+                           fetched_at=time.time(), window=window, **fields)
+        entry.size += sum(os.path.getsize(os.path.join(self.directory, part)) for part in entry.parts)
+        os.replace(downloaded_path, self.path(entry))
+        meta_path = self._meta_path(key)
+        with open(f"{meta_path}.tmp", "w") as f:
+            json.dump(asdict(entry), f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+        return entry
+
+    def companions(self, entry: CacheEntry) -> List[str]:
+        """File names stored next to an entry's file that belong to it."""
+        return [*entry.parts, os.path.basename(self._meta_path(self.key(entry.url, entry.window)))]
+
+    def touch(self, entry: CacheEntry) -> None:
+        """Record that a cached file was used (its access time drives eviction)."""
+        try:
+            os.utime(self.path(entry))
+        except OSError:
+            logger.warning(f"Could not update access time of {self.path(entry)}")
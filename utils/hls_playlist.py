@@ -0,0 +1,116 @@
+import math
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from urllib.parse import urljoin
+
+URI_ATTRIBUTE = re.compile(r'URI="([^"]+)"')
+BANDWIDTH_ATTRIBUTE = re.compile(r"BANDWIDTH=(\d+)")
+# Tags that describe the whole playlist and are copied into a windowed copy
+KEPT_HEADER_TAGS = ("#EXT-X-VERSION", "#EXT-X-TARGETDURATION", "#EXT-X-INDEPENDENT-SEGMENTS")
+
+
+@dataclass
+class Segment:
+    uri: str
+    duration: float
+    start: float
+    key: Optional[str] = None  # EXT-X-KEY line in effect, with an absolute URI
+    map: Optional[str] = None  # EXT-X-MAP line in effect, with an absolute URI
+
+
+@dataclass
+class Playlist:
+    header: List[str] = field(default_factory=list)
+    segments: List[Segment] = field(default_factory=list)
+    variants: List[Tuple[int, str]] = field(default_factory=list)  # (bandwidth, uri) of a master playlist
+
+    @property
+    def is_master(self) -> bool:
+        return bool(self.variants)
+
+    def best_variant(self) -> str:
+        return max(self.variants)[1]
+
+    def window(self, start: float, end: float) -> List[Segment]:
+        """Segments overlapping start..end seconds."""
+        return [segment for segment in self.segments
+                if segment.start < end and segment.start + segment.duration > start]
+
+
+def _absolute(line: str, base_url: str) -> str:
+    return URI_ATTRIBUTE.sub(lambda match: f'URI="{urljoin(base_url, match.group(1))}"', line)
+
+
+def parse_playlist(text: str, base_url: str) -> Playlist:
+    """Parse an HLS master or media playlist, resolving every URI against base_url."""
+    playlist = Playlist()
+    key = map_tag = None
+    duration = None
+    bandwidth = None
+    elapsed = 0.0
+    for line in (line.strip() for line in text.splitlines()):
+        if not line:
+            continue
+        if line.startswith("#EXT-X-STREAM-INF"):
+            match = BANDWIDTH_ATTRIBUTE.search(line)
+            bandwidth = int(match.group(1)) if match else 0
+        elif line.startswith("#EXTINF:"):
+            duration = float(line[len("#EXTINF:"):].split(",")[0])
+        elif line.startswith("#EXT-X-KEY"):
+            key = _absolute(line, base_url)
+        elif line.startswith("#EXT-X-MAP"):
+            map_tag = _absolute(line, base_url)
+        elif line.startswith(KEPT_HEADER_TAGS):
+            playlist.header.append(line)
+        elif not line.startswith("#"):
+            uri = urljoin(base_url, line)
+            if bandwidth is not None:
+                playlist.variants.append((bandwidth, uri))
+                bandwidth = None
+            elif duration is not None:
+                playlist.segments.append(Segment(uri, duration, elapsed, key, map_tag))
+                elapsed += duration
+                duration = None
+    return playlist
+
+
+def render_playlist(header: List[str], segments: List[Segment], file_names: List[str]) -> str:
+    """A VOD media playlist of the given segments, each pointing at its local file name."""
+    lines = ["#EXTM3U", *header, "#EXT-X-PLAYLIST-TYPE:VOD"]
+    key = map_tag = None
+    for segment, file_name in zip(segments, file_names):
+        if segment.key != key and segment.key:
+            lines.append(segment.key)
+        if segment.map != map_tag and segment.map:
+            lines.append(segment.map)
+        key, map_tag = segment.key, segment.map
+        lines.append(f"#EXTINF:{segment.duration:.3f},")
+        lines.append(file_name)
+    lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+def render_joined_playlist(parts: List[List[Segment]], complete: bool) -> str:
+    """
+    One media playlist playing the parts one after another, with a discontinuity between them since every
+    part has its own init section. Until complete it has no end, so players keep reloading it.
+    """
+    segments = [segment for part in parts for segment in part]
+    target = max((math.ceil(segment.duration) for segment in segments), default=1)
+    lines = ["#EXTM3U", "#EXT-X-VERSION:7", f"#EXT-X-TARGETDURATION:{target}", "#EXT-X-MEDIA-SEQUENCE:0"]
+    if complete:
+        lines.append("#EXT-X-PLAYLIST-TYPE:VOD")
+    for number, part in enumerate(parts):
+        if number:
+            lines.append("#EXT-X-DISCONTINUITY")
+        map_tag = None
+        for segment in part:
+            if segment.map != map_tag and segment.map:
+                lines.append(segment.map)
+            map_tag = segment.map
+            lines.append(f"#EXTINF:{segment.duration:.3f},")
+            lines.append(segment.uri)
+    if complete:
+        lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,63 @@
+import os
+from typing import Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Only the image pipeline needs Pillow
+    Image = ImageOps = None
+
+EXIF_ORIENTATION = 0x0112
+# EXIF orientations that turn the stored image a quarter turn
+QUARTER_TURNS = (5, 6, 7, 8)
+
+
+def _cover_box(size: Tuple[int, int], target: Tuple[int, int]) -> Tuple[float, float, float, float]:
+    """The centred region of an image of the given size with the target's aspect ratio."""
+    width, height = size
+    target_width, target_height = target
+    scale = max(target_width / width, target_height / height)
+    crop_width, crop_height = target_width / scale, target_height / scale
+    left, top = (width - crop_width) / 2, (height - crop_height) / 2
+    return left, top, left + crop_width, top + crop_height
+
+
+def fit_image(source_path: str, target_path: str, width: int, height: int, quality: int,
+              max_pixels: int) -> Tuple[int, int, int]:
+    """
+    Scale and centre crop an image to fill exactly width x height and save it as a JPEG.
+    Runs in a worker process. Returns the output's width, height and size in bytes.
+    """
+    if Image is None:
+        raise RuntimeError("Image processing needs the Pillow package: pip install Pillow")
+    Image.MAX_IMAGE_PIXELS = max_pixels
+
+    with Image.open(source_path) as image:
+        # Header only so far; let the JPEG decoder scale down by up to 8x while decoding,
+        # so a large photo is never held in memory at full resolution
+        draft_size = (width, height)
+        if image.getexif().get(EXIF_ORIENTATION) in QUARTER_TURNS:
+            draft_size = (height, width)
+        image.draft("RGB", draft_size)
+        image = ImageOps.exif_transpose(image)
+
+        if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+            # JPEG has no alpha; flatten transparent images onto white rather than black
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, "white")
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        # Crop and scale in one pass; reducing_gap shrinks by whole factors first, which is much cheaper
+        fitted = image.resize((width, height), Image.Resampling.LANCZOS,
+                              box=_cover_box(image.size, (width, height)), reducing_gap=3.0)
+
+    temp_path = f"{target_path}.part"
+    try:
+        fitted.save(temp_path, "JPEG", quality=quality, optimize=True, progressive=True)
+        os.replace(temp_path, target_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return width, height, os.path.getsize(target_path)
@@ -0,0 +1,195 @@
+import bisect
+import struct
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+# Boxes that only hold other boxes on the way from moov down to the sample tables
+CONTAINER_BOXES = (b"trak", b"mdia", b"minf", b"stbl")
+
+
+class Mp4IndexError(ValueError):
+    pass
+
+
+def iter_boxes(data: bytes, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[bytes, int, int]]:
+    """Yield (type, payload start, box end) for the boxes laid out between start and end."""
+    end = len(data) if end is None else end
+    offset = start
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            raise Mp4IndexError(f"Invalid {box_type!r} box at {offset}")
+        yield box_type, offset + header, offset + size
+        offset += size
+
+
+def read_box_header(data: bytes) -> Tuple[bytes, int, int]:
+    """Return (type, header length, box size) of the box starting at data[0]; size 0 means 'to end of file'."""
+    size, box_type = struct.unpack_from(">I4s", data)
+    if size == 1:
+        return box_type, 16, struct.unpack_from(">Q", data, 8)[0]
+    return box_type, 8, size
+
+
+def _find(data: bytes, start: int, end: int, box_type: bytes) -> Optional[Tuple[int, int]]:
+    for found, payload, box_end in iter_boxes(data, start, end):
+        if found == box_type:
+            return payload, box_end
+    return None
+
+
+@dataclass
+class Track:
+    handler: bytes
+    timescale: int
+    time_to_sample: List[Tuple[int, int]]  # stts (count, delta) runs
+    sync_samples: Optional[List[int]]  # stss, 1-based; None when every sample is a keyframe
+    sample_to_chunk: List[Tuple[int, int]]  # stsc (first chunk, samples per chunk), 1-based chunks
+    sample_sizes: Sequence[int]
+    chunk_offsets: Sequence[int]
+
+    @property
+    def sample_count(self) -> int:
+        return len(self.sample_sizes)
+
+    def sample_at(self, seconds: float) -> int:
+        """0-based index of the sample playing at the given time."""
+        ticks = seconds * self.timescale
+        index, elapsed = 0, 0
+        for count, delta in self.time_to_sample:
+            if delta and elapsed + count * delta > ticks:
+                return min(index + max(int((ticks - elapsed) // delta), 0), self.sample_count - 1)
+            elapsed += count * delta
+            index += count
+        return self.sample_count - 1
+
+    def time_of(self, sample: int) -> float:
+        index, elapsed = 0, 0
+        for count, delta in self.time_to_sample:
+            if sample < index + count:
+                return (elapsed + (sample - index) * delta) / self.timescale
+            elapsed += count * delta
+            index += count
+        return elapsed / self.timescale
+
+    def keyframe_before(self, sample: int) -> int:
+        if not self.sync_samples:
+            return sample
+        position = bisect.bisect_right(self.sync_samples, sample + 1) - 1
+        return self.sync_samples[max(position, 0)] - 1
+
+    def byte_ranges(self, first: int, last: int) -> List[Tuple[int, int]]:
+        """[start, end) file ranges holding samples first..last."""
+        ranges = []
+        sample = 0
+        runs = self.sample_to_chunk + [(len(self.chunk_offsets) + 1, 0)]
+        for (first_chunk, per_chunk), (next_chunk, _) in zip(runs, runs[1:]):
+            run_samples = (next_chunk - first_chunk) * per_chunk
+            if sample + run_samples <= first:
+                # Nothing wanted in this run
+                sample += run_samples
+                continue
+            for chunk in range(first_chunk, next_chunk):
+                if sample > last:
+                    return ranges
+                chunk_last = sample + per_chunk - 1
+                if chunk_last >= first:
+                    begin, end = max(first, sample), min(last, chunk_last)
+                    offset = self.chunk_offsets[chunk - 1] + sum(self.sample_sizes[sample:begin])
+                    ranges.append((offset, offset + sum(self.sample_sizes[begin:end + 1])))
+                sample += per_chunk
+        return ranges
+
+
+def parse_moov(data: bytes) -> List[Track]:
+    """Read the sample tables of every track in a moov box payload."""
+    tracks = []
+    for box_type, start, end in iter_boxes(data):
+        if box_type == b"mvex":
+            raise Mp4IndexError("Fragmented MP4 has no complete sample index")
+        if box_type == b"trak":
+            track = _parse_track(data, start, end)
+            if track and track.sample_count:
+                tracks.append(track)
+    return tracks
+
+
+def _parse_track(data: bytes, start: int, end: int) -> Optional[Track]:
+    mdia = _find(data, start, end, b"mdia")
+    minf = mdia and _find(data, *mdia, b"minf")
+    stbl = minf and _find(data, *minf, b"stbl")
+    mdhd = mdia and _find(data, *mdia, b"mdhd")
+    hdlr = mdia and _find(data, *mdia, b"hdlr")
+    if not (stbl and mdhd and hdlr):
+        return None
+
+    version = data[mdhd[0]]
+    timescale = struct.unpack_from(">I", data, mdhd[0] + (20 if version == 1 else 12))[0]
+    handler = data[hdlr[0] + 8:hdlr[0] + 12]
+
+    tables = {box_type: (payload, box_end) for box_type, payload, box_end in iter_boxes(data, *stbl)}
+    if b"stts" not in tables or b"stsc" not in tables or b"stsz" not in tables:
+        return None
+
+    time_to_sample = _entries(data, tables[b"stts"][0], ">II")
+    sample_to_chunk = [(first_chunk, per_chunk) for first_chunk, per_chunk, _ in
+                       _entries(data, tables[b"stsc"][0], ">III")]
+    sync_samples = [entry for entry, in _entries(data, tables[b"stss"][0], ">I")] if b"stss" in tables else None
+
+    stsz = tables[b"stsz"][0]
+    sample_size, count = struct.unpack_from(">II", data, stsz + 4)
+    sample_sizes = [sample_size] * count if sample_size else struct.unpack_from(f">{count}I", data, stsz + 12)
+
+    if b"co64" in tables:
+        chunk_offsets = _table(data, tables[b"co64"][0], "Q")
+    elif b"stco" in tables:
+        chunk_offsets = _table(data, tables[b"stco"][0], "I")
+    else:
+        return None
+    return Track(handler, timescale, time_to_sample, sync_samples, sample_to_chunk, sample_sizes, chunk_offsets)
+
+
+def _entries(data: bytes, payload: int, entry_format: str) -> List[tuple]:
+    count = struct.unpack_from(">I", data, payload + 4)[0]
+    return list(struct.iter_unpack(entry_format, data[payload + 8:payload + 8 + count * struct.calcsize(entry_format)]))
+
+
+def _table(data: bytes, payload: int, entry_type: str) -> Tuple[int, ...]:
+    count = struct.unpack_from(">I", data, payload + 4)[0]
+    return struct.unpack_from(f">{count}{entry_type}", data, payload + 8)
+
+
+def merge_ranges(ranges: List[Tuple[int, int]], gap: int = 0) -> List[Tuple[int, int]]:
+    """Sort and merge [start, end) ranges, joining neighbours closer than gap bytes."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def plan_window(tracks: List[Track], start: float, end: float, gap: int = 0) -> Tuple[List[Tuple[int, int]], float]:
+    """
+    Byte ranges holding start..end seconds of every track, beginning at the video keyframe before start.
+    Returns the ranges and the time of that keyframe.
+    """
+    video = next((track for track in tracks if track.handler == b"vide"), None)
+    keyframe_time = start
+    if video:
+        keyframe_time = video.time_of(video.keyframe_before(video.sample_at(start)))
+
+    ranges = []
+    for track in tracks:
+        first = track.sample_at(keyframe_time)
+        if track is video:
+            first = track.keyframe_before(first)
+        ranges.extend(track.byte_ranges(first, track.sample_at(end)))
+    return merge_ranges(ranges, gap), keyframe_time
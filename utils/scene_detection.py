@@ -0,0 +1,103 @@
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Only the analyzer role needs numpy
+    np = None
+
+HISTOGRAM_BINS = 32
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("Scene detection needs the numpy package: pip install numpy")
+    return np
+
+
+def frame_scores(frames: "np.ndarray", previous: Optional["np.ndarray"] = None) -> "np.ndarray":
+    """
+    Change score in 0..1 of each frame against the frame before it, for a (count, height, width) uint8 batch.
+    The first frame is compared with previous, the last frame of the batch before; without one it scores 0.
+    Mixes the mean pixel difference, which catches cuts between similar palettes, with the histogram distance,
+    which ignores camera and subject motion.
+    """
+    stack = frames if previous is None else np.concatenate([previous[None], frames])
+    flat = stack.reshape(len(stack), -1)
+    pixel_change = np.abs(np.diff(flat.astype(np.int16), axis=0)).mean(axis=1) / 255
+
+    # Every histogram of the batch in one bincount: offset each frame's bin indexes into its own range
+    bins = flat // (256 // HISTOGRAM_BINS) + (np.arange(len(stack)) * HISTOGRAM_BINS)[:, None]
+    histograms = np.bincount(bins.ravel(), minlength=len(stack) * HISTOGRAM_BINS).reshape(len(stack), HISTOGRAM_BINS)
+    histogram_change = np.abs(np.diff(histograms / flat.shape[1], axis=0)).sum(axis=1) / 2
+
+    scores = (pixel_change + histogram_change) / 2
+    if previous is None:
+        scores = np.concatenate([[0.0], scores])
+    return scores
+
+
+def pick_changes(times: "np.ndarray", scores: "np.ndarray", threshold: float, min_gap: float) -> List[float]:
+    """Times of the scene changes: scores over threshold, keeping the strongest of any closer than min_gap."""
+    candidates = np.flatnonzero(scores >= threshold)
+    # Strongest first, so a weaker neighbour never displaces the real cut
+    picked = []
+    for index in candidates[np.argsort(-scores[candidates], kind="stable")]:
+        time = times[index]
+        if all(abs(time - other) >= min_gap for other in picked):
+            picked.append(time)
+    return sorted(float(time) for time in picked)
+
+
+def nominal_boundaries(start: float, end: float, segment_time: float,
+                       skip_pairs: Sequence[Tuple[float, float]] = ()) -> List[float]:
+    """
+    Fixed interval segment boundaries from start to end, counting only time outside skip_pairs,
+    the way expected_segments counts them. Includes start and end.
+    """
+    kept = []
+    position = start
+    for skip_start, skip_end in sorted(skip_pairs):
+        if skip_end <= position or skip_start >= end:
+            continue
+        if skip_start > position:
+            kept.append((position, skip_start))
+        position = max(position, skip_end)
+    if position < end:
+        kept.append((position, end))
+
+    boundaries = [start]
+    elapsed = 0.0
+    next_cut = segment_time
+    for kept_start, kept_end in kept:
+        while elapsed + (kept_end - kept_start) > next_cut:
+            cut = kept_start + next_cut - elapsed
+            if end - cut > 0.5:
+                boundaries.append(cut)
+            next_cut += segment_time
+        elapsed += kept_end - kept_start
+    boundaries.append(end)
+    return boundaries
+
+
+def snap_boundaries(boundaries: List[float], changes: List[float], tolerance: float) -> List[float]:
+    """
+    Move every inner boundary to the nearest scene change at most tolerance seconds away.
+    Keep tolerance under a third of the segment time so neighbouring boundaries can't cross.
+    """
+    if len(boundaries) <= 2 or not changes:
+        return list(boundaries)
+    changes = np.asarray(changes)
+    inner = np.asarray(boundaries[1:-1])
+    # Nearest change on either side of every boundary at once
+    right = np.clip(np.searchsorted(changes, inner), 0, len(changes) - 1)
+    left = np.clip(right - 1, 0, len(changes) - 1)
+    nearest = np.where(np.abs(changes[left] - inner) <= np.abs(changes[right] - inner), changes[left], changes[right])
+    snapped = np.where(np.abs(nearest - inner) <= tolerance, nearest, inner)
+
+    result = [boundaries[0]]
+    for boundary in snapped.tolist():
+        # A boundary snapped onto or past the end of the window would leave an empty segment; drop it
+        if result[-1] < boundary < boundaries[-1]:
+            result.append(round(boundary, 3))
+    result.append(boundaries[-1])
+    return result
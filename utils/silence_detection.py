@@ -0,0 +1,77 @@
+import math
+from typing import List, Optional, Sequence, Tuple
+
+from utils.scene_detection import np
+
+
+def window_levels(samples: "np.ndarray", window: int) -> "np.ndarray":
+    """RMS level in dBFS of every whole window of 16 bit samples."""
+    count = len(samples) // window
+    frames = samples[:count * window].reshape(count, window).astype(np.float32)
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1.0) / 32768)
+
+
+class SilenceTracker:
+    """Turns window levels, fed a chunk at a time, into silent intervals; a run may span any number of chunks."""
+
+    def __init__(self, window_seconds: float, threshold_db: float, min_duration: float, offset: float = 0.0):
+        self.window_seconds = window_seconds
+        self.threshold_db = threshold_db
+        self.min_duration = min_duration
+        self.offset = offset
+        self.windows = 0
+        self.run_start: Optional[int] = None  # window index where the current silent run began
+        self.intervals: List[Tuple[float, float]] = []
+
+    def feed(self, levels: "np.ndarray") -> None:
+        silent = (levels < self.threshold_db).astype(np.int8)
+        carried = self.run_start is not None
+        # Rising and falling edges of the silent runs, continuing the run left open by the chunk before
+        changes = np.diff(silent, prepend=np.int8(carried), append=np.int8(0))
+        starts = (np.flatnonzero(changes == 1) + self.windows).tolist()
+        ends = (np.flatnonzero(changes == -1) + self.windows).tolist()
+        if carried:
+            starts.insert(0, self.run_start)
+        self.run_start = None
+        for start, end in zip(starts, ends):
+            if end == self.windows + len(silent):
+                # Still silent at the end of the chunk; the next chunk decides where the run ends
+                self.run_start = start
+            else:
+                self._close(start, end)
+        self.windows += len(silent)
+
+    def finish(self) -> List[Tuple[float, float]]:
+        if self.run_start is not None:
+            self._close(self.run_start, self.windows)
+            self.run_start = None
+        return self.intervals
+
+    def _close(self, start: int, end: int) -> None:
+        if (end - start) * self.window_seconds >= self.min_duration:
+            self.intervals.append((self.offset + start * self.window_seconds, self.offset + end * self.window_seconds))
+
+
+def to_skip_pairs(intervals: Sequence[Tuple[float, float]], padding: float, min_duration: float) -> List[Tuple[int, int]]:
+    """
+    Whole second skip_pairs inside the silent intervals, leaving padding seconds of silence around the speech.
+    Rounded inwards so no sound is ever skipped.
+    """
+    pairs = []
+    for start, end in intervals:
+        start, end = math.ceil(start + padding), math.floor(end - padding)
+        if end - start >= max(min_duration, 1):
+            pairs.append((start, end))
+    return pairs
+
+
+def merge_skip_pairs(*groups: Sequence[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sorted union of skip_pairs, with overlapping and touching pairs joined."""
+    merged = []
+    for start, end in sorted(pair for group in groups for pair in group or []):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
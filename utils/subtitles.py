@@ -0,0 +1,102 @@
+import bisect
+import os
+from datetime import timedelta
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+import srt
+
+# Pieces of a cue shorter than this after re-timing (e.g. the edge of a skipped stretch) are dropped
+MIN_CUE_SECONDS = 0.1
+
+
+class CueIndex:
+    """The cues of a subtitle file sorted by start, with their times in seconds for fast lookups."""
+
+    def __init__(self, cues: Sequence[srt.Subtitle]):
+        self.cues = sorted((cue for cue in cues if cue.end > cue.start), key=lambda cue: (cue.start, cue.end))
+        self.starts = [cue.start.total_seconds() for cue in self.cues]
+        self.ends = [cue.end.total_seconds() for cue in self.cues]
+
+    def __len__(self) -> int:
+        return len(self.cues)
+
+    @property
+    def end(self) -> float:
+        return max(self.ends, default=0.0)
+
+    def split(self, boundaries: Sequence[float],
+              skip_pairs: Sequence[Tuple[float, float]] = ()) -> List[List[srt.Subtitle]]:
+        """
+        The cues of every segment between consecutive boundaries, re-timed to start at zero with the
+        skipped stretches cut out. One sweep over the cues for all segments: a cue is only looked at
+        again by the segments it overlaps.
+        """
+        timeline = KeptTimeline(boundaries[0], boundaries[-1], skip_pairs) if boundaries else None
+        segments = []
+        active: List[int] = []  # cues started before the current segment ends and not yet over
+        position = 0
+        for start, end in zip(boundaries, boundaries[1:]):
+            while position < len(self.cues) and self.starts[position] < end:
+                active.append(position)
+                position += 1
+            active = [index for index in active if self.ends[index] > start]
+            origin = timeline.kept_before(start)
+            cues = []
+            for index in active:
+                cue_start = timeline.kept_before(max(self.starts[index], start)) - origin
+                cue_end = timeline.kept_before(min(self.ends[index], end)) - origin
+                if cue_end - cue_start >= MIN_CUE_SECONDS:
+                    cue = self.cues[index]
+                    cues.append(srt.Subtitle(index=len(cues) + 1, start=timedelta(seconds=round(cue_start, 3)),
+                                             end=timedelta(seconds=round(cue_end, 3)), content=cue.content,
+                                             proprietary=cue.proprietary))
+            segments.append(cues)
+        return segments
+
+
+class KeptTimeline:
+    """Maps times in the source to times in the output, where the skipped stretches are cut out."""
+
+    def __init__(self, start: float, end: float, skip_pairs: Sequence[Tuple[float, float]]):
+        self.kept_starts: List[float] = []
+        self.kept_ends: List[float] = []
+        self.elapsed: List[float] = []  # kept time before each kept stretch
+        position, elapsed = start, 0.0
+        for skip_start, skip_end in sorted(skip_pairs) + [(end, end)]:
+            skip_start = min(max(skip_start, position), end)
+            skip_end = min(max(skip_end, skip_start), end)
+            if skip_start > position:
+                self.kept_starts.append(position)
+                self.kept_ends.append(skip_start)
+                self.elapsed.append(elapsed)
+                elapsed += skip_start - position
+            position = max(position, skip_end)
+
+    def kept_before(self, time: float) -> float:
+        """Seconds of kept time from the start of the timeline up to time."""
+        index = bisect.bisect_right(self.kept_starts, time) - 1
+        if index < 0:
+            return 0.0
+        return self.elapsed[index] + min(time, self.kept_ends[index]) - self.kept_starts[index]
+
+
+def parse_cues(text: str) -> CueIndex:
+    # Subtitles found in the wild often have stray blank or malformed entries; skip them rather than fail
+    return CueIndex(list(srt.parse(text.lstrip("\ufeff"), ignore_errors=True)))
+
+
+@lru_cache(maxsize=32)
+def _load(path: str, modified: int, size: int) -> CueIndex:
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return parse_cues(f.read())
+
+
+def load_cue_index(path: str) -> CueIndex:
+    """The cue index of an SRT file, parsed once per process for as long as the file is unchanged."""
+    stat = os.stat(path)
+    return _load(path, stat.st_mtime_ns, stat.st_size)
+
+
+def compose(cues: Sequence[srt.Subtitle]) -> str:
+    return srt.compose(cues, reindex=False)
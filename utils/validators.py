@@ -2,10 +2,11 @@ import ast
 import os
 import re
 import uuid
-from typing import Tuple
+from typing import Optional, Tuple
 
 from fastapi import HTTPException
 
+from config import constants
 from config.config import config_properties
 
 
@@ -18,6 +19,12 @@ def validate_video_file(filename: str) -> None:
         raise HTTPException(status_code=400,detail = f"Invalid file type. Accepted types: {', '.join(valid_extensions)}")
 
 
+def validate_subtitle_file(filename: Optional[str]) -> None:
+    """Validate if a subtitles sidecar is an SRT file."""
+    if os.path.splitext(filename or "")[1].lower() != constants.SUBTITLE_EXTENSION:
+        raise HTTPException(status_code=400, detail=f"Invalid subtitles type. Accepted types: {constants.SUBTITLE_EXTENSION}")
+
+
 def generate_unique_filename(filename: str) -> Tuple[str, str]:
     """Generate a unique filename to avoid conflicts."""
     base_name = os.path.splitext(filename)[0]
@@ -42,3 +49,10 @@ def parse_tuple_string(tuple_string: str) -> list[tuple[int,int]]:
 
 def generate_full_path_from_location(location: str) -> str:
     return config_properties.COMPLETE_BASE_URL + "/" +location
+
+def location_from_full_path(url: str) -> Optional[str]:
+    """Inverse of generate_full_path_from_location; None for URLs that are not served by this service."""
+    prefix = config_properties.COMPLETE_BASE_URL + "/"
+    if url and url.startswith(prefix):
+        return url[len(prefix):]
+    return None
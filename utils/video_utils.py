@@ -1,18 +1,20 @@
 import logging
 
-import aiofiles
 from fastapi import UploadFile
 
 from config.config import config_properties
+from storage.storage_manager import StorageManager
 
 logger = logging.getLogger(__name__)
 
+async def read_chunks(file: UploadFile):
+    while chunk := await file.read(config_properties.CHUNK_SIZE):
+        yield chunk
+
 async def save_file_in_chunks(file: UploadFile, file_path: str) -> None:
-    """Save a large file in chunks asynchronously."""
+    """Save a large file in chunks asynchronously to the configured storage backend."""
     try:
-        async with aiofiles.open(file_path, 'wb') as f:
-            while chunk := await file.read(config_properties.CHUNK_SIZE):
-                await f.write(chunk)
+        await StorageManager.get_backend().write_stream(file_path, read_chunks(file))
         logger.info(f"File saved successfully: {file_path}")
     except Exception as e:
         logger.error(f"Error saving file {file_path}: {str(e)}")